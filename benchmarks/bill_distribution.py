@@ -0,0 +1,68 @@
+"""
+Time and accuracy of the household bill distribution for growing populations.
+
+Times bill_impact_distribution for the default configuration at several
+population sizes, and for the smallest one compares its percentiles with
+exact ones computed from every household's impact (which needs the whole
+households x cells matrix in memory, so only a small population is checked).
+
+Usage (from npa_howtopay_app/, where the run configurations are found):
+    python ../benchmarks/bill_distribution.py
+"""
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "npa_howtopay_app"))
+
+import numpy as np
+import polars as pl
+
+from modules.bill_distribution import (
+    BILL_DIST_CHUNK, HOUSEHOLD_DRIVERS, _chunks, bill_impact_distribution, impact_coefficients, sample_needs
+)
+from modules.config import load_all_configs
+from modules.model_runner import values_from_config, get_result
+
+HOUSEHOLD_COUNTS = (100_000, 1_000_000, 5_000_000)
+CHECK_QUANTILES = (0.1, 0.5, 0.9)
+
+
+def max_error_pct(result, values, n, seed=0):
+    """Largest percentile error, as a % of the cell's exact p10-p90 spread, per household type"""
+    dist = bill_impact_distribution(result, values, n=n, seed=seed)
+    needs = np.vstack([sample_needs(values, size, rng) for size, rng in _chunks(n, BILL_DIST_CHUNK, seed)])
+    errors = {}
+    for household, (cells, intercept, coef) in impact_coefficients(result, values).items():
+        impacts = needs @ HOUSEHOLD_DRIVERS[household] @ coef + intercept
+        exact = np.quantile(impacts, CHECK_QUANTILES, axis=0)
+        estimate = dist.filter(pl.col("household") == household)
+        spread = np.maximum(exact[-1] - exact[0], 1e-9)
+        errors[household] = max(
+            float(np.max(np.abs(estimate[f"p{round(q * 100)}"].to_numpy() - exact[i]) / spread))
+            for i, q in enumerate(CHECK_QUANTILES)
+        ) * 100
+    return errors
+
+
+def main():
+    values = values_from_config(next(iter(load_all_configs().values()))["config"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = get_result(values)
+    cells = sum(len(intercept) for _, intercept, _ in impact_coefficients(result, values).values())
+
+    print(f"{'households':>11} {'cells':>6} {'seconds':>8} {'households x cells / s':>23}")
+    for n in HOUSEHOLD_COUNTS:
+        start = time.perf_counter()
+        bill_impact_distribution(result, values, n=n)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>11,} {cells:>6} {elapsed:>8.2f} {n * cells / elapsed:>23,.0f}")
+
+    for household, error in max_error_pct(result, values, HOUSEHOLD_COUNTS[0]).items():
+        print(f"{household}: largest percentile error {error:.3f}% of the p10-p90 spread ({HOUSEHOLD_COUNTS[0]:,} households)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Time to prepare every chart's data: the eager per-chart steps vs the fused lazy plans.
+
+The eager path is what the charts did before modules.chart_data: for each
+chart, scale the metric on the full long frame, and for the total bills
+charts build both user types' frames and keep one. The fused path is
+chart_data_plans collected in one collect_all. Results are repeated (as
+stacked copies, e.g. many runs or territories) to see how both scale.
+Also prints the optimised plan of one chart and the per-stage timings.
+
+Usage (from npa_howtopay_app/, where the run configurations are found):
+    python ../benchmarks/chart_data.py
+"""
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "npa_howtopay_app"))
+
+import polars as pl
+
+from modules.chart_data import USER_TYPES, chart_data_plans, collect_chart_data, explain_chart_data, profile_chart_data
+from modules.config import load_all_configs
+from modules.model_runner import get_result, values_from_config
+from modules.plotting import UTILITY_METRIC_CHARTS, detect_magnitude_and_format
+from modules.result_store import ModelResult
+
+COPIES = (1, 10, 100, 1000)
+REPEAT = 5
+SHOW_YEARS = {"converts": 2030, "nonconverts": 2030}
+
+
+def stacked(result, copies) -> ModelResult:
+    """result with every frame repeated copies times"""
+    frames = (result.delta, result.absolute, result.delta_long, result.absolute_long)
+    return ModelResult(f"{result.key}x{copies}", *(pl.concat([df] * copies) for df in frames))
+
+
+def eager_chart_data(result, show_absolute, show_years):
+    """The per-chart eager steps the charts used to run"""
+    long_df, wide_df = result.long(show_absolute), result.wide(show_absolute)
+    data = {}
+    for chart_id, chart in UTILITY_METRIC_CHARTS.items():
+        column = chart["column"]
+        if chart["y_label_unit"] == "$":
+            scale_factor = detect_magnitude_and_format(long_df[column])[2]
+            data[chart_id] = long_df.with_columns((pl.col(column) / scale_factor).alias(f"{column}_scaled"))
+        elif "%" in chart["y_label_unit"]:
+            data[chart_id] = long_df.with_columns((pl.col(column) * 100).alias(f"{column}_scaled"))
+        else:
+            data[chart_id] = long_df
+    for converts_nonconverts in USER_TYPES:
+        for suffix, df in (("", wide_df), ("_bar", wide_df.filter(pl.col("year") == show_years[converts_nonconverts]))):
+            reshaped = {
+                user_type: df.select(["year", "scenario_id", f"{user_type}_total_bill_per_user"]).with_columns(
+                    pl.lit(user_type.upper()).alias("user_type"),
+                    pl.col(f"{user_type}_total_bill_per_user").alias("total_bill")
+                ).drop(f"{user_type}_total_bill_per_user")
+                for user_type in USER_TYPES
+            }
+            plt_df = reshaped[converts_nonconverts]
+            scale_factor = detect_magnitude_and_format(plt_df["total_bill"])[2]
+            data[f"total_bills_chart_{converts_nonconverts}{suffix}"] = plt_df.with_columns(
+                (pl.col("total_bill") / scale_factor).alias("total_bill_scaled")
+            )
+    return data
+
+
+def best_ms(function):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append(1e3 * (time.perf_counter() - start))
+    return min(times)
+
+
+def main():
+    configs = load_all_configs()
+    values = values_from_config(next(iter(configs.values()))["config"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = get_result(values)
+
+    print(f"{'copies':>7} {'long rows':>10} {'eager ms':>9} {'fused ms':>9} {'speedup':>8}")
+    for copies in COPIES:
+        run = stacked(result, copies)
+        eager = best_ms(lambda: eager_chart_data(run, False, SHOW_YEARS))
+        fused = best_ms(lambda: collect_chart_data(chart_data_plans(run, False, SHOW_YEARS)))
+        print(f"{copies:>7} {run.delta_long.height:>10} {eager:>9.2f} {fused:>9.2f} {eager / fused:>8.2f}")
+
+    plans = chart_data_plans(result, False, SHOW_YEARS)
+    print()
+    print(explain_chart_data({"ratebase_chart": plans["ratebase_chart"]}))
+    print()
+    with pl.Config(tbl_rows=-1, fmt_str_lengths=60):
+        print(profile_chart_data(plans))
+
+
+if __name__ == "__main__":
+    main()
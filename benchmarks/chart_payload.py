@@ -0,0 +1,87 @@
+"""
+Bytes per chart payload sent to the browser: JSON number lists vs base64 typed arrays.
+
+Builds every chart for the default configuration, including the Monte Carlo
+bands and the tornado chart, and serialises each figure two ways: as plotly
+sends it (numpy arrays as "bdata" typed arrays) and with every array written
+out as a JSON list of numbers, as it used to be for list-built traces. Parse
+times are for json.loads, as a stand-in for JSON.parse in the browser.
+
+Usage (from npa_howtopay_app/, where the run configurations are found):
+    python ../benchmarks/chart_payload.py
+"""
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "npa_howtopay_app"))
+
+import polars as pl
+from plotly.utils import PlotlyJSONEncoder
+
+from modules.config import load_all_configs
+from modules.model_runner import values_from_config, get_result
+from modules.monte_carlo import MC_DEFAULT_INPUTS, MC_DISTRIBUTIONS, run_monte_carlo
+from modules.plotting import UTILITY_METRIC_CHARTS, plot_chart, plot_tornado, plot_total_bills_bar, plot_total_bills_ts
+from modules.sensitivity import SENSITIVITY_METRICS, run_sensitivity
+
+MC_SAMPLES = 50
+
+
+def as_number_lists(fig) -> str:
+    """Serialise a figure with every array as a JSON list of numbers"""
+    return json.dumps({"data": [trace.to_plotly_json() for trace in fig.data], "layout": fig.layout.to_plotly_json()},
+                      cls=PlotlyJSONEncoder)
+
+
+def build_figures(values):
+    result = get_result(values)
+    long_df, wide_df = result.long(False), result.wide(False)
+    show_year = values["end_year"]
+    bands = run_monte_carlo(values, MC_DEFAULT_INPUTS, next(iter(MC_DISTRIBUTIONS)), 10, MC_SAMPLES, seed=0)
+    sensitivity = run_sensitivity(values, next(iter(SENSITIVITY_METRICS)), "taxpayer", show_year)
+
+    figures = {}
+    for chart_id, chart in UTILITY_METRIC_CHARTS.items():
+        figures[chart_id] = plot_chart(long_df, chart_id)
+        chart_bands = bands.filter((pl.col("view") == "delta") & (pl.col("metric") == chart["column"]))
+        figures[f"{chart_id} + bands"] = plot_chart(long_df, chart_id, bands_df=chart_bands)
+    figures["total_bills_ts"] = plot_total_bills_ts(
+        wide_df, converts_nonconverts="nonconverts", y_label_title="Combined annual delivery bills",
+        show_absolute=False, show_year=show_year
+    )
+    figures["total_bills_bar"] = plot_total_bills_bar(
+        results_df=wide_df.filter(pl.col("year") == show_year), converts_nonconverts="nonconverts",
+        show_absolute=False, y_label_title="Combined annual delivery bills"
+    )
+    figures["tornado"] = plot_tornado(sensitivity, SENSITIVITY_METRICS[next(iter(SENSITIVITY_METRICS))])
+    return figures
+
+
+def main():
+    configs = load_all_configs()
+    values = values_from_config(next(iter(configs.values()))["config"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        figures = build_figures(values)
+
+    print(f"{'chart':<44} {'lists kB':>9} {'bdata kB':>9} {'ratio':>6} {'parse lists ms':>15} {'parse bdata ms':>15}")
+    totals = [0, 0]
+    for name, fig in figures.items():
+        before, after = as_number_lists(fig), fig.to_json()
+        parse_ms = []
+        for payload in (before, after):
+            start = time.perf_counter()
+            json.loads(payload)
+            parse_ms.append(1e3 * (time.perf_counter() - start))
+        totals[0] += len(before)
+        totals[1] += len(after)
+        print(f"{name:<44} {len(before) / 1e3:>9.1f} {len(after) / 1e3:>9.1f} {len(before) / len(after):>6.2f} "
+              f"{parse_ms[0]:>15.1f} {parse_ms[1]:>15.1f}")
+    print(f"{'total':<44} {totals[0] / 1e3:>9.1f} {totals[1] / 1e3:>9.1f} {totals[0] / totals[1]:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
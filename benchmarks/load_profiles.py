@@ -0,0 +1,56 @@
+"""
+Time and memory of the hourly load profile engine.
+
+Builds the profiles for the default configuration (cold and cached), then
+stacks each year's conversions and finds the coincident peaks for horizons of
+growing length. Also reports the coincident peak per household against the
+single-household peak inputs it replaces in hourly mode.
+
+Usage (from npa_howtopay_app/, where the run configurations are found):
+    python ../benchmarks/load_profiles.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "npa_howtopay_app"))
+
+from modules.config import load_all_configs
+from modules.load_profiles import PROFILE_CACHE, design_peak_kw, get_profiles, headroom_exhausted, hourly_peaks
+from modules.model_runner import values_from_config
+
+HORIZONS = (10, 25, 50, 100)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    out = function(*args)
+    return out, 1e3 * (time.perf_counter() - start)
+
+
+def main():
+    configs = load_all_configs()
+    values = values_from_config(next(iter(configs.values()))["config"])
+
+    PROFILE_CACHE.clear()
+    profiles, cold_ms = timed(get_profiles, values)
+    _, warm_ms = timed(get_profiles, values)
+    print(f"profiles {profiles.shape} {profiles.dtype}: {profiles.nbytes / 1e6:.1f} MB, "
+          f"built in {cold_ms:.0f} ms, cached lookup {warm_ms:.2f} ms")
+
+    peaks = design_peak_kw(values)
+    print(f"heat pump peak per household {peaks['hp_peak_kw']:.2f} kW (input {values['hp_peak_kw']}), "
+          f"AC {peaks['aircon_peak_kw']:.2f} kW (input {values['aircon_peak_kw']})")
+
+    print(f"{'years':>6} {'converts':>9} {'stack ms':>9} {'winter exhausted':>17} {'summer exhausted':>17}")
+    for horizon in HORIZONS:
+        run_values = {**values, "end_year": values["start_year"] + horizon - 1,
+                      "npa_year_range": (values["start_year"], values["start_year"] + horizon - 1)}
+        yearly, stack_ms = timed(hourly_peaks, run_values)
+        exhausted = headroom_exhausted(yearly)
+        print(f"{horizon:>6} {yearly['converts'][-1]:>9} {stack_ms:>9.1f} "
+              f"{str(exhausted['winter']):>17} {str(exhausted['summer']):>17}")
+
+
+if __name__ == "__main__":
+    main()
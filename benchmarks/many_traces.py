@@ -0,0 +1,71 @@
+"""
+Build time and payload of a utility-metric chart as the number of lines per scenario grows.
+
+Stacks copies of the default configuration's result, each scaled slightly, as
+separate runs (line_group="run"), and draws the chart three ways: forced SVG
+lines, forced WebGL lines, and the automatic choice in plot_chart, which
+switches to WebGL above WEBGL_TRACE_THRESHOLD traces and to a median line in a
+min/max envelope past CHART_TRACE_BUDGET/CHART_POINT_BUDGET.
+
+Usage (from npa_howtopay_app/, where the run configurations are found):
+    python ../benchmarks/many_traces.py
+"""
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "npa_howtopay_app"))
+
+import polars as pl
+
+import modules.plotting as plotting
+from modules.config import load_all_configs
+from modules.model_runner import values_from_config, get_result
+
+RUN_COUNTS = (1, 5, 20, 50, 200)
+
+
+def stacked_runs(long_df: pl.DataFrame, n_runs: int) -> pl.DataFrame:
+    return pl.concat([
+        long_df.with_columns(pl.lit(i).alias("run"), pl.col(pl.Float32) * (1 + 0.005 * i))
+        for i in range(n_runs)
+    ])
+
+
+def measure(plt_df: pl.DataFrame, chart_id: str):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fig = plotting.plot_chart(plt_df, chart_id, line_group="run")
+    fig_json = fig.to_json()
+    elapsed_ms = 1e3 * (time.perf_counter() - start)
+    return elapsed_ms, len(fig_json), len(fig.data), fig.data[0].type
+
+
+def main():
+    values = values_from_config(next(iter(load_all_configs().values()))["config"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        long_df = get_result(values).long(False)
+    chart_id = next(iter(plotting.UTILITY_METRIC_CHARTS))
+    modes = {
+        "svg": dict(WEBGL_TRACE_THRESHOLD=10**9, WEBGL_POINT_THRESHOLD=10**9, CHART_TRACE_BUDGET=10**9, CHART_POINT_BUDGET=10**9),
+        "webgl": dict(WEBGL_TRACE_THRESHOLD=0, WEBGL_POINT_THRESHOLD=0, CHART_TRACE_BUDGET=10**9, CHART_POINT_BUDGET=10**9),
+        "auto": {},
+    }
+    defaults = {name: getattr(plotting, name) for name in modes["svg"]}
+
+    print(f"{'runs':>5} {'mode':<6} {'traces':>7} {'type':<10} {'build ms':>9} {'kB':>8}")
+    for n_runs in RUN_COUNTS:
+        plt_df = stacked_runs(long_df, n_runs)
+        for mode, overrides in modes.items():
+            for name, value in {**defaults, **overrides}.items():
+                setattr(plotting, name, value)
+            elapsed_ms, size, n_traces, trace_type = measure(plt_df, chart_id)
+            print(f"{n_runs:>5} {mode:<6} {n_traces:>7} {trace_type:<10} {elapsed_ms:>9.1f} {size / 1e3:>8.1f}")
+    for name, value in defaults.items():
+        setattr(plotting, name, value)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Microbenchmark of the reactive overhead of each rate-limited input.
+
+For n inputs, each wrapped in a rate-limited calc with a downstream effect, it
+measures the time to flush one round of edits to every input (the cost paid
+on each keystroke), how many timer tasks are left sleeping on the event loop,
+and how long it takes until every downstream effect has updated.
+
+Usage (from the repository root):
+    python benchmarks/ratelimit_overhead.py
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "npa_howtopay_app"))
+
+from shiny import reactive
+
+from ratelimit import coalesce, debounce, throttle
+
+DELAY_SECS = 0.05
+INPUT_COUNTS = (1, 10, 100, 500)
+ROUNDS = 10
+
+DECORATORS = {
+    "plain calc": None,
+    "debounce": lambda: debounce(DELAY_SECS),
+    "throttle": lambda: throttle(DELAY_SECS),
+    "coalesce": lambda: coalesce(DELAY_SECS, max_latency_secs=4 * DELAY_SECS),
+}
+
+
+def build_one(make_decorator, value, updates):
+    """A (rate-limited) calc of value, read by an effect that counts its updates"""
+    def f():
+        return value()
+
+    calc = reactive.Calc(f) if make_decorator is None else make_decorator()(f)
+
+    @reactive.Effect
+    def consumer():
+        calc()
+        updates[0] += 1
+
+    return consumer
+
+
+def build(make_decorator, n):
+    """n reactive values, each feeding a (rate-limited) calc read by an effect"""
+    inputs = [reactive.Value(0) for _ in range(n)]
+    updates = [0]
+    effects = [build_one(make_decorator, value, updates) for value in inputs]
+    return inputs, updates, effects
+
+
+async def measure(make_decorator, n):
+    inputs, updates, effects = build(make_decorator, n)
+    await reactive.flush()
+    await asyncio.sleep(2 * DELAY_SECS)
+
+    flush_secs = []
+    settle_secs = []
+    timer_tasks = []
+    for i in range(1, ROUNDS + 1):
+        before = updates[0]
+        start = time.perf_counter()
+        for value in inputs:
+            value.set(i)
+        await reactive.flush()
+        flush_secs.append(time.perf_counter() - start)
+        timer_tasks.append(len(asyncio.all_tasks()) - 1)
+        while updates[0] < before + n:
+            await asyncio.sleep(0.001)
+        settle_secs.append(time.perf_counter() - start)
+
+    for effect in effects:
+        effect.destroy()
+    return {
+        "flush_us_per_input": 1e6 * sum(flush_secs) / len(flush_secs) / n,
+        "timer_tasks": max(timer_tasks),
+        "settle_ms": 1e3 * sum(settle_secs) / len(settle_secs),
+    }
+
+
+async def main():
+    print(f"{'decorator':<12} {'inputs':>6} {'flush us/input':>15} {'timer tasks':>12} {'settle ms':>10}")
+    for name, make_decorator in DECORATORS.items():
+        for n in INPUT_COUNTS:
+            stats = await measure(make_decorator, n)
+            print(
+                f"{name:<12} {n:>6} {stats['flush_us_per_input']:>15.1f} "
+                f"{stats['timer_tasks']:>12} {stats['settle_ms']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
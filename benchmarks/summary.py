@@ -0,0 +1,67 @@
+"""
+Time to summarise many runs: a summary_table per run in a loop vs stacked_summary in one pass.
+
+Runs are copies of one model result, as from a sweep or portfolio of that
+many runs. Also checks both give the same table.
+
+Usage (from npa_howtopay_app/, where the run configurations are found):
+    python ../benchmarks/summary.py
+"""
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "npa_howtopay_app"))
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from modules.config import load_all_configs
+from modules.input_mappings import coerce_input_value
+from modules.model_runner import get_result, values_from_config
+from modules.summary import stacked_summary, summary_table
+
+RUNS = (1, 10, 100, 1000, 5000)
+REPEAT = 3
+
+
+def looped_summary(runs):
+    """summary_table of each run in turn, as a per-run loop would"""
+    return pl.concat([
+        summary_table(
+            result.delta_long,
+            coerce_input_value(values["npv_discount_rate"], "npv_discount_rate"),
+            coerce_input_value(values["start_year"], "start_year"),
+        ).select(pl.lit(run_id).alias("run"), pl.all()).with_columns(pl.col(pl.Categorical).cast(pl.String))
+        for run_id, values, result in runs
+    ])
+
+
+def best_ms(function):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append(1e3 * (time.perf_counter() - start))
+    return min(times)
+
+
+def main():
+    configs = load_all_configs()
+    values = values_from_config(next(iter(configs.values()))["config"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = get_result(values)
+
+    print(f"{'runs':>6} {'long rows':>10} {'loop ms':>9} {'stacked ms':>11} {'speedup':>8}")
+    for n in RUNS:
+        runs = [(run_id, values, result) for run_id in range(n)]
+        assert_frame_equal(looped_summary(runs), stacked_summary(runs), check_dtypes=False)
+        looped = best_ms(lambda: looped_summary(runs))
+        stacked = best_ms(lambda: stacked_summary(runs))
+        print(f"{n:>6} {n * result.delta_long.height:>10} {looped:>9.1f} {stacked:>11.1f} {looped / stacked:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 import plotly.express as px
 import polars as pl
@@ -5,19 +6,39 @@ from pathlib import Path
 import tempfile
 import io
 import zipfile
-from shinywidgets import output_widget, render_plotly
 from shiny import App, reactive, render, ui, req
-import npa_howtopay as nhp
+from shiny.types import SilentException
 import plotly.graph_objects as go
 # Import from modules
-from modules.config import load_all_configs, load_defaults, get_config_value
+from modules.config import DEFAULT_CONFIG_NAME, load_all_configs, load_defaults, get_config_value
 from modules.input_mappings import (
     PIPELINE_INPUTS, ELECTRIC_INPUTS, GAS_INPUTS, 
-    FINANCIAL_INPUTS, SHARED_INPUTS, ALL_INPUT_MAPPINGS
+    FINANCIAL_INPUTS, SHARED_INPUTS, ALL_INPUT_MAPPINGS, coerce_input_value
 )
-from modules.plotting import plot_utility_metric, plot_total_bills_bar,  plot_total_bills_ts, switchbox_colors
-from npa_howtopay.params import COMPARE_COLS
-from ratelimit import debounce
+from modules.plotting import plot_chart, plot_total_bills_bar,  plot_total_bills_ts, plot_tornado, plot_bill_distribution, switchbox_colors, scenario_labels, UTILITY_METRIC_CHARTS
+from modules.export import kaleido_available, render_figures, warm_up
+from modules.model_runner import (
+    MODEL_INPUT_IDS, NPA_SCENARIO_IDS, RESULT_CACHE, get_result_async, params_hash, selected_scenarios, stream_result
+)
+from modules.result_store import SESSION_RESULTS
+from modules.sensitivity import SENSITIVITY_INPUT_IDS, SENSITIVITY_METRICS, run_sensitivity
+from modules.surrogate import SURROGATE_ENABLED, error_summary, get_surrogate_async, preview_key, record_preview_error
+from modules.monte_carlo import MC_DEFAULT_INPUTS, MC_DISTRIBUTIONS, run_monte_carlo
+from modules.bill_distribution import BILL_DIST_HOUSEHOLDS, bill_impact_distribution
+from modules.load_profiles import design_peak_kw, headroom_exhausted, hourly_peaks
+from modules.portfolio import aggregate_portfolio, run_portfolio, territory_frame
+from modules.chart_data import chart_data
+from modules.summary import display_summary, get_summary, portfolio_summary, stacked_summary
+from modules.goal_seek import GOAL_SEEK_DEFAULT_INPUT, goal_seek
+from modules.batch import (
+    BATCH_MAX_ERRORS_SHOWN, BatchError, count_cached, read_parameter_table, run_batch, stack_results, table_to_values,
+    template_table, validate_parameter_table
+)
+from modules.bookmark_store import BOOKMARKS, BOOKMARK_QUERY_PARAM, bookmark_id_from_query
+from modules.api import mount_api
+from modules.figure_cache import FIGURE_CACHE, figure_key
+from modules.plotly_output import output_plotly_json, render_plotly_json
+from ratelimit import coalesce, debounce
 
 css_file = Path(__file__).parent / "styles.css"
 logo_file = Path(__file__).parent / "www" / "sb_logo.png"
@@ -34,45 +55,16 @@ else:
 # Load configurations
 all_configs = load_all_configs()
 run_name_choices = {name: name for name in all_configs.keys()}
-default_run_name = 'test_kiki'
+default_run_name = DEFAULT_CONFIG_NAME
 config = load_defaults(default_run_name)
 
-def coerce_input_value(value, input_id, from_ui=True):
-    """
-    Coerce input value to the correct type based on input_mappings.
-    
-    Args:
-        value: The value to coerce
-        input_id: The input ID from input_mappings
-        from_ui: If True, value is from UI (0-100 for percentages) and will be converted to model format (0-1).
-                If False, value is from config/model (0-1 for percentages) and will be converted to UI format (0-100).
-    """
-    if value is None:
-        return None
-    input_data = ALL_INPUT_MAPPINGS.get(input_id, {})
-    input_type = input_data.get("type")
-    is_pct = input_data.get("is_pct", False)
-    
-    # Handle percentage conversion
-    if is_pct:
-        if from_ui:
-            # Convert from UI (0-100) to model (0-1)
-            value = float(value) / 100.0
-        else:
-            # Convert from model (0-1) to UI (0-100)
-            value = float(value) * 100.0
-    
-    if input_type is None:
-        return value
-    try:
-        if input_type == int:
-            return int(value)
-        elif input_type == float:
-            return float(value)
-        else:
-            return value
-    except (ValueError, TypeError):
-        return value
+# Numeric input choices for the analysis tools, grouped by sidebar section
+numeric_input_choices = {
+    section: {input_id: input_data["label"] for input_id, input_data in inputs.items() if input_id in SENSITIVITY_INPUT_IDS}
+    for section, inputs in [
+        ("NPA & Pipeline", PIPELINE_INPUTS), ("Electric", ELECTRIC_INPUTS), ("Gas", GAS_INPUTS), ("Financials", FINANCIAL_INPUTS)
+    ]
+}
 
 def create_input_with_tooltip(input_id):
     """Create numeric input with tooltip using input mappings"""
@@ -160,6 +152,8 @@ ui.div(
   ),
   ui.div(
     ui.download_button("download_data", "Download Data"),
+    ui.download_button("download_charts", "Download Charts"),
+    ui.input_action_button("share_btn", "Share Link"),
   ),
   class_="app-header"
 ),
@@ -188,6 +182,11 @@ ui.page_sidebar(
         ui.h4("Project Grid Parameters"),
         create_input_with_tooltip("peak_kw_summer_headroom"),
         create_input_with_tooltip("peak_kw_winter_headroom"),
+        ui.tooltip(
+          ui.input_switch("hourly_peaks", "Hourly peaks", value=False),
+          "Derive the heat pump and AC peaks from hourly (8760) load profiles of the converted households instead of the peak kW inputs below. Households don't all peak in the same hour, so their combined peak per household is lower than a single household's."
+        ),
+        ui.output_ui("hourly_peaks_summary"),
         ui.h4("Project Appliance Parameters"),
         create_input_with_tooltip("hp_peak_kw"),
         create_input_with_tooltip("aircon_peak_kw"),
@@ -298,31 +297,50 @@ ui.page_sidebar(
             open=True
         ),
 
+      ui.tooltip(
+        ui.input_checkbox_group(
+          "scenarios",
+          "Scenarios to run:",
+          choices={scenario_id: scenario_labels[scenario_id] for scenario_id in NPA_SCENARIO_IDS},
+          selected=list(NPA_SCENARIO_IDS),
+          inline=True
+        ),
+        "Only the selected scenarios are computed and plotted. BAU is always run, since results are shown as differences from it."
+      ),
                ui.layout_columns(
+        ui.tooltip(
+          ui.input_switch("preview_mode", "Instant preview", value=SURROGATE_ENABLED),
+          "While you edit, show charts estimated from the last model run until you press Run Model."
+        ) if SURROGATE_ENABLED else ui.div(),
+        ui.tooltip(
+          ui.input_switch("live_mode", "Live update", value=False),
+          "Re-run the model automatically shortly after you stop editing (and at least every few seconds while you keep editing), instead of waiting for Run Model."
+        ),
         ui.input_action_button("calculate_btn", "Run Model", class_="btn-primary", width="100%", style="background-color: #023047; color: white; border-color: #023047;"),
-        col_widths={"sm":(-8, 4)}
+        col_widths={"sm":(4, 4, 4)}
       ),
     ),
     ui.h3("Utility Metrics"),
+    ui.output_ui("preview_status"),
         ui.card(
       ui.card_header("Utility Revenue Requirements"),
       ui.output_text("utility_revenue_reqs_chart_description"),
-      output_widget("utility_revenue_reqs_chart"),
+      output_plotly_json("utility_revenue_reqs_chart"),
     ),
     ui.card(
       ui.card_header("Volumetric Tariff"),
       ui.output_text("volumetric_tariff_chart_description"),
-      output_widget("volumetric_tariff_chart"),
+      output_plotly_json("volumetric_tariff_chart"),
     ),
     ui.card(
       ui.card_header("Ratebase"),
       ui.output_text("ratebase_chart_description"),
-      output_widget("ratebase_chart"),
+      output_plotly_json("ratebase_chart"),
     ),
     ui.card(
       ui.card_header("Return on Ratebase as % of Revenue Requirement"),
       ui.output_text("return_component_chart_description"),
-      output_widget("return_component_chart"),
+      output_plotly_json("return_component_chart"),
     ),
 
     ui.h3("Average Household DeliveryBills"),
@@ -339,12 +357,12 @@ ui.page_sidebar(
         col_widths={"sm": (8,4)}
         ),
       ui.layout_columns(
-        output_widget("total_bills_chart_nonconverts"),
-        output_widget("total_bills_chart_nonconverts_bar"),
+        output_plotly_json("total_bills_chart_nonconverts"),
+        output_plotly_json("total_bills_chart_nonconverts_bar"),
         col_widths={"sm": (8,4)}
         ),
         ui.h6("By Utility Type:"),
-        output_widget("nonconverts_bill_per_user_chart"),
+        output_plotly_json("nonconverts_bill_per_user_chart"),
         ),
         ui.card(
       ui.card_header("Converts"),
@@ -359,21 +377,120 @@ ui.page_sidebar(
         col_widths={"sm": (8,4)}
         ),
       ui.layout_columns(
-        output_widget("total_bills_chart_converts"),
-        output_widget("total_bills_chart_converts_bar"),
+        output_plotly_json("total_bills_chart_converts"),
+        output_plotly_json("total_bills_chart_converts_bar"),
         col_widths={"sm": (8,4)}
         ),
         ui.h6("By Utility Type:"),
-        output_widget("converts_bill_per_user_chart"),
+        output_plotly_json("converts_bill_per_user_chart"),
+        ),
+
+    ui.h3("Summary"),
+    ui.card(
+      ui.card_header("Totals over the model run"),
+      ui.p("For each scenario, utility and metric, the change from BAU summed over every year of the run (cumulative), discounted to the start year at the NPV discount rate (NPV), and the largest change in any one year (peak) with the year it occurs. Cumulative and NPV totals are only given for yearly flows: revenue requirements and bills."),
+      ui.output_data_frame("summary_table"),
+      ui.download_button("download_summary", "Download Summary", width="200px"),
+    ),
+
+    ui.h3("Sensitivity Analysis"),
+    ui.card(
+      ui.card_header("Which inputs drive the results?"),
+      ui.p("Each numeric input is decreased and increased by the chosen percentage around the current model run, one at a time. Inputs are ranked by how much they move the chosen metric (delta from BAU) in the chosen scenario and year."),
+      ui.layout_columns(
+        ui.input_select("sensitivity_metric", "Metric:", choices=SENSITIVITY_METRICS),
+        ui.input_select("sensitivity_scenario", "Scenario:",
+          choices={scenario_id: label for scenario_id, label in scenario_labels.items() if scenario_id != "bau"},
+          selected="gas_capex"
+        ),
+        ui.input_select("sensitivity_year", "Year:", choices={}, selected=None),
+        ui.input_numeric("sensitivity_pct", "Perturbation (±%):", value=10, min=1, max=100),
+        ui.input_action_button("sensitivity_btn", "Run Sensitivity", class_="btn-primary", width="100%", style="background-color: #023047; color: white; border-color: #023047; margin-top: 32px;"),
+        col_widths={"sm": (3, 3, 2, 2, 2)}
+      ),
+      output_plotly_json("tornado_chart"),
+    ),
+
+    ui.h3("Uncertainty Analysis"),
+    ui.card(
+      ui.card_header("Monte Carlo"),
+      ui.p("Treat selected inputs as uncertain: the model is run for many random draws around the current values and the utility metric charts show the 10th-90th percentile range as shaded bands."),
+      ui.layout_columns(
+        ui.input_selectize("mc_inputs", "Uncertain inputs:", choices=numeric_input_choices, selected=MC_DEFAULT_INPUTS, multiple=True),
+        ui.input_select("mc_distribution", "Distribution:", choices=MC_DISTRIBUTIONS),
+        ui.input_numeric("mc_spread_pct", "Spread (% of value):", value=10, min=0, max=100),
+        ui.input_numeric("mc_samples", "Samples:", value=200, min=10, max=5000, step=10),
+        ui.input_action_button("mc_btn", "Run Monte Carlo", class_="btn-primary", width="100%", style="background-color: #023047; color: white; border-color: #023047; margin-top: 32px;"),
+        col_widths={"sm": (4, 2, 2, 2, 2)}
+      ),
+      ui.input_switch("show_uncertainty", "Show uncertainty bands on utility metric charts", value=True),
+    ),
+
+    ui.h3("Household Bill Distribution"),
+    ui.card(
+      ui.card_header("How are bill impacts spread across households?"),
+      ui.p("The bill charts above are for a single average household. Here each scenario's tariffs are applied to a synthetic population of households whose heating, water heating and electric needs vary around the values in the sidebar. The line is the median household's change in annual delivery bills and the shaded band the 10th-90th percentile range: nonconverts relative to BAU, converts relative to not converting in the same scenario."),
+      ui.layout_columns(
+        ui.input_numeric("bill_dist_households", "Households:", value=BILL_DIST_HOUSEHOLDS, min=10_000, max=10_000_000, step=100_000),
+        ui.input_action_button("bill_dist_btn", "Simulate Households", class_="btn-primary", width="100%", style="background-color: #023047; color: white; border-color: #023047; margin-top: 32px;"),
+        col_widths={"sm": (3, 3)}
+      ),
+      output_plotly_json("bill_distribution_chart"),
+    ),
+
+    ui.h3("Break-even Analysis"),
+    ui.card(
+      ui.card_header("Goal Seek"),
+      ui.p("Find the value of an input at which the chosen metric (delta from BAU) reaches a target in the chosen scenario and year, e.g. the NPA cost per household at which nonconverts see no bill change. All other inputs are held at the values of the current model run."),
+      ui.layout_columns(
+        ui.input_selectize("goal_seek_input", "Solve for:", choices=numeric_input_choices, selected=GOAL_SEEK_DEFAULT_INPUT),
+        ui.input_select("goal_seek_metric", "Metric:", choices=SENSITIVITY_METRICS),
+        ui.input_select("goal_seek_scenario", "Scenario:",
+          choices={scenario_id: label for scenario_id, label in scenario_labels.items() if scenario_id != "bau"},
+          selected="gas_capex"
         ),
+        ui.input_select("goal_seek_year", "Year:", choices={}, selected=None),
+        ui.input_numeric("goal_seek_target", "Target ($):", value=0),
+        ui.input_action_button("goal_seek_btn", "Solve", class_="btn-primary", width="100%", style="background-color: #023047; color: white; border-color: #023047; margin-top: 32px;"),
+        col_widths={"sm": (3, 2, 2, 2, 1, 2)}
+      ),
+      ui.output_ui("goal_seek_result"),
+    ),
+
+    ui.h3("Bulk Runs"),
+    ui.card(
+      ui.card_header("Upload parameter sets"),
+      ui.p("Upload a CSV or Parquet table with one parameter set per row and input ids as column names (values in the units shown in the sidebar, percentages as 0-100). Blank cells and missing columns take the values of the current model run. Start from the template to get every column. Parameter sets that were already run are taken from the cache."),
+      ui.layout_columns(
+        ui.input_file("batch_file", "Parameter table:", accept=[".csv", ".parquet"]),
+        ui.download_button("download_batch_template", "Download Template", width="100%", style="margin-top: 32px;"),
+        ui.input_action_button("batch_btn", "Run All", class_="btn-primary", width="100%", style="background-color: #023047; color: white; border-color: #023047; margin-top: 32px;"),
+        ui.download_button("download_batch", "Download Results", width="100%", style="margin-top: 32px;"),
+        col_widths={"sm": (6, 2, 2, 2)}
+      ),
+      ui.output_ui("batch_status"),
+    ),
+
+    ui.h3("Portfolio"),
+    ui.card(
+      ui.card_header("Run several territories together"),
+      ui.p("Run the default settings of several utility territories at once, with the scenario selection and hourly peak mode of the sidebar. The charts above then show the portfolio: revenue requirements and ratebases summed across territories, and tariffs, returns and bills averaged, weighted by each territory's initial customers (or ratebase, for returns). Run Model returns the charts to the sidebar's parameters."),
+      ui.layout_columns(
+        ui.input_selectize("portfolio_runs", "Territories:", choices=run_name_choices, multiple=True),
+        ui.input_radio_buttons("portfolio_view", "Show:", {"aggregate": "Portfolio total", "territory": "Each territory"}, inline=True),
+        ui.input_action_button("portfolio_btn", "Run Portfolio", class_="btn-primary", width="100%", style="background-color: #023047; color: white; border-color: #023047; margin-top: 32px;"),
+        col_widths={"sm": (6, 4, 2)}
+      ),
+      ui.output_ui("portfolio_status"),
+    ),
 
     # ui.card(
     #   ui.card_header("Converts"),
     #   ui.output_ui("converts_bill_per_user_chart_description"),
-    #   output_widget("converts_bill_per_user_chart"),
+    #   output_plotly_json("converts_bill_per_user_chart"),
     # ),
 
-    col_widths={"sm": (12,12,6, 6, 6, 6, 12, 12, 12)},
+    col_widths={"sm": (12,12,6, 6, 6, 6, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12)},
   ),
   ui.include_css(css_file),
   # title="NPA How to Pay ",
@@ -382,6 +499,8 @@ ui.page_sidebar(
 
 def server(input, output, session):
     """Server function for the Shiny app."""
+    # Start the chart export renderers in the background on the first session, so no download waits on them
+    warm_up()
 
     # INSERT_YOUR_CODE
     @reactive.calc
@@ -477,11 +596,38 @@ def server(input, output, session):
         selected_run = input.run_name()
         return all_configs[selected_run]["description"]
     
+    # Snapshot restored from a server-side bookmark; charts are rendered from it until the user recalculates
+    restored_values = reactive.value(None)
+    # Cached result the restored bookmark was saved with, or None if it has been evicted
+    restored_result = reactive.value(None)
+    # Run name a restored bookmark is waiting on before its inputs can be applied
+    pending_run_name = reactive.value(None)
+
+    def apply_restored_inputs(values):
+        """Push a restored parameter snapshot (UI units) back into the sidebar inputs"""
+        for input_id in MODEL_INPUT_IDS:
+            ui.update_numeric(input_id, value=values[input_id])
+        start, end = values["npa_year_range"]
+        ui.update_slider("npa_year_range", value=[start, end])
+        ui.update_checkbox_group("scenarios", selected=list(values.get("scenarios", NPA_SCENARIO_IDS)))
+        ui.update_switch("hourly_peaks", value=bool(values.get("hourly_peaks", False)))
+
     # Update all inputs when config changes
     @reactive.effect
     def update_all_inputs():
         config = current_config()
         
+        # A restored bookmark overrides the defaults of its own run name
+        with reactive.isolate():
+            restored = restored_values()
+            waiting_for = pending_run_name()
+        if restored is not None:
+            if waiting_for == input.run_name():
+                pending_run_name.set(None)
+                apply_restored_inputs(restored)
+                return
+            restored_values.set(None)
+        
         # Update all inputs using the combined mapping
         for input_id, input_data in ALL_INPUT_MAPPINGS.items():
             try:
@@ -611,6 +757,8 @@ def server(input, output, session):
             # Update both dropdowns with same choices but independent selections
             ui.update_select("show_year_nonconverts", choices=choices, selected=selected_nonconverts)
             ui.update_select("show_year_converts", choices=choices, selected=selected_converts)
+            ui.update_select("sensitivity_year", choices=choices, selected=end)
+            ui.update_select("goal_seek_year", choices=choices, selected=end)
 
     
     
@@ -619,6 +767,10 @@ def server(input, output, session):
         start = coerce_input_value(input.start_year(), "start_year")
         end = coerce_input_value(input.end_year(), "end_year")
         default = [start, min(end, start + 10)]
+        with reactive.isolate():
+            restored = restored_values()
+        if restored is not None:
+            default = [max(start, restored["npa_year_range"][0]), min(end, restored["npa_year_range"][1])]
         return ui.tooltip(
             ui.input_slider(
                 "npa_year_range", 
@@ -638,185 +790,356 @@ def server(input, output, session):
         """Debounced version of npa_year_range to prevent model runs during dragging"""
         return input.npa_year_range()
 
+    def snapshot_inputs(npa_year_range):
+        """The current inputs as the flat parameter dict the model runner works from"""
+        values = {input_id: getattr(input, input_id)() for input_id in MODEL_INPUT_IDS}
+        values["npa_year_range"] = tuple(npa_year_range)
+        values["scenarios"] = tuple(input.scenarios() or ())
+        values["hourly_peaks"] = bool(input.hourly_peaks())
+        return values
+
+    # Live mode: edits are coalesced into one run 0.4s after they stop,
+    # or at most 2s after the first one while editing continues
+    @coalesce(0.4, max_latency_secs=2, when=input.live_mode)
     @reactive.calc
-    @reactive.event(input.calculate_btn, input.run_name, ignore_none=False, ignore_init=False)
-    def create_web_params():
-        """Create the web parameters object for the model"""
-        web_params = {
-            "npa_num_projects": coerce_input_value(input.npa_projects_per_year(), "npa_projects_per_year"),
-            "num_converts": coerce_input_value(input.num_converts_per_project(), "num_converts_per_project"),
-            "pipe_value_per_user": coerce_input_value(input.pipe_value_per_user(), "pipe_value_per_user"),
-            "pipe_decomm_cost_per_user": 0.0,
-            "peak_kw_winter_headroom": coerce_input_value(input.peak_kw_winter_headroom(), "peak_kw_winter_headroom"),
-            "peak_kw_summer_headroom": coerce_input_value(input.peak_kw_summer_headroom(), "peak_kw_summer_headroom"),
-            "aircon_percent_adoption_pre_npa": coerce_input_value(input.aircon_percent_adoption_pre_npa(), "aircon_percent_adoption_pre_npa"),
-            "scattershot_electrification_users_per_year": coerce_input_value(input.scattershot_electrification_users_per_year(), "scattershot_electrification_users_per_year"),
-            "gas_fixed_overhead_costs": coerce_input_value(input.gas_fixed_overhead_costs(), "gas_fixed_overhead_costs"),
-            "electric_fixed_overhead_costs": coerce_input_value(input.electric_fixed_overhead_costs(), "electric_fixed_overhead_costs"),
-            "gas_bau_lpp_costs_per_year": coerce_input_value(input.gas_bau_lpp_costs_per_year(), "gas_bau_lpp_costs_per_year"),
-            "npa_year_start": debounced_npa_year_range()[0],
-            "npa_year_end": debounced_npa_year_range()[1],
-            "is_scattershot": False,
-        }
-        return web_params
-    
-    @reactive.calc
-    @reactive.event(input.calculate_btn, input.run_name, ignore_none=False, ignore_init=False)
-    def create_gas_params():
-        """Create the parameters object for the model"""
-        gas_params = nhp.params.GasParams(
-            baseline_non_lpp_ratebase_growth=coerce_input_value(input.baseline_non_lpp_ratebase_growth(), "baseline_non_lpp_ratebase_growth"),
-            default_depreciation_lifetime=coerce_input_value(input.non_lpp_depreciation_lifetime(), "non_lpp_depreciation_lifetime"),
-            pipeline_depreciation_lifetime=coerce_input_value(input.pipeline_depreciation_lifetime(), "pipeline_depreciation_lifetime"),
-            non_lpp_depreciation_lifetime=coerce_input_value(input.non_lpp_depreciation_lifetime(), "non_lpp_depreciation_lifetime"),
-            gas_generation_cost_per_therm_init=coerce_input_value(input.gas_generation_cost_per_therm_init(), "gas_generation_cost_per_therm_init"),
-            num_users_init=coerce_input_value(input.gas_num_users_init(), "gas_num_users_init"),
-            per_user_heating_need_therms=coerce_input_value(input.per_user_heating_need_therms(), "per_user_heating_need_therms"),
-            per_user_water_heating_need_therms=coerce_input_value(input.per_user_water_heating_need_therms(), "per_user_water_heating_need_therms"),
-            user_bill_fixed_charge=coerce_input_value(input.gas_user_bill_fixed_charge(), "gas_user_bill_fixed_charge"),
-            pipeline_maintenance_cost_pct=coerce_input_value(input.pipeline_maintenance_cost_pct(), "pipeline_maintenance_cost_pct"),
-            ratebase_init=coerce_input_value(input.gas_ratebase_init(), "gas_ratebase_init"),
-            ror=coerce_input_value(input.gas_ror(), "gas_ror")
-        )
-        return gas_params
-        
+    def live_values():
+        req(input.live_mode())
+        return snapshot_inputs(input.npa_year_range())
+
+    @reactive.extended_task
+    async def live_model_run(values):
+        return values, await get_result_async(values)
+
+    # Last completed live run as (values, result)
+    live_result = reactive.value(None)
+
+    @reactive.effect
+    def start_live_run():
+        values = live_values()
+        # A newer snapshot supersedes a run still in flight
+        with reactive.isolate():
+            if live_model_run.status() == "running":
+                live_model_run.cancel()
+        live_model_run.invoke(values)
+
+    @reactive.effect
+    def finish_live_run():
+        if live_model_run.status() == "error":
+            ui.notification_show("Live update failed; press Run Model to retry.", duration=5, type="error")
+            return
+        live_result.set(live_model_run.result())
+
+    @reactive.effect
+    @reactive.event(input.live_mode)
+    def stop_live_mode():
+        if not input.live_mode():
+            live_model_run.cancel()
+            live_result.set(None)
+
     @reactive.calc
-    @reactive.event(input.calculate_btn, input.run_name, ignore_none=False, ignore_init=False)
-    def create_electric_params():
-        """Create the parameters object for the model"""
-        electric_params = nhp.params.ElectricParams(
-            aircon_peak_kw=coerce_input_value(input.aircon_peak_kw(), "aircon_peak_kw"),  # peak energy consumption of a household airconditioning unit
-            baseline_non_npa_ratebase_growth=coerce_input_value(input.baseline_non_npa_ratebase_growth(), "baseline_non_npa_ratebase_growth"),
-            default_depreciation_lifetime=coerce_input_value(input.electric_default_depreciation_lifetime(), "electric_default_depreciation_lifetime"),
-            grid_upgrade_depreciation_lifetime=coerce_input_value(input.grid_upgrade_depreciation_lifetime(), "grid_upgrade_depreciation_lifetime"),
-            distribution_cost_per_peak_kw_increase_init=coerce_input_value(input.distribution_cost_per_peak_kw_increase_init(), "distribution_cost_per_peak_kw_increase_init"),
-            electric_maintenance_cost_pct=coerce_input_value(input.electric_maintenance_cost_pct(), "electric_maintenance_cost_pct"),
-            electricity_generation_cost_per_kwh_init=coerce_input_value(input.electricity_generation_cost_per_kwh_init(), "electricity_generation_cost_per_kwh_init"),
-            hp_efficiency=coerce_input_value(input.hp_efficiency(), "hp_efficiency"),
-            water_heater_efficiency=coerce_input_value(input.water_heater_efficiency(), "water_heater_efficiency"),
-            hp_peak_kw=coerce_input_value(input.hp_peak_kw(), "hp_peak_kw"),
-            num_users_init=coerce_input_value(input.electric_num_users_init(), "electric_num_users_init"),
-            per_user_electric_need_kwh=coerce_input_value(input.per_user_electric_need_kwh(), "per_user_electric_need_kwh"),
-            ratebase_init=coerce_input_value(input.electric_ratebase_init(), "electric_ratebase_init"),
-            user_bill_fixed_charge=coerce_input_value(input.electric_user_bill_fixed_charge(), "electric_user_bill_fixed_charge"),
-            ror=coerce_input_value(input.electric_ror(), "electric_ror")
-        )
-        return electric_params
+    @reactive.event(input.calculate_btn, input.run_name, restored_values, live_result, ignore_none=False, ignore_init=False)
+    def model_values():
+        """Snapshot of the inputs behind the current results"""
+        if restored_values() is not None:
+            return restored_values()
+        if live_result() is not None:
+            return live_result()[0]
+        return snapshot_inputs(debounced_npa_year_range())
+
+    # MODEL FUNCTIONS
+
+    # Results of the scenarios finished so far while a model run is in progress
+    partial_result = reactive.value(None)
+    # Last portfolio run as {"territories": run name -> (values, result), "result": aggregate}, until the next model run
+    portfolio = reactive.value(None)
+
+    @reactive.extended_task
+    async def model_run(values):
+        progress = None
+
+        async def on_progress(done, total, partial):
+            nonlocal progress
+            if progress is None:
+                progress = ui.Progress(min=0, max=total)
+            scenario_id = selected_scenarios(values)[done]
+            progress.set(done, message=f"Running {scenario_labels[scenario_id]} scenario ({done + 1}/{total})...")
+            if partial is not None:
+                # Publish right away so the charts fill in scenario by scenario
+                async with reactive.lock():
+                    partial_result.set(partial)
+                    await reactive.flush()
+
+        try:
+            return await stream_result(values, on_progress)
+        finally:
+            if progress is not None:
+                progress.close()
+
+    # Key of the snapshot model_run was last invoked with
+    model_run_key = {"key": None}
+
+    @reactive.effect
+    def start_model_run():
+        values = model_values()
+        with reactive.isolate():
+            if live_result() is not None and restored_values() is None:
+                return
+            if model_run.status() == "running":
+                # Recalculating the same inputs keeps the run in flight
+                if model_run_key["key"] == params_hash(values):
+                    return
+                # A newer snapshot supersedes a run still in flight
+                model_run.cancel()
+            # A bookmark whose result is still cached is shown as saved, without a run
+            cached_bookmark = restored_values() is not None and restored_result() is not None
+        partial_result.set(None)
+        if not cached_bookmark:
+            model_run_key["key"] = params_hash(values)
+            model_run.invoke(values)
 
     @reactive.calc
-    @reactive.event(input.calculate_btn, input.run_name, ignore_none=False, ignore_init=False)
-    def create_shared_params():
-        """Create the parameters object for the model"""
-        shared_params = nhp.params.SharedParams(
-            cost_inflation_rate=coerce_input_value(input.cost_inflation_rate(), "cost_inflation_rate"), 
-            real_dollar_discount_rate=coerce_input_value(input.real_dollar_discount_rate(), "real_dollar_discount_rate"), 
-            npv_discount_rate=coerce_input_value(input.npv_discount_rate(), "npv_discount_rate"),
-            performance_incentive_pct=coerce_input_value(input.performance_incentive_pct(), "performance_incentive_pct"),
-            incentive_payback_period=coerce_input_value(input.incentive_payback_period(), "incentive_payback_period"),
-            construction_inflation_rate=coerce_input_value(input.construction_inflation_rate(), "construction_inflation_rate"),
-            npa_install_costs_init=coerce_input_value(input.npa_install_costs_init(), "npa_install_costs_init"),
-            npa_lifetime=coerce_input_value(input.npa_lifetime(), "npa_lifetime"), 
-            start_year=coerce_input_value(input.start_year(), "start_year")
-        )
-        return shared_params
+    def run_model():
+        if restored_values() is not None and restored_result() is not None:
+            result = restored_result()
+        elif live_result() is not None and restored_values() is None:
+            result = live_result()[1]
+        else:
+            result = model_run.result()
+        return result
+
+    @reactive.effect
+    def track_session_result():
+        """Record the result this session holds, for the per-session memory report at /api/memory"""
+        SESSION_RESULTS[session.id] = run_model().key
+
+    # PREVIEWS: a linear surrogate fitted around the last exact run gives instant,
+    # approximate charts for edited inputs until an exact run replaces them
+
+    def previews_on():
+        return SURROGATE_ENABLED and bool(input.preview_mode())
+
+    @reactive.extended_task
+    async def surrogate_build(values):
+        return await get_surrogate_async(values)
+
+    @reactive.effect
+    @reactive.event(run_model, previews_on)
+    def start_surrogate_build():
+        """
+        Fit around each Run Model or bookmark result; live updates keep using the last fit,
+        as do runs within the neighbourhood it was measured over
+        """
+        with reactive.isolate():
+            if not previews_on() or (live_result() is not None and restored_values() is None):
+                return
+            if surrogate_build.status() == "running":
+                return
+            if surrogate_build.status() == "success" and surrogate_build.result().near(model_values()):
+                return
+            surrogate_build.invoke(model_values())
+
+    # Only tracks the sidebar when previews are on
+    @debounce(0.1, when=previews_on)
     @reactive.calc
-    @reactive.event(input.calculate_btn, input.run_name, ignore_none=False, ignore_init=False)
-    def create_input_params():
-        """Create the parameters object for the model"""
-        input_params = nhp.params.InputParams(
-            gas=create_gas_params(),
-            electric=create_electric_params(),
-            shared=create_shared_params()
-        )
-        return input_params
+    def preview_inputs():
+        return snapshot_inputs(input.npa_year_range())
+
+    # Last preview shown, so its error can be measured once the exact run for the same inputs arrives
+    last_preview = {"result": None}
 
     @reactive.calc
-    @reactive.event(input.calculate_btn, input.run_name, ignore_none=False, ignore_init=False)
-    def create_ts_inputs():
-        """Create the time series inputs for the model"""
-        web_params = create_web_params()
-        start_year = coerce_input_value(input.start_year(), "start_year")
-        end_year = coerce_input_value(input.end_year(), "end_year")
-        return nhp.params.load_time_series_params_from_web_params(web_params, start_year, end_year+1)
-    
+    def preview_result():
+        """Approximate result for the current inputs, or None when the exact results already match them"""
+        if not previews_on() or surrogate_build.status() != "success":
+            return None
+        values = preview_inputs()
+        if params_hash(values) == params_hash(model_values()):
+            return None
+        preview = surrogate_build.result().predict(values)
+        if preview is not None:
+            last_preview["result"] = preview
+        return preview
+
     @reactive.calc
-    @reactive.event(input.calculate_btn, input.run_name, ignore_none=False, ignore_init=False)
-    def create_scenario_runs():
-        """Create the scenario parameters for the model"""
-        start_year = coerce_input_value(input.start_year(), "start_year")
-        end_year = coerce_input_value(input.end_year(), "end_year")
-        return nhp.model.create_scenario_runs(start_year, end_year+1, ["gas", "electric"], ["capex", "opex"])
+    def shown_result():
+        """
+        Result behind the charts: a portfolio's aggregate after a portfolio run, the
+        preview while there is one, the scenarios finished so far while a model run
+        is in progress, otherwise the exact run
+        """
+        if portfolio() is not None:
+            return portfolio()["result"]
+        preview = preview_result()
+        if preview is not None:
+            return preview
+        if model_run.status() == "running" and partial_result() is not None:
+            return partial_result()
+        return run_model()
 
-    # MODEL FUNCTIONS
+    preview_error = reactive.value(None)
 
-    @reactive.calc
-    @reactive.event(input.calculate_btn, ignore_none=False, ignore_init=False)
-    def run_model():
-        scenario_runs = create_scenario_runs()
-        input_params = create_input_params()
-        ts_params = create_ts_inputs()
-        results_all = nhp.model.run_all_scenarios(scenario_runs, input_params, ts_params)
-        
-        return results_all
+    @reactive.effect
+    @reactive.event(run_model)
+    def check_preview():
+        """Measure the last preview against the exact run that replaces it"""
+        preview = last_preview["result"]
+        last_preview["result"] = None
+        if preview is None or preview.key != preview_key(model_values()):
+            preview_error.set(None)
+            return
+        # Shown under the charts by preview_status
+        preview_error.set(record_preview_error(preview, run_model()))
+
+    @render.ui
+    def preview_status():
+        if portfolio() is not None:
+            names = ", ".join(portfolio()["territories"])
+            return ui.div(
+                ui.strong("Portfolio. "),
+                f"These charts combine {len(portfolio()['territories'])} territories: {names}. "
+                "Press Run Model to return to the sidebar's parameters.",
+                class_="alert alert-info py-2"
+            )
+        if preview_result() is not None:
+            summary = error_summary()
+            typical = f" Previews have typically been within {summary['median_max_pct']:.2g}% of the exact results." if summary else ""
+            return ui.div(
+                ui.strong("Approximate preview. "),
+                f"These charts are estimated from the last model run.{typical} "
+                "Press Run Model (or turn on Live update) for exact results.",
+                class_="alert alert-warning py-2"
+            )
+        error = preview_error()
+        if error is not None:
+            return ui.p(
+                f"Exact results. The preview they replaced was off by at most {error['max_pct']:.2g}% "
+                f"({error['mean_pct']:.2g}% on average across metrics).",
+                class_="text-muted small"
+            )
+        return None
 
     @reactive.calc
-    @reactive.event(input.calculate_btn, input.show_absolute, ignore_none=False, ignore_init=False)
-    def return_delta_or_absolute_df():
-        results_all = run_model()
-        print("results_all type:", type(results_all))
-        print("results_all keys:", results_all.keys() if isinstance(results_all, dict) else "Not a dict")
-        
-        # Check if input is available
-        try:
-            show_absolute = input.show_absolute()
-            print(f"show_absolute value: {show_absolute}")
-        except Exception as e:
-            print(f"Error accessing show_absolute: {e}")
-            show_absolute = False  # Default to False
-        
-        if show_absolute:
-            print("Taking absolute path")
+    def plot_data():
+        """Plot-ready data for every chart of the shown result, from one fused query (see modules.chart_data)"""
+        show_years = {"converts": input.show_year_converts(), "nonconverts": input.show_year_nonconverts()}
+        return chart_data(shown_result(), input.show_absolute(), show_years)
 
-            combined_df = nhp.model.return_absolute_values_df(results_all, COMPARE_COLS)
-            print("combined_df type:", type(combined_df))
-            print("combined_df shape:", combined_df.shape)
-            
-        else:
-            print("Taking delta path")
-            combined_df = nhp.model.create_delta_df(results_all, COMPARE_COLS)
-            print("combined_df type:", type(combined_df))
-            print("combined_df shape:", combined_df.shape)
-        
-        return combined_df
     @reactive.calc
-    @reactive.event(input.calculate_btn, input.show_absolute, ignore_none=False, ignore_init=False)
-    def prep_df_to_plot():
-        combined_df = return_delta_or_absolute_df()
-        
-        plt_df = nhp.utils.transform_to_long_format(combined_df)
-        print("Final plt_df type:", type(plt_df))
-        print("Final plt_df shape:", plt_df.shape)
-        print("Final plt_df columns:", plt_df.columns)
-        return plt_df
+    def shown_summary():
+        """Summary table of the shown result, per territory while a portfolio is shown by territory"""
+        if portfolio() is not None and input.portfolio_view() == "territory":
+            return portfolio_summary(portfolio()["territories"], portfolio()["result"].key)
+        # A preview is discounted at the inputs it previews; everything else at the last model run's
+        values = preview_inputs() if preview_result() is not None else model_values()
+        return get_summary(shown_result(), values)
+
+    @render.data_frame
+    def summary_table():
+        return render.DataGrid(display_summary(shown_summary()), width="100%", height="400px")
+
+    @render.download(
+        filename=lambda: f'{input.run_name()}_summary.csv',
+        media_type="text/csv"
+    )
+    def download_summary():
+        buffer = io.BytesIO()
+        shown_summary().write_csv(buffer)
+        yield buffer.getvalue()
+
+    @session.on_ended
+    def _():
+        SESSION_RESULTS.pop(session.id, None)
 
 
  # PLOTTING FUNCTIONS  
 
+    def cached_figure_json(chart_id, build, show_year=None):
+        """Figure JSON for a chart of the shown result, built only if no session has built it yet"""
+        key = figure_key(shown_result().key, chart_id, input.show_absolute(), show_year)
+        return FIGURE_CACHE.get_or_build(key, build)
 
-    @render_plotly
-    def utility_revenue_reqs_chart():
-        df = prep_df_to_plot()
+    @reactive.calc
+    def territory_view():
+        """Territories to draw a line each for, while a portfolio is shown by territory; otherwise None"""
+        if portfolio() is None or input.portfolio_view() != "territory":
+            return None
+        return portfolio()["territories"]
+
+    def utility_chart_json(df, chart_id, show_year=None):
+        """A utility metric chart; charts with Monte Carlo bands are specific to the session, so aren't cached"""
+        # Monte Carlo bands are for the sidebar's parameters, so aren't drawn over a portfolio
+        bands_df = chart_bands(chart_id) if portfolio() is None else None
+        show_absolute = input.show_absolute()
+        line_group, cache_id = None, chart_id
+        if territory_view() is not None:
+            df, line_group, cache_id = territory_frame(territory_view(), show_absolute), "territory", f"{chart_id}_territory"
+
+        def build():
+            return plot_chart(df, chart_id, show_absolute=show_absolute, show_year=show_year, bands_df=bands_df,
+                              line_group=line_group)
+
+        if bands_df is not None:
+            return build().to_json()
+        return cached_figure_json(cache_id, build, show_year=show_year)
+
+    def utility_chart_show_year(chart_id):
+        """Year marked on a utility metric chart"""
+        if chart_id == "nonconverts_bill_per_user_chart":
+            return input.show_year_nonconverts()
+        if chart_id == "converts_bill_per_user_chart":
+            return 2030
+        return None
+
+    def utility_metric_json(chart_id):
+        """A utility metric chart as shown on screen (and exported)"""
+        df = plot_data()[chart_id]
         req(not df.is_empty())  # Check that DataFrame is not empty
-        
-        return plot_utility_metric(
-            plt_df=df,
-            column="inflation_adjusted_revenue_requirement", 
-            title="Utility Revenue Requirements",
-            y_label_unit="$",
-            y_label_title="Utility revenue requirement",
-            show_absolute=input.show_absolute()
+        return utility_chart_json(df, chart_id, show_year=utility_chart_show_year(chart_id))
+
+    def total_bills_bar_json(converts_nonconverts):
+        """A combined bills bar chart for the selected year, as shown on screen (and exported)"""
+        show_year = getattr(input, f"show_year_{converts_nonconverts}")()
+        req(show_year is not None)  # Check that year selection is not None
+        df = plot_data()[f"total_bills_chart_{converts_nonconverts}_bar"]
+        req(not df.is_empty())  # Check that DataFrame is not empty
+        return cached_figure_json(
+            f"total_bills_chart_{converts_nonconverts}_bar",
+            lambda: plot_total_bills_bar(
+                results_df=df, converts_nonconverts=converts_nonconverts,
+                show_absolute=input.show_absolute(),
+                y_label_title=f"Combined annual delivery bills in {show_year}"
+            ),
+            show_year=show_year
         )
 
+    def total_bills_ts_json(converts_nonconverts):
+        """A combined bills time series chart, with a line per territory while a portfolio is shown by territory"""
+        show_year = getattr(input, f"show_year_{converts_nonconverts}")()
+        req(show_year is not None)  # Check that year selection is not None
+        df = plot_data()[f"total_bills_chart_{converts_nonconverts}"]
+        req(not df.is_empty())  # Check that DataFrame is not empty
+        show_absolute = input.show_absolute()
+        line_group, cache_id = None, f"total_bills_chart_{converts_nonconverts}"
+        if territory_view() is not None:
+            df, line_group = territory_frame(territory_view(), show_absolute, long=False), "territory"
+            cache_id = f"{cache_id}_territory"
+        return cached_figure_json(
+            cache_id,
+            lambda: plot_total_bills_ts(
+                df, converts_nonconverts=converts_nonconverts,
+                y_label_title="Combined annual delivery bills",
+                show_absolute=show_absolute,
+                show_year=show_year,
+                line_group=line_group
+            ),
+            show_year=show_year
+        )
+
+
+    @render_plotly_json
+    def utility_revenue_reqs_chart():
+        return utility_metric_json("utility_revenue_reqs_chart")
+
     @render.text
     def utility_revenue_reqs_chart_description():
         if input.show_absolute():
@@ -824,19 +1147,9 @@ def server(input, output, session):
         else:
           return f"Difference in utility revenue requirements for gas and electric compared to the Business as Usual (BAU) scenario where no NPA projects are implemented. These are the revenue requirements for the utility to cover its costs and expenses. All dollar values are inflation adjusted to {input.start_year()} dollars."
 
-    @render_plotly
+    @render_plotly_json
     def volumetric_tariff_chart():
-        df = prep_df_to_plot()
-        req(not df.is_empty())  # Check that DataFrame is not empty
-        
-        return plot_utility_metric(
-            plt_df=df,
-            column="variable_tariff",
-            title="Volumetric Tariff",
-            y_label_unit="$/unit",
-            y_label_title="Volumetric tariff",
-            show_absolute=input.show_absolute()
-        )
+        return utility_metric_json("volumetric_tariff_chart")
 
     @render.text
     def volumetric_tariff_chart_description():
@@ -845,19 +1158,9 @@ def server(input, output, session):
         else:
           return f"Difference in volumetric tariffs for gas (therms) and electric (kWh) compared to the Business as Usual (BAU) scenario where no NPA projects are implemented. All dollar values are inflation adjusted to {input.start_year()} dollars."
 
-    @render_plotly
+    @render_plotly_json
     def ratebase_chart():
-        df = prep_df_to_plot()
-        req(not df.is_empty())  # Check that DataFrame is not empty
-        
-        return plot_utility_metric(
-            plt_df=df,
-            column="inflation_adjusted_ratebase",
-            title="Ratebase",
-            y_label_unit="$",
-            y_label_title="Ratebase",
-            show_absolute=input.show_absolute()
-        )
+        return utility_metric_json("ratebase_chart")
     @render.text
     def ratebase_chart_description():
         if input.show_absolute():
@@ -865,19 +1168,9 @@ def server(input, output, session):
         else:
           return f"Difference in annual ratebase for gas and electric compared to the Business as Usual (BAU) scenario where no NPA projects are implemented. All dollar values are inflation adjusted to {input.start_year()} dollars."
 
-    @render_plotly
+    @render_plotly_json
     def return_component_chart():
-        df = prep_df_to_plot()
-        req(not df.is_empty())  # Check that DataFrame is not empty
-        
-        return plot_utility_metric(
-            plt_df=df,
-            column="return_on_ratebase_pct",
-            title="",
-            y_label_unit="% of revenue requirement",
-            y_label_title="Return component",
-            show_absolute=input.show_absolute()
-        )
+        return utility_metric_json("return_component_chart")
     @render.text
     def return_component_chart_description():
         if input.show_absolute():
@@ -885,20 +1178,9 @@ def server(input, output, session):
         else:
           return "Difference in return on ratebase as a percentage of revenue requirement (return component percent) for gas and electric compared to the Business as Usual (BAU) scenario where no NPA projects are implemented. We subtract the BAU return component percent from the scenario return component percent to get the delta."
 
-    @render_plotly
+    @render_plotly_json
     def nonconverts_bill_per_user_chart():
-        df = prep_df_to_plot()
-        req(not df.is_empty())  # Check that DataFrame is not empty
-        
-        return plot_utility_metric(
-            plt_df=df,
-            column="nonconverts_bill_per_user",
-            title="",
-            y_label_unit="$",   
-            y_label_title="Nonconverts annual delivery bill",
-            show_absolute=input.show_absolute(),
-            show_year=input.show_year_nonconverts()
-        )
+        return utility_metric_json("nonconverts_bill_per_user_chart")
     @render.ui
     def nonconverts_bill_per_user_chart_description():
         if input.show_absolute():
@@ -906,20 +1188,9 @@ def server(input, output, session):
         else:
           return create_styled_text(f"Difference in nonconverts annual bills for gas and electric ", f"relative to nonconverts bills in the Business as Usual (BAU) scenario", f" where no NPA projects are implemented. We do not consider changes to supply rates in any scenario so these should be considered as changes to the delivery portion of the bill. All dollar values are inflation adjusted to {input.start_year()} dollars.")
 
-    @render_plotly
+    @render_plotly_json
     def converts_bill_per_user_chart():
-        df = prep_df_to_plot()
-        req(not df.is_empty())  # Check that DataFrame is not empty
-        
-        return plot_utility_metric(
-            plt_df=df,
-            column="converts_bill_per_user",
-            title="",
-            y_label_unit="$",   
-            y_label_title="Converts annual delivery bill",
-            show_absolute=input.show_absolute(),
-            show_year=2030
-        )
+        return utility_metric_json("converts_bill_per_user_chart")
     @render.ui
     def converts_bill_per_user_chart_description():
         if input.show_absolute():
@@ -927,32 +1198,13 @@ def server(input, output, session):
         else:
           return create_styled_text(f"Difference in average annual delivery bills (gas and electric) for converts after electrification ", f"relative to a non-converter in the same scenario",f". Because all converts have zero gas usage after the NPA project, the gas chart represents the avoided gas spending. The electric chart includes increased demand after electrification. We do not consider changes to supply rates in any scenario so these should be considered as changes to the delivery portion of the bill. All dollar values are inflation adjusted to {input.start_year()} dollars.")
     
-    @render_plotly
+    @render_plotly_json
     def total_bills_chart_nonconverts_bar():
-        df = return_delta_or_absolute_df()
-        req(not df.is_empty())  # Check that DataFrame is not empty
-        req(input.show_year_nonconverts() is not None)  # Check that year selection is not None
-        
-        return plot_total_bills_bar(
-            results_df=df.filter(pl.col("year") == int(input.show_year_nonconverts())), converts_nonconverts="nonconverts",           
-            show_absolute=input.show_absolute(),
-            y_label_title=f"Combined annual delivery bills in {input.show_year_nonconverts()}"
-        )
+        return total_bills_bar_json("nonconverts")
 
-    @render_plotly
+    @render_plotly_json
     def total_bills_chart_nonconverts():
-        df = return_delta_or_absolute_df()
-        req(not df.is_empty())  # Check that DataFrame is not empty
-        req(input.show_year_nonconverts() is not None)  # Check that year selection is not None
-        
-
-        return plot_total_bills_ts(
-            df,converts_nonconverts="nonconverts",            
-            y_label_title="Combined annual delivery bills",
-            show_absolute=input.show_absolute(),
-            show_year=input.show_year_nonconverts()
-
-        )
+        return total_bills_ts_json("nonconverts")
 
     @render.text
     def total_bills_chart_description_nonconverts():
@@ -961,30 +1213,12 @@ def server(input, output, session):
         else:
           return f"Difference in annual combined delivery bills (gas and electric) nonconverts compared to the Business as Usual (BAU) scenario where no NPA projects are implemented. All dollar values are inflation adjusted to {input.start_year()} dollars."
         
-    @render_plotly
+    @render_plotly_json
     def total_bills_chart_converts_bar():
-        df = return_delta_or_absolute_df()
-        req(not df.is_empty())  # Check that DataFrame is not empty
-        req(input.show_year_converts() is not None)  # Check that year selection is not None
-        
-        return plot_total_bills_bar(
-            results_df=df.filter(pl.col("year") == int(input.show_year_converts())), converts_nonconverts="converts",           
-            show_absolute=input.show_absolute(),
-            y_label_title=f"Combined annual delivery bills in {input.show_year_converts()}"
-        )
-    @render_plotly
+        return total_bills_bar_json("converts")
+    @render_plotly_json
     def total_bills_chart_converts():
-        df = return_delta_or_absolute_df()
-        req(not df.is_empty())  # Check that DataFrame is not empty
-        req(input.show_year_converts() is not None)  # Check that year selection is not None
-        
-
-        return plot_total_bills_ts(
-            df,converts_nonconverts="converts",            
-            y_label_title="Combined annual delivery bills",
-            show_absolute=input.show_absolute(),
-            show_year=input.show_year_converts()
-        )
+        return total_bills_ts_json("converts")
 
     @render.text
     def total_bills_chart_description_converts():
@@ -994,6 +1228,350 @@ def server(input, output, session):
           return f"Difference in annual combined delivery bills (gas and electric) for converts after electrification relative to a non-converter in the same scenario. All dollar values are inflation adjusted to {input.start_year()} dollars."
 
 
+    @reactive.effect
+    def update_scenario_choices():
+        """Limit the analysis scenario dropdowns to the scenarios in the current model run"""
+        scenarios = model_values().get("scenarios", NPA_SCENARIO_IDS)
+        choices = {scenario_id: scenario_labels[scenario_id] for scenario_id in NPA_SCENARIO_IDS if scenario_id in scenarios}
+        for select_id in ("sensitivity_scenario", "goal_seek_scenario"):
+            with reactive.isolate():
+                current = getattr(input, select_id)()
+            ui.update_select(select_id, choices=choices, selected=current if current in choices else next(iter(choices), None))
+
+    def scenario_in_run(scenario_id):
+        """True if an analysis dropdown's scenario is one the current model run includes"""
+        return scenario_id in NPA_SCENARIO_IDS and scenario_id in selected_scenarios(model_values())
+
+    async def run_with_progress(message, function, *args, **kwargs):
+        """
+        Run a blocking analysis in a worker thread, so the event loop keeps serving every
+        session, under a progress bar it reports to as on_progress(done, total)
+        """
+        loop = asyncio.get_running_loop()
+        with ui.Progress(min=0, max=1) as progress:
+            progress.set(0, message=f"{message}...")
+
+            def on_progress(done, total):
+                # Called from the worker thread; the progress bar is updated on the event loop
+                loop.call_soon_threadsafe(
+                    lambda: progress.set(done / total if total else 1, message=f"{message} ({done}/{total})...")
+                )
+
+            return await asyncio.to_thread(function, *args, on_progress=on_progress, **kwargs)
+
+    @reactive.extended_task
+    async def sensitivity_task(values, metric, scenario_id, year, pct):
+        return await run_with_progress(
+            "Running sensitivity analysis", run_sensitivity, values, metric=metric, scenario_id=scenario_id, year=year, pct=pct
+        )
+
+    @reactive.effect
+    @reactive.event(input.sensitivity_btn)
+    def start_sensitivity():
+        req(input.sensitivity_year() is not None and input.sensitivity_pct())
+        if not scenario_in_run(input.sensitivity_scenario()):
+            ui.notification_show("Select a scenario included in the model run.", duration=5, type="warning")
+            req(False)
+        sensitivity_task.invoke(
+            model_values(),
+            metric=input.sensitivity_metric(),
+            scenario_id=input.sensitivity_scenario(),
+            year=int(input.sensitivity_year()),
+            pct=input.sensitivity_pct()
+        )
+
+    @render_plotly_json
+    def tornado_chart():
+        df = sensitivity_task.result()
+        req(not df.is_empty())
+        
+        with reactive.isolate():
+            metric_label = SENSITIVITY_METRICS[input.sensitivity_metric()]
+        return plot_tornado(df, metric_label).to_json()
+
+    @reactive.extended_task
+    async def goal_seek_task(values, input_id, metric, scenario_id, year, target):
+        return await run_with_progress(
+            "Solving", goal_seek, values,
+            input_id=input_id, metric=metric, scenario_id=scenario_id, year=year, target=target
+        )
+
+    @reactive.effect
+    @reactive.event(input.goal_seek_btn)
+    def start_goal_seek():
+        req(input.goal_seek_year() is not None and input.goal_seek_target() is not None)
+        if not scenario_in_run(input.goal_seek_scenario()):
+            ui.notification_show("Select a scenario included in the model run.", duration=5, type="warning")
+            req(False)
+        goal_seek_task.invoke(
+            model_values(),
+            input_id=input.goal_seek_input(),
+            metric=input.goal_seek_metric(),
+            scenario_id=input.goal_seek_scenario(),
+            year=int(input.goal_seek_year()),
+            target=input.goal_seek_target()
+        )
+
+    @render.ui
+    def goal_seek_result():
+        result = goal_seek_task.result()
+        with reactive.isolate():
+            label = ALL_INPUT_MAPPINGS[result["input_id"]]["label"]
+            metric_label = SENSITIVITY_METRICS[input.goal_seek_metric()]
+            scenario_label = scenario_labels[input.goal_seek_scenario()]
+            year = input.goal_seek_year()
+        runs = f"{result['evaluations']} model evaluations ({result['computed']} new runs, the rest from cache)"
+        if result["converged"]:
+            return create_styled_text(
+                f"{metric_label} (Δ from BAU, {scenario_label}, {year}) reaches ${result['target']:,.2f} when {label} = ",
+                f"{result['value']:,.4g}",
+                f". Found in {runs}."
+            )
+        if result["value"] is None:
+            return ui.p(f"{result['message']}.")
+        closest = f"${result['metric_value']:,.2f}" if result["metric_value"] is not None else "n/a"
+        return ui.p(f"{result['message']}. Closest value found: {label} = {result['value']:,.4g} gives {closest}, after {runs}.")
+
+    mc_bands = reactive.value(None)
+
+    @reactive.extended_task
+    async def uncertainty_task(values, input_ids, distribution, spread_pct, n):
+        return await run_with_progress(
+            "Running Monte Carlo samples", run_monte_carlo, values,
+            input_ids=input_ids, distribution=distribution, spread_pct=spread_pct, n=n
+        )
+
+    @reactive.effect
+    @reactive.event(input.mc_btn)
+    def run_uncertainty():
+        req(input.mc_inputs() and input.mc_samples() and input.mc_spread_pct() is not None)
+        uncertainty_task.invoke(
+            model_values(),
+            input_ids=list(input.mc_inputs()),
+            distribution=input.mc_distribution(),
+            spread_pct=input.mc_spread_pct(),
+            n=int(input.mc_samples())
+        )
+
+    @reactive.effect
+    def finish_uncertainty():
+        if uncertainty_task.status() == "error":
+            ui.notification_show("Monte Carlo run failed.", duration=5, type="error")
+            return
+        mc_bands.set(uncertainty_task.result())
+
+    @reactive.effect
+    @reactive.event(model_values)
+    def clear_uncertainty():
+        """Bands are only valid around the run they were sampled from"""
+        with reactive.isolate():
+            if uncertainty_task.status() == "running":
+                uncertainty_task.cancel()
+        mc_bands.set(None)
+
+    bill_dist = reactive.value(None)
+
+    @reactive.extended_task
+    async def bill_distribution_task(result, values, n):
+        return await run_with_progress(f"Simulating {n:,} households", bill_impact_distribution, result, values, n=n)
+
+    @reactive.effect
+    @reactive.event(input.bill_dist_btn)
+    def run_bill_distribution():
+        req(input.bill_dist_households())
+        bill_distribution_task.invoke(run_model(), model_values(), n=int(input.bill_dist_households()))
+
+    @reactive.effect
+    def finish_bill_distribution():
+        if bill_distribution_task.status() == "error":
+            ui.notification_show("Bill distribution failed.", duration=5, type="error")
+            return
+        bill_dist.set(bill_distribution_task.result())
+
+    @reactive.effect
+    @reactive.event(model_values)
+    def clear_bill_distribution():
+        """The distribution applies one run's tariffs"""
+        with reactive.isolate():
+            if bill_distribution_task.status() == "running":
+                bill_distribution_task.cancel()
+        bill_dist.set(None)
+
+    @render_plotly_json
+    def bill_distribution_chart():
+        dist = bill_dist()
+        req(dist is not None)
+        return plot_bill_distribution(dist, show_year=input.show_year_nonconverts()).to_json()
+
+    def chart_bands(chart_id):
+        """Monte Carlo bands for a utility metric chart, or None if there are none to show"""
+        bands = mc_bands()
+        if bands is None or not input.show_uncertainty():
+            return None
+        view = "absolute" if input.show_absolute() else "delta"
+        return bands.filter(
+            (pl.col("view") == view) & (pl.col("metric") == UTILITY_METRIC_CHARTS[chart_id]["column"])
+        )
+
+    batch_results = reactive.value(None)
+
+    @reactive.calc
+    def batch_table():
+        """The uploaded parameter table, validated against the current model run's inputs"""
+        file_info = input.batch_file()
+        req(file_info)
+        base_values = model_values()
+        try:
+            table, errors, warnings = validate_parameter_table(
+                read_parameter_table(file_info[0]["datapath"], file_info[0]["name"]), base_values
+            )
+        except BatchError as e:
+            return {"error": str(e)}
+        valid = table.filter(~pl.col("row").is_in(errors["row"].implode()))
+        return {
+            "error": None,
+            "base_values": base_values,
+            "rows": table.height,
+            "valid": valid,
+            "errors": errors,
+            "warnings": warnings,
+            "cached": count_cached(table_to_values(valid, base_values)),
+        }
+
+    @reactive.effect
+    @reactive.event(batch_table)
+    def clear_batch_results():
+        """Results belong to the table (and base inputs) they were run from"""
+        with reactive.isolate():
+            if batch_task.status() == "running":
+                batch_task.cancel()
+        batch_results.set(None)
+
+    @render.ui
+    def hourly_peaks_summary():
+        """Coincident peaks per household and the years the headroom runs out, for the current run in hourly mode"""
+        values = model_values()
+        req(values.get("hourly_peaks"))
+        peaks = design_peak_kw(values)
+        exhausted = headroom_exhausted(hourly_peaks(values))
+        return ui.div(
+            ui.p(f"Heat pump peak per household: {peaks['hp_peak_kw']:.2f} kW; AC: {peaks['aircon_peak_kw']:.2f} kW"),
+            *[
+                ui.p(f"{season.title()} headroom used up in {year}" if year else f"{season.title()} headroom not used up")
+                for season, year in exhausted.items()
+            ],
+            class_="text-muted"
+        )
+
+    @render.ui
+    def batch_status():
+        checked = batch_table()
+        if checked["error"]:
+            return ui.div(checked["error"], class_="alert alert-danger")
+        items = []
+        errors = checked["errors"]
+        if not errors.is_empty():
+            messages = [f"Row {row}: {message}" for row, message in errors.head(BATCH_MAX_ERRORS_SHOWN).iter_rows()]
+            if errors.height > BATCH_MAX_ERRORS_SHOWN:
+                messages.append(f"... and {errors.height - BATCH_MAX_ERRORS_SHOWN} more")
+            items.append(ui.div(
+                ui.p(f"{errors['row'].n_unique()} rows have invalid values and will be skipped:"),
+                ui.tags.ul(*[ui.tags.li(message) for message in messages]),
+                class_="alert alert-warning"
+            ))
+        for warning in checked["warnings"]:
+            items.append(ui.div(warning, class_="alert alert-warning"))
+        n_valid = checked["valid"].height
+        items.append(ui.p(
+            f"{n_valid} of {checked['rows']} rows ready to run; {checked['cached']} already computed.",
+            class_="text-muted"
+        ))
+        if batch_results() is not None:
+            items.append(ui.p(f"Finished {len(batch_results())} runs. Download the results above."))
+        return ui.div(*items)
+
+    @reactive.extended_task
+    async def batch_task(table, base_values):
+        return await run_with_progress("Running parameter sets", run_batch, table, base_values)
+
+    @reactive.effect
+    @reactive.event(input.batch_btn)
+    def run_batch_upload():
+        checked = batch_table()
+        req(not checked["error"] and not checked["valid"].is_empty())
+        batch_task.invoke(checked["valid"], checked["base_values"])
+
+    @reactive.effect
+    def finish_batch():
+        if batch_task.status() == "error":
+            ui.notification_show("Batch run failed.", duration=5, type="error")
+            return
+        batch_results.set(batch_task.result())
+
+    @render.download(
+        filename=lambda: f'{input.run_name()}_batch.zip',
+        media_type="application/zip"
+    )
+    def download_batch():
+        results = batch_results()
+        if results is None:
+            ui.notification_show("Run the uploaded parameter sets first.", duration=5, type="warning")
+            return
+        checked = batch_table()
+        parameters = checked["valid"].with_columns(pl.Series("params_hash", [result.key for _, result in results]))
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            summary = stacked_summary(
+                (row, values, result) for (row, result), values in zip(results, table_to_values(checked["valid"], checked["base_values"]))
+            )
+            for name, df in (("results.csv", stack_results(results, input.show_absolute())), ("parameters.csv", parameters),
+                             ("summary.csv", summary)):
+                buffer = io.BytesIO()
+                df.write_csv(buffer)
+                zip_file.writestr(name, buffer.getvalue())
+        yield zip_buffer.getvalue()
+
+    @render.download(filename="parameter_template.csv", media_type="text/csv")
+    def download_batch_template():
+        buffer = io.BytesIO()
+        template_table(model_values()).write_csv(buffer)
+        yield buffer.getvalue()
+
+    @reactive.extended_task
+    async def portfolio_task(run_names, base_values):
+        territories = await run_with_progress("Running territories", run_portfolio, run_names, all_configs, base_values)
+        return {"territories": territories, "result": await asyncio.to_thread(aggregate_portfolio, territories)}
+
+    @reactive.effect
+    @reactive.event(input.portfolio_btn)
+    def run_portfolio_territories():
+        run_names = list(input.portfolio_runs() or ())
+        if len(run_names) < 2:
+            ui.notification_show("Select at least two territories for a portfolio.", duration=5, type="warning")
+            return
+        portfolio_task.invoke(run_names, model_values())
+
+    @reactive.effect
+    def finish_portfolio():
+        if portfolio_task.status() == "error":
+            ui.notification_show("Portfolio run failed.", duration=5, type="error")
+            return
+        portfolio.set(portfolio_task.result())
+
+    @reactive.effect
+    @reactive.event(model_values)
+    def clear_portfolio():
+        """A new model run replaces the portfolio in the charts"""
+        with reactive.isolate():
+            if portfolio_task.status() == "running":
+                portfolio_task.cancel()
+        portfolio.set(None)
+
+    @render.ui
+    def portfolio_status():
+        req(portfolio() is not None)
+        return ui.p(f"Showing a portfolio of {len(portfolio()['territories'])} territories in the charts above.", class_="text-muted")
+
     def collect_input_parameters():
         """Collect all current input parameter values into a Polars DataFrame"""
         parameters = []
@@ -1061,38 +1639,152 @@ def server(input, output, session):
                 "config_path": []
             })
 
+    def write_data_files(zip_file):
+        """Write the results and parameters CSVs into an open zip archive"""
+        # Get results DataFrame (exact results, never a preview)
+        df_to_download = run_model().wide(input.show_absolute())
+        
+        # Get parameters DataFrame
+        params_df = collect_input_parameters()
+        
+        # Write results CSV
+        results_buffer = io.BytesIO()
+        df_to_download.write_csv(results_buffer)
+        results_buffer.seek(0)
+        zip_file.writestr("results.csv", results_buffer.getvalue())
+        
+        # Write parameters CSV
+        params_buffer = io.BytesIO()
+        params_df.write_csv(params_buffer)
+        params_buffer.seek(0)
+        zip_file.writestr("parameters.csv", params_buffer.getvalue())
+
+        # Write summary CSV
+        summary_buffer = io.BytesIO()
+        get_summary(run_model(), model_values()).write_csv(summary_buffer)
+        zip_file.writestr("summary.csv", summary_buffer.getvalue())
+
+    def export_figures():
+        """Figure JSON of every chart exactly as shown on screen, keyed by output id; charts with nothing to show are left out"""
+        builders = {chart_id: (lambda chart_id=chart_id: utility_metric_json(chart_id)) for chart_id in UTILITY_METRIC_CHARTS}
+        for converts_nonconverts in ("nonconverts", "converts"):
+            builders[f"total_bills_chart_{converts_nonconverts}"] = lambda cn=converts_nonconverts: total_bills_ts_json(cn)
+            builders[f"total_bills_chart_{converts_nonconverts}_bar"] = lambda cn=converts_nonconverts: total_bills_bar_json(cn)
+        figures = {}
+        for chart_id, build in builders.items():
+            try:
+                figures[chart_id] = build()
+            except SilentException:
+                continue
+        return figures
+
     @render.download(
         filename=lambda: f'{input.run_name()}_data.zip',
         media_type="application/zip"
     )
     def download_data():
-        # Get results DataFrame
-        df_to_download = return_delta_or_absolute_df()
-        
-        # Get parameters DataFrame
-        params_df = collect_input_parameters()
-        
         # Create zip file in memory
         zip_buffer = io.BytesIO()
         
         with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Write results CSV
-            results_buffer = io.BytesIO()
-            df_to_download.write_csv(results_buffer)
-            results_buffer.seek(0)
-            zip_file.writestr("results.csv", results_buffer.getvalue())
-            
-            # Write parameters CSV
-            params_buffer = io.BytesIO()
-            params_df.write_csv(params_buffer)
-            params_buffer.seek(0)
-            zip_file.writestr("parameters.csv", params_buffer.getvalue())
+            write_data_files(zip_file)
         
         zip_buffer.seek(0)
         
         # Yield the zip file content
         yield zip_buffer.getvalue()
 
+    @render.download(
+        filename=lambda: f'{input.run_name()}_charts.zip',
+        media_type="application/zip"
+    )
+    async def download_charts():
+        if not kaleido_available():
+            ui.notification_show(
+                "Chart export requires the optional 'kaleido' package, which is not installed on this server.",
+                duration=10,
+                type="error"
+            )
+            return
+        # Exports are of exact results, never a preview
+        if preview_result() is not None:
+            ui.notification_show(
+                "The charts show an approximate preview. Press Run Model for exact results before exporting.",
+                duration=10,
+                type="warning"
+            )
+            return
+        
+        with ui.Progress(min=0, max=2) as progress:
+            progress.set(0, message="Rendering charts...")
+            try:
+                images = await render_figures(export_figures())
+            except Exception as e:
+                print(f"Error rendering charts: {e}")
+                ui.notification_show("Chart export failed. Please try again.", duration=10, type="error")
+                return
+            progress.set(1, message="Writing archive...")
+            
+            zip_buffer = io.BytesIO()
+            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                write_data_files(zip_file)
+                for file_name, image in images.items():
+                    zip_file.writestr(f"charts/{file_name}", image)
+            progress.set(2)
+        
+        zip_buffer.seek(0)
+        yield zip_buffer.getvalue()
+
+    # Server-side bookmarks: short links to a frozen snapshot whose results are already cached
+    @reactive.effect(priority=-1)
+    @reactive.event(session.clientdata.url_search)
+    def restore_server_bookmark():
+        bookmark = BOOKMARKS.load(bookmark_id_from_query(session.clientdata.url_search()))
+        if bookmark is None:
+            return
+        if bookmark["run_name"] not in all_configs:
+            ui.notification_show("This link uses default settings that no longer exist.", duration=10, type="warning")
+            return
+        restored_result.set(RESULT_CACHE.get(bookmark["result_key"]))
+        restored_values.set(bookmark["values"])
+        ui.update_switch("show_absolute", value=bookmark["view"].get("show_absolute", False))
+        if bookmark["run_name"] != input.run_name():
+            # Inputs are applied by update_all_inputs once the run name has switched over
+            pending_run_name.set(bookmark["run_name"])
+            ui.update_selectize("run_name", selected=bookmark["run_name"])
+        else:
+            apply_restored_inputs(bookmark["values"])
+
+    @reactive.effect
+    @reactive.event(input.calculate_btn)
+    def use_current_inputs():
+        """Run Model always uses the sidebar as it is now, over a bookmark or a pending live run"""
+        restored_values.set(None)
+        restored_result.set(None)
+        live_result.set(None)
+
+    @reactive.effect
+    @reactive.event(input.share_btn)
+    def share_link():
+        bookmark_id = BOOKMARKS.save(
+            run_name=input.run_name(),
+            values=model_values(),
+            result_key=run_model().key,
+            view={"show_absolute": input.show_absolute()}
+        )
+        clientdata = session.clientdata
+        port = clientdata.url_port()
+        url = (
+            f"{clientdata.url_protocol()}//{clientdata.url_hostname()}{f':{port}' if port else ''}"
+            f"{clientdata.url_pathname()}?{BOOKMARK_QUERY_PARAM}={bookmark_id}"
+        )
+        ui.modal_show(ui.modal(
+            ui.p("Anyone with this link will see these results (the values from the last calculation):"),
+            ui.tags.input(type="text", value=url, readonly=True, onclick="this.select()", style="width: 100%;"),
+            title="Share Link",
+            easy_close=True
+        ))
+
     # Custom bookmark button handler
     @reactive.effect
     @reactive.event(input.custom_bookmark_btn)
@@ -1125,4 +1817,6 @@ def server(input, output, session):
                     type="warning"
                 )
 
-app = App(app_ui, server, bookmark_store="url")
\ No newline at end of file
+app = App(app_ui, server, bookmark_store="url")
+# JSON/Arrow model API at /api, sharing the app's result cache and model pool
+mount_api(app)
@@ -0,0 +1,289 @@
+"""HTTP API for running the model programmatically, mounted on the Shiny app's ASGI app."""
+import hashlib
+import io
+import math
+
+import polars as pl
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+from modules.config import DEFAULT_CONFIG_NAME, load_all_configs, load_defaults
+from modules.disk_cache import model_version
+from modules.figure_cache import FIGURE_CACHE
+from modules.input_mappings import ALL_INPUT_MAPPINGS
+from modules.model_runner import NPA_SCENARIO_IDS, RESULT_CACHE, get_result, params_hash, run_many, values_from_config
+from modules.result_store import memory_report
+
+API_PREFIX = "/api"
+API_VIEWS = ("delta", "absolute")
+API_SHAPES = ("wide", "long")
+API_FORMATS = {
+    "json": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+API_MAX_BULK_RUNS = 1000
+# Query parameters that select the response rather than model inputs
+API_OPTIONS = ("view", "shape", "format")
+# Parameter document keys that aren't input ids
+API_DOC_KEYS = ("run_name", "scenarios", "hourly_peaks")
+
+API_CONFIGS = load_all_configs()
+# The app's starting configuration, under its run name as load_all_configs keys it
+API_DEFAULT_RUN_NAME = load_defaults(DEFAULT_CONFIG_NAME).get("run_name", DEFAULT_CONFIG_NAME)
+
+
+class ApiError(Exception):
+    """Invalid request; turned into a JSON error response with the given status code"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def parse_params(doc):
+    """
+    Turn a parameter document into a model parameter snapshot.
+
+    The document maps ALL_INPUT_MAPPINGS ids to values in the units shown in the
+    app (percentages as 0-100). Inputs that are left out take their value from
+    the configuration named by the optional "run_name" key. An optional
+    "scenarios" list restricts which NPA scenarios are run (BAU always is), and
+    "hourly_peaks": true takes the heat pump and AC peaks from hourly load profiles.
+
+    Args:
+        doc: Dict of input id -> value, plus optional "run_name", "scenarios" and "hourly_peaks"
+
+    Returns:
+        Flat parameter snapshot as used by the model runner
+    """
+    if not isinstance(doc, dict):
+        raise ApiError("Parameter document must be a JSON object keyed by input id")
+    run_name = doc.get("run_name", API_DEFAULT_RUN_NAME)
+    if run_name not in API_CONFIGS:
+        raise ApiError(f"Unknown run_name '{run_name}'. Choose from: {', '.join(API_CONFIGS)}")
+
+    unknown = [key for key in doc if key not in API_DOC_KEYS and key not in ALL_INPUT_MAPPINGS]
+    if unknown:
+        raise ApiError(f"Unknown input ids: {', '.join(sorted(unknown))}")
+
+    values = values_from_config(API_CONFIGS[run_name]["config"])
+    npa_year_start, npa_year_end = values["npa_year_range"]
+    if "scenarios" in doc:
+        scenarios = doc["scenarios"]
+        if isinstance(scenarios, str):
+            scenarios = scenarios.split(",")
+        if not isinstance(scenarios, list) or any(scenario_id not in NPA_SCENARIO_IDS for scenario_id in scenarios):
+            raise ApiError(f"scenarios must be a list of: {', '.join(NPA_SCENARIO_IDS)}")
+        values["scenarios"] = tuple(scenarios)
+    if "hourly_peaks" in doc:
+        hourly_peaks = doc["hourly_peaks"]
+        if isinstance(hourly_peaks, str):
+            hourly_peaks = {"true": True, "1": True, "false": False, "0": False}.get(hourly_peaks.lower())
+        if not isinstance(hourly_peaks, bool):
+            raise ApiError("hourly_peaks must be true or false")
+        values["hourly_peaks"] = hourly_peaks
+
+    for input_id, raw_value in doc.items():
+        if input_id in API_DOC_KEYS:
+            continue
+        input_data = ALL_INPUT_MAPPINGS[input_id]
+        try:
+            value = float(raw_value)
+        except (TypeError, ValueError):
+            raise ApiError(f"'{input_id}' must be a number, got {raw_value!r}")
+        if not math.isfinite(value):
+            raise ApiError(f"'{input_id}' must be finite")
+        if "min" in input_data and value < input_data["min"]:
+            raise ApiError(f"'{input_id}' must be at least {input_data['min']}", 422)
+        if "max" in input_data and value > input_data["max"]:
+            raise ApiError(f"'{input_id}' must be at most {input_data['max']}", 422)
+        value = input_data.get("type", float)(value)
+
+        if input_id == "npa_year_start":
+            npa_year_start = value
+        elif input_id == "npa_year_end":
+            npa_year_end = value
+        else:
+            values[input_id] = value
+
+    if npa_year_start > npa_year_end:
+        raise ApiError("'npa_year_start' must not be after 'npa_year_end'", 422)
+    values["npa_year_range"] = (npa_year_start, npa_year_end)
+    return values
+
+
+def parse_options(query_params):
+    """Read and validate the view/shape/format query parameters"""
+    view = query_params.get("view", "delta")
+    shape = query_params.get("shape", "wide")
+    fmt = query_params.get("format", "json")
+    if view not in API_VIEWS:
+        raise ApiError(f"view must be one of: {', '.join(API_VIEWS)}")
+    if shape not in API_SHAPES:
+        raise ApiError(f"shape must be one of: {', '.join(API_SHAPES)}")
+    if fmt not in API_FORMATS:
+        raise ApiError(f"format must be one of: {', '.join(API_FORMATS)}")
+    return view, shape, fmt
+
+
+def result_frame(result, view, shape) -> pl.DataFrame:
+    """Select the requested frame of a ModelResult"""
+    show_absolute = view == "absolute"
+    return result.long(show_absolute) if shape == "long" else result.wide(show_absolute)
+
+
+def encode_frames(frames, fmt, bulk=False) -> bytes:
+    """
+    Serialise (params_hash, frame) pairs.
+
+    JSON is a list of row objects for a single run, or a list of
+    {"params_hash", "data"} objects for a bulk request. Arrow is a single IPC
+    stream, with a params_hash column added for a bulk request.
+    """
+    if fmt == "arrow":
+        if bulk:
+            frame = pl.concat([df.with_columns(pl.lit(key).alias("params_hash")) for key, df in frames])
+        else:
+            frame = frames[0][1]
+        buffer = io.BytesIO()
+        frame.write_ipc_stream(buffer)
+        return buffer.getvalue()
+    if not bulk:
+        return frames[0][1].write_json().encode()
+    runs = ",".join(f'{{"params_hash":"{key}","data":{df.write_json()}}}' for key, df in frames)
+    return f"[{runs}]".encode()
+
+
+# Responses change when the model or the stored frames' layout does, even for the same parameters
+API_ETAG_VERSION = model_version()
+
+
+def make_etag(keys, view, shape, fmt) -> str:
+    """Strong ETag for a response; depends on the parameter hashes, response options and model version"""
+    digest = hashlib.sha256("|".join([API_ETAG_VERSION, *keys, view, shape, fmt]).encode()).hexdigest()[:16]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header covers etag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def error_response(e: ApiError) -> JSONResponse:
+    return JSONResponse({"error": e.message}, status_code=e.status_code)
+
+
+async def list_params(request: Request):
+    """GET /api/params: input ids with labels, bounds and the defaults of each run configuration"""
+    inputs = {
+        input_id: {
+            "label": input_data.get("label", input_id),
+            "type": input_data.get("type", float).__name__,
+            "min": input_data.get("min"),
+            "max": input_data.get("max"),
+            "is_pct": input_data.get("is_pct", False),
+        }
+        for input_id, input_data in ALL_INPUT_MAPPINGS.items()
+    }
+    defaults = {}
+    for run_name, run_config in API_CONFIGS.items():
+        values = values_from_config(run_config["config"])
+        values["npa_year_start"], values["npa_year_end"] = values.pop("npa_year_range")
+        defaults[run_name] = values
+    return JSONResponse({"inputs": inputs, "default_run_name": API_DEFAULT_RUN_NAME, "defaults": defaults})
+
+
+async def run_model(request: Request):
+    """
+    GET or POST /api/run: run the model for one parameter document.
+
+    POST takes the document as a JSON body; GET takes it as query parameters.
+    The view (delta/absolute), shape (wide/long) and format (json/arrow) query
+    parameters select the response. Responses carry an ETag derived from the
+    parameter hash, and a matching If-None-Match returns 304 without running the model.
+    """
+    try:
+        view, shape, fmt = parse_options(request.query_params)
+        if request.method == "POST":
+            try:
+                doc = await request.json()
+            except ValueError:
+                raise ApiError("Request body must be JSON")
+        else:
+            doc = {key: value for key, value in request.query_params.items() if key not in API_OPTIONS}
+        values = parse_params(doc)
+    except ApiError as e:
+        return error_response(e)
+
+    key = params_hash(values)
+    etag = make_etag([key], view, shape, fmt)
+    headers = {"ETag": etag, "X-Params-Hash": key}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    result = await run_in_threadpool(get_result, values)
+    body = encode_frames([(key, result_frame(result, view, shape))], fmt)
+    return Response(body, media_type=API_FORMATS[fmt], headers=headers)
+
+
+async def run_bulk(request: Request):
+    """
+    POST /api/run/bulk: run the model for a JSON list of parameter documents.
+
+    Runs that aren't cached are evaluated in parallel on the model process pool.
+    Takes the same query parameters and ETag handling as /api/run.
+    """
+    try:
+        view, shape, fmt = parse_options(request.query_params)
+        try:
+            docs = await request.json()
+        except ValueError:
+            raise ApiError("Request body must be JSON")
+        if not isinstance(docs, list) or not docs:
+            raise ApiError("Request body must be a non-empty JSON list of parameter documents")
+        if len(docs) > API_MAX_BULK_RUNS:
+            raise ApiError(f"At most {API_MAX_BULK_RUNS} parameter documents per request", 413)
+        values_list = []
+        for i, doc in enumerate(docs):
+            try:
+                values_list.append(parse_params(doc))
+            except ApiError as e:
+                raise ApiError(f"Run {i}: {e.message}", e.status_code)
+    except ApiError as e:
+        return error_response(e)
+
+    keys = [params_hash(values) for values in values_list]
+    etag = make_etag(keys, view, shape, fmt)
+    headers = {"ETag": etag}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    results = await run_in_threadpool(run_many, values_list)
+    body = encode_frames([(result.key, result_frame(result, view, shape)) for result in results], fmt, bulk=True)
+    return Response(body, media_type=API_FORMATS[fmt], headers=headers)
+
+
+async def memory(request: Request):
+    """GET /api/memory: this worker's memory report, with the caches and a per-session breakdown"""
+    return JSONResponse(await run_in_threadpool(memory_report, RESULT_CACHE, FIGURE_CACHE))
+
+
+API_ROUTES = [
+    Route("/params", list_params, methods=["GET"]),
+    Route("/memory", memory, methods=["GET"]),
+    Route("/run", run_model, methods=["GET", "POST"]),
+    Route("/run/bulk", run_bulk, methods=["POST"]),
+]
+
+
+def mount_api(app):
+    """Serve the API routes under API_PREFIX on a Shiny App, ahead of its own routes"""
+    app.starlette_app.router.routes.insert(0, Mount(API_PREFIX, routes=API_ROUTES))
+    return app
@@ -0,0 +1,174 @@
+"""Bulk runs from an uploaded table of parameter sets (CSV or Parquet), one model run per row."""
+from pathlib import Path
+
+import polars as pl
+
+from modules.input_mappings import ALL_INPUT_MAPPINGS
+from modules.model_runner import cached_result, params_hash, run_many
+
+BATCH_MAX_ROWS = 1000
+BATCH_FORMATS = (".csv", ".parquet")
+# Errors listed in the app before the rest are summarised as a count
+BATCH_MAX_ERRORS_SHOWN = 20
+
+
+class BatchError(ValueError):
+    """An uploaded table that can't be used at all (unreadable, unknown columns, too many rows)"""
+
+
+def read_parameter_table(path, name=None) -> pl.DataFrame:
+    """
+    Read an uploaded parameter table.
+
+    Args:
+        path: Location of the file on disk
+        name: Original file name, used to pick the format (defaults to path)
+    """
+    suffix = Path(name or path).suffix.lower()
+    if suffix not in BATCH_FORMATS:
+        raise BatchError(f"Upload a {' or '.join(BATCH_FORMATS)} file")
+    try:
+        if suffix == ".csv":
+            # Read every column as text; numbers are parsed in validate_parameter_table so bad cells are reported
+            return pl.read_csv(path, infer_schema=False)
+        return pl.read_parquet(path)
+    except (pl.exceptions.PolarsError, OSError) as e:
+        raise BatchError(f"Could not read {name or path}: {e}")
+
+
+def _cell_checks(input_id, value, raw):
+    """(condition, message) pairs flagging invalid cells of one input column"""
+    input_data = ALL_INPUT_MAPPINGS[input_id]
+    checks = [
+        (raw.is_not_null() & value.is_null(), "must be a number"),
+        (~value.is_finite(), "must be finite"),
+    ]
+    if "min" in input_data:
+        checks.append((value < input_data["min"], f"must be at least {input_data['min']}"))
+    if "max" in input_data:
+        checks.append((value > input_data["max"], f"must be at most {input_data['max']}"))
+    if input_data.get("type") == int:
+        checks.append((value.is_finite() & (value != value.round(0)), "must be a whole number"))
+    return checks
+
+
+def validate_parameter_table(df: pl.DataFrame, base_values):
+    """
+    Check every cell of a parameter table against ALL_INPUT_MAPPINGS in one vectorised pass.
+
+    Columns are input ids, in the units shown in the app (percentages as
+    0-100). Blank cells, and inputs without a column, take their value from
+    base_values.
+
+    Args:
+        df: Table as read by read_parameter_table
+        base_values: Parameter snapshot supplying the inputs a row leaves out
+
+    Returns:
+        Tuple of (table, errors, warnings): the table with one Float64 column per
+        input id and a 1-based "row" column; a DataFrame of row, message for every
+        invalid cell; and a list of messages about suspicious columns
+
+    Raises:
+        BatchError: If the table is empty, too long or has columns that aren't input ids
+    """
+    unknown = [column for column in df.columns if column not in ALL_INPUT_MAPPINGS]
+    if unknown:
+        raise BatchError(f"Unknown columns: {', '.join(unknown)}. Column names must be input ids.")
+    if df.is_empty():
+        raise BatchError("The table has no rows")
+    if df.height > BATCH_MAX_ROWS:
+        raise BatchError(f"At most {BATCH_MAX_ROWS} rows per upload, got {df.height}")
+
+    input_ids = df.columns
+    raw = df.with_columns(pl.col(pl.String).str.strip_chars().replace("", None))
+    table = raw.select(
+        pl.int_range(1, pl.len() + 1).alias("row"),
+        *[pl.col(input_id).cast(pl.Float64, strict=False) for input_id in input_ids],
+    )
+
+    messages = [
+        pl.when(condition).then(pl.lit(f"'{input_id}' {message}"))
+        for input_id in input_ids
+        for condition, message in _cell_checks(input_id, table[input_id], raw[input_id])
+    ]
+    npa_year_start, npa_year_end = base_values["npa_year_range"]
+    if "npa_year_start" in input_ids or "npa_year_end" in input_ids:
+        start = pl.col("npa_year_start").fill_null(npa_year_start) if "npa_year_start" in input_ids else pl.lit(npa_year_start)
+        end = pl.col("npa_year_end").fill_null(npa_year_end) if "npa_year_end" in input_ids else pl.lit(npa_year_end)
+        messages.append(pl.when(start > end).then(pl.lit("'npa_year_start' must not be after 'npa_year_end'")))
+    errors = table.select(
+        "row", pl.concat_list(messages).list.drop_nulls().alias("message")
+    ).explode("message").drop_nulls()
+
+    warnings = []
+    for input_id in input_ids:
+        if not ALL_INPUT_MAPPINGS[input_id].get("is_pct"):
+            continue
+        largest = table[input_id].abs().max()
+        if largest is not None and 0 < largest <= 1:
+            warnings.append(f"'{input_id}' is a percentage (0-100) but every value is at most 1; were fractions entered?")
+    return table, errors, warnings
+
+
+def table_to_values(table: pl.DataFrame, base_values):
+    """Parameter snapshot for each row of a validated table, with blank cells taken from base_values"""
+    input_ids = [column for column in table.columns if column in ALL_INPUT_MAPPINGS]
+    values_list = []
+    for row in table.select(input_ids).iter_rows(named=True):
+        values = dict(base_values)
+        npa_year_start, npa_year_end = values["npa_year_range"]
+        for input_id, value in row.items():
+            if value is None:
+                continue
+            value = ALL_INPUT_MAPPINGS[input_id].get("type", float)(value)
+            if input_id == "npa_year_start":
+                npa_year_start = value
+            elif input_id == "npa_year_end":
+                npa_year_end = value
+            else:
+                values[input_id] = value
+        values["npa_year_range"] = (npa_year_start, npa_year_end)
+        values_list.append(values)
+    return values_list
+
+
+def count_cached(values_list) -> int:
+    """Number of distinct snapshots whose results are already cached, and won't be rerun"""
+    return sum(cached_result(values, key) is not None for key, values in
+               {params_hash(values): values for values in values_list}.items())
+
+
+def run_batch(table: pl.DataFrame, base_values, on_progress=None):
+    """
+    Run the model for every row of a validated table on the model process pool.
+
+    Rows already in the result cache, and repeated rows, are not rerun.
+
+    Args:
+        table: Table from validate_parameter_table, without invalid rows
+        base_values: Parameter snapshot supplying the inputs a row leaves out
+        on_progress: Optional callback called as on_progress(done, total), see run_many
+
+    Returns:
+        List of (row, ModelResult) pairs, in table order
+    """
+    results = run_many(table_to_values(table, base_values), on_progress=on_progress)
+    return list(zip(table["row"].to_list(), results))
+
+
+def stack_results(batch_results, show_absolute=False) -> pl.DataFrame:
+    """Wide results of a batch as one frame, with the table row and params hash of each run"""
+    return pl.concat([
+        result.wide(show_absolute).select(
+            pl.lit(row).alias("row"), pl.lit(result.key).alias("params_hash"), pl.all()
+        )
+        for row, result in batch_results
+    ])
+
+
+def template_table(values) -> pl.DataFrame:
+    """One-row table of a parameter snapshot, with every input id as a column, to start an upload from"""
+    row = {input_id: values[input_id] for input_id in ALL_INPUT_MAPPINGS if input_id in values}
+    row["npa_year_start"], row["npa_year_end"] = values["npa_year_range"]
+    return pl.DataFrame([{input_id: row[input_id] for input_id in ALL_INPUT_MAPPINGS if input_id in row}])
@@ -0,0 +1,105 @@
+"""Server-side bookmarks: short IDs mapped to frozen parameter snapshots and their cached results."""
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from urllib.parse import parse_qs
+
+# Shared links must outlive restarts and temp-dir cleanup, so they live in the user data directory
+_DEFAULT_DATA_ROOT = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share")
+BOOKMARK_DB = Path(os.environ.get("NPA_BOOKMARK_DB", _DEFAULT_DATA_ROOT / "npa_howtopay" / "bookmarks.sqlite"))
+BOOKMARK_QUERY_PARAM = "b"
+BOOKMARK_ID_LENGTH = 10
+
+
+def bookmark_id_from_query(search: str):
+    """Return the bookmark ID from a URL query string (e.g. "?b=abc123"), or None"""
+    ids = parse_qs((search or "").lstrip("?")).get(BOOKMARK_QUERY_PARAM)
+    return ids[0] if ids else None
+
+
+def _bookmark_id(payload: str) -> str:
+    """Short, URL-safe ID derived from the bookmark contents, so the same state always gets the same link"""
+    digest = hashlib.sha256(payload.encode()).digest()
+    return base64.urlsafe_b64encode(digest).decode()[:BOOKMARK_ID_LENGTH]
+
+
+class BookmarkStore:
+    """
+    SQLite table of bookmarks shared by every worker process.
+
+    Each bookmark freezes the run name, the flat parameter snapshot and the view
+    settings, plus the key of the model result they produce. Opening a bookmark
+    looks the result up by that key, so shared links render from the result
+    cache instead of re-running the model for every recipient.
+    """
+
+    def __init__(self, path=BOOKMARK_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bookmarks ("
+                "id TEXT PRIMARY KEY, payload TEXT, result_key TEXT, created REAL, last_opened REAL, opens INTEGER)"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30, isolation_level=None))
+
+    def save(self, run_name, values, result_key, view=None) -> str:
+        """
+        Store a bookmark and return its short ID.
+
+        Args:
+            run_name: Selected default settings
+            values: Flat parameter snapshot (UI units), as used by the model runner
+            result_key: Result cache key of the snapshot
+            view: Optional dict of display settings (e.g. show_absolute)
+
+        Returns:
+            Bookmark ID; saving identical state again returns the same ID
+        """
+        payload = json.dumps(
+            {"run_name": run_name, "values": values, "view": view or {}},
+            sort_keys=True,
+            default=list
+        )
+        bookmark_id = _bookmark_id(payload)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO bookmarks (id, payload, result_key, created, last_opened, opens) "
+                "VALUES (?, ?, ?, ?, NULL, 0)",
+                (bookmark_id, payload, result_key, time.time())
+            )
+        return bookmark_id
+
+    def load(self, bookmark_id):
+        """
+        Return a stored bookmark, or None if the ID is unknown.
+
+        Returns:
+            Dict with run_name, values (npa_year_range as a tuple), view and result_key
+        """
+        if not bookmark_id:
+            return None
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, result_key FROM bookmarks WHERE id = ?", (bookmark_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE bookmarks SET last_opened = ?, opens = opens + 1 WHERE id = ?", (time.time(), bookmark_id)
+            )
+        bookmark = json.loads(row[0])
+        bookmark["values"]["npa_year_range"] = tuple(bookmark["values"]["npa_year_range"])
+        bookmark["result_key"] = row[1]
+        return bookmark
+
+
+BOOKMARKS = BookmarkStore()
@@ -0,0 +1,112 @@
+"""Plot-ready frames for every chart from a model result, as lazy query plans collected together."""
+import logging
+import time
+
+import polars as pl
+from npa_howtopay.params import COMPARE_COLS
+
+from modules.plotting import UTILITY_METRIC_CHARTS, magnitude_scale_expr, total_bill_frame
+
+LONG_KEY_COLS = ("year", "scenario_id", "utility_type")
+TOTAL_BILL_COLS = ("converts_total_bill_per_user", "nonconverts_total_bill_per_user")
+USER_TYPES = ("converts", "nonconverts")
+
+logger = logging.getLogger(__name__)
+
+
+def utility_metric_plan(long_lf: pl.LazyFrame, chart_id) -> pl.LazyFrame:
+    """One utility metric chart's column, scaled for display as plot_utility_metric would"""
+    chart = UTILITY_METRIC_CHARTS[chart_id]
+    column = chart["column"]
+    if chart["y_label_unit"] == "$":
+        scaled = pl.col(column) / magnitude_scale_expr(column)
+    elif "%" in chart["y_label_unit"]:
+        scaled = pl.col(column) * 100
+    else:
+        return long_lf.select(*LONG_KEY_COLS, column)
+    return long_lf.select(*LONG_KEY_COLS, column, scaled.alias(f"{column}_scaled"))
+
+
+def total_bills_plan(wide_lf: pl.LazyFrame, converts_nonconverts, show_year=None) -> pl.LazyFrame:
+    """Combined bills of one user type, reshaped and scaled as the total bills charts would, for one year if given"""
+    if show_year is not None:
+        wide_lf = wide_lf.filter(pl.col("year") == int(show_year))
+    return total_bill_frame(wide_lf, converts_nonconverts).with_columns(
+        (pl.col("total_bill") / magnitude_scale_expr("total_bill")).alias("total_bill_scaled")
+    )
+
+
+def chart_data_plans(result, show_absolute, show_years=None):
+    """
+    Lazy query plans for the data of every chart of a model result.
+
+    Every plan starts from the result's long or wide frame projected to the
+    COMPARE_COLS columns the charts use, so each chart's own select is pushed
+    down to that scan and no intermediate frames are built between the steps.
+
+    Args:
+        result: ModelResult to plot
+        show_absolute: Absolute values or deltas from BAU
+        show_years: Optional dict of user type ("converts"/"nonconverts") -> year for the total bills bar charts
+
+    Returns:
+        Dict of chart id -> LazyFrame
+    """
+    long_lf = result.long(show_absolute).lazy().select(*LONG_KEY_COLS, *COMPARE_COLS)
+    wide_lf = result.wide(show_absolute).lazy().select("year", "scenario_id", *TOTAL_BILL_COLS)
+    plans = {chart_id: utility_metric_plan(long_lf, chart_id) for chart_id in UTILITY_METRIC_CHARTS}
+    for converts_nonconverts in USER_TYPES:
+        plans[f"total_bills_chart_{converts_nonconverts}"] = total_bills_plan(wide_lf, converts_nonconverts)
+        show_year = (show_years or {}).get(converts_nonconverts)
+        if show_year is not None:
+            plans[f"total_bills_chart_{converts_nonconverts}_bar"] = total_bills_plan(wide_lf, converts_nonconverts, show_year)
+    return plans
+
+
+def collect_chart_data(plans):
+    """Run every chart's plan in a single collect_all, returning a dict of chart id -> DataFrame"""
+    return dict(zip(plans, pl.collect_all(list(plans.values()))))
+
+
+def explain_chart_data(plans) -> str:
+    """Optimised query plan of each chart, for debugging"""
+    return "\n\n".join(f"{chart_id}:\n{plan.explain()}" for chart_id, plan in plans.items())
+
+
+def profile_chart_data(plans, repeat=5) -> pl.DataFrame:
+    """
+    Timing of each stage of collecting the chart data, best of repeat runs.
+
+    Stages are building the plans' optimised form, the fused collect_all, and
+    for comparison each chart's plan collected on its own.
+
+    Returns:
+        DataFrame with stage and ms
+    """
+    def best_ms(function):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(1e3 * (time.perf_counter() - start))
+        return min(times)
+
+    stages = {
+        "optimise plans": lambda: [plan.explain() for plan in plans.values()],
+        "collect_all (fused)": lambda: collect_chart_data(plans),
+    }
+    stages.update({f"collect {chart_id}": plan.collect for chart_id, plan in plans.items()})
+    return pl.DataFrame({"stage": list(stages), "ms": [best_ms(function) for function in stages.values()]})
+
+
+def chart_data(result, show_absolute, show_years=None):
+    """
+    Plot-ready data for every chart of a model result, from chart_data_plans in one collect.
+
+    Returns:
+        Dict of chart id -> DataFrame, ready for plot_chart / plot_total_bills_ts / plot_total_bills_bar
+    """
+    plans = chart_data_plans(result, show_absolute, show_years)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Chart data plans:\n%s", explain_chart_data(plans))
+    return collect_chart_data(plans)
@@ -1,6 +1,9 @@
 import yaml
 from pathlib import Path
 
+# Configuration file (under data/, without .yaml) the app starts from
+DEFAULT_CONFIG_NAME = "test_kiki"
+
 
 def load_all_configs():
     """Load all YAML configuration files and return a dictionary."""
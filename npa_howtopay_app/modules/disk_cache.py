@@ -0,0 +1,179 @@
+"""Persistent on-disk cache of ModelResults shared by worker processes and across restarts."""
+import importlib.util
+import os
+import shutil
+import sqlite3
+from contextlib import closing
+import time
+import uuid
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+import polars as pl
+
+from modules.result_store import ModelResult
+
+# The user cache directory survives restarts and redeploys on the same host. Setting NPA_CACHE_DIR
+# under /dev/shm keeps entries in RAM-backed shared memory instead, which is faster to map but
+# lost on restart and often small (64 MB by default in Docker); the budget is capped to fit either way.
+_DEFAULT_CACHE_ROOT = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+CACHE_DIR = Path(os.environ.get("NPA_CACHE_DIR", _DEFAULT_CACHE_ROOT / "npa_howtopay"))
+CACHE_MAX_BYTES = int(float(os.environ.get("NPA_CACHE_MAX_MB", 512)) * 1e6)
+# Share of the free space (plus what the cache already holds) the budget may use
+CACHE_MAX_FREE_SHARE = 0.8
+
+# Bump when the layout of ModelResult changes so stale entries are ignored
+CACHE_FORMAT_VERSION = 2
+FRAME_NAMES = ("delta", "absolute", "delta_long", "absolute_long")
+
+
+def zero_copy_available() -> bool:
+    """Return True if the optional pyarrow dependency is installed, so cache reads can be zero-copy."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def read_frame(path) -> pl.DataFrame:
+    """
+    Read an uncompressed Arrow IPC file as a DataFrame backed by a memory map.
+
+    With pyarrow the frame's buffers point straight into the mapped file, so
+    every process reading the same entry shares one copy of it in the page
+    cache. Without pyarrow, polars reads the file into private memory.
+    """
+    if not zero_copy_available():
+        return pl.read_ipc(path)
+    import pyarrow as pa
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    return pl.from_arrow(table, rechunk=False)
+
+
+def model_version():
+    """npa-howtopay version and CACHE_FORMAT_VERSION: results computed under another are stale"""
+    try:
+        return f"{CACHE_FORMAT_VERSION}-{version('npa-howtopay')}"
+    except PackageNotFoundError:
+        return f"{CACHE_FORMAT_VERSION}-unknown"
+
+
+class DiskCache:
+    """
+    ModelResults stored as uncompressed Arrow IPC files with a SQLite index.
+
+    Entries are written to a temporary file and atomically renamed into place
+    before they are indexed, so readers never see a partial file. The index runs
+    in WAL mode so several worker processes can read and write concurrently.
+    Reads memory-map the Arrow files instead of deserialising them. When the
+    total size exceeds max_bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.model_version = model_version()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, model_version TEXT, size INTEGER, created REAL, last_access REAL)"
+            )
+        # Never plan to use more than the filesystem has room for, so writes don't fail for lack of space
+        usable = CACHE_MAX_FREE_SHARE * (shutil.disk_usage(self.cache_dir).free + self.stats()["size_mb"] * 1e6)
+        self.max_bytes = min(max_bytes, int(usable))
+        if self.max_bytes < max_bytes:
+            print(f"Disk cache budget capped at {self.max_bytes / 1e6:.0f} MB by the free space in {self.cache_dir}")
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.cache_dir / "index.sqlite", timeout=30, isolation_level=None))
+
+    def _path(self, key, frame_name):
+        return self.cache_dir / f"{key}.{frame_name}.arrow"
+
+    def __contains__(self, key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM results WHERE key = ? AND model_version = ?", (key, self.model_version)
+            ).fetchone()
+        return row is not None
+
+    def get(self, key):
+        """Return the cached ModelResult for key, memory-mapped, or None"""
+        if key not in self:
+            return None
+        try:
+            frames = [read_frame(self._path(key, name)) for name in FRAME_NAMES]
+        except (OSError, pl.exceptions.ComputeError):
+            # Files were evicted by another process between the index lookup and the read
+            self._delete(key)
+            return None
+        with self._connect() as conn:
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        return ModelResult(key, *frames)
+
+    def put(self, result: ModelResult):
+        """
+        Write a ModelResult to disk and evict old entries if the cache is over budget.
+
+        Returns:
+            The memory-mapped copy of the result, or the result itself if it was evicted straight away
+        """
+        size = 0
+        for name in FRAME_NAMES:
+            path = self._path(result.key, name)
+            tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                getattr(result, name).write_ipc(tmp_path, compression="uncompressed")
+            except OSError:
+                # Out of space: drop the partial entry rather than leave it taking up room
+                tmp_path.unlink(missing_ok=True)
+                self._remove_files(result.key)
+                raise
+            size += tmp_path.stat().st_size
+            os.replace(tmp_path, path)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, model_version, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (result.key, self.model_version, size, now, now)
+            )
+        self.evict()
+        return self.get(result.key) or result
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stale = [row[0] for row in conn.execute(
+                "SELECT key FROM results WHERE model_version != ?", (self.model_version,)
+            )]
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results WHERE model_version = ?", (self.model_version,)
+            ).fetchone()[0]
+            evicted = []
+            if total > self.max_bytes:
+                for key, size in conn.execute(
+                    "SELECT key, size FROM results WHERE model_version = ? ORDER BY last_access", (self.model_version,)
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append(key)
+                    total -= size
+            for key in stale + evicted:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            conn.execute("COMMIT")
+        for key in stale + evicted:
+            self._remove_files(key)
+
+    def _delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+        self._remove_files(key)
+
+    def _remove_files(self, key):
+        for name in FRAME_NAMES:
+            self._path(key, name).unlink(missing_ok=True)
+
+    def stats(self):
+        """Number of entries and bytes on disk"""
+        with self._connect() as conn:
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"entries": count, "size_mb": round(size / 1e6, 2)}
@@ -0,0 +1,116 @@
+"""Static chart export (SVG/PNG) rendered in a warm, reused process pool."""
+import asyncio
+import atexit
+import importlib.util
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable
+
+import plotly.io as pio
+
+EXPORT_FORMATS = ("svg", "png")
+EXPORT_WIDTH = 1000
+EXPORT_HEIGHT = 500
+EXPORT_SCALE = 2
+RENDER_TIMEOUT_SECS = 60
+RENDERER_POOL_SIZE = int(os.environ.get("NPA_RENDERER_POOL_SIZE", min(4, os.cpu_count() or 1)))
+
+# A tiny figure pushed through each worker at warm-up, so its browser is started before the first export
+WARM_UP_FIGURE = '{"data": [{"type": "scatter", "x": [0, 1], "y": [0, 1]}]}'
+
+_renderer_pool = None
+_renderer_pool_lock = threading.Lock()
+_warm_up_started = False
+
+
+def kaleido_available() -> bool:
+    """Return True if the optional kaleido dependency is installed."""
+    return importlib.util.find_spec("kaleido") is not None
+
+
+def _init_renderer():
+    """
+    Start a persistent kaleido browser in each worker process so that renders
+    reuse it instead of paying the browser start-up cost on every figure.
+    """
+    import kaleido
+    kaleido.start_sync_server(silence_warnings=True)
+
+
+def _render_figure(fig_json: str, fmt: str) -> bytes:
+    """Render a serialised figure to image bytes (runs inside a pool worker)."""
+    return pio.to_image(
+        pio.from_json(fig_json, skip_invalid=True),
+        format=fmt,
+        width=EXPORT_WIDTH,
+        height=EXPORT_HEIGHT,
+        scale=EXPORT_SCALE,
+    )
+
+
+def get_renderer_pool() -> ProcessPoolExecutor:
+    """Return the shared renderer pool, creating it on first use."""
+    global _renderer_pool
+    with _renderer_pool_lock:
+        if _renderer_pool is None:
+            _renderer_pool = ProcessPoolExecutor(
+                max_workers=RENDERER_POOL_SIZE,
+                initializer=_init_renderer,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            atexit.register(_renderer_pool.shutdown, wait=False, cancel_futures=True)
+        return _renderer_pool
+
+
+def _warm_renderer_pool():
+    """Start the renderer pool and render WARM_UP_FIGURE once per worker."""
+    pool = get_renderer_pool()
+    for _ in range(RENDERER_POOL_SIZE):
+        pool.submit(_render_figure, WARM_UP_FIGURE, "svg")
+
+
+def warm_up():
+    """
+    Warm the renderer pool in a background thread, so the first user export
+    doesn't pay the pool and browser cold start. Returns immediately; only the
+    first call in a process does anything, and nothing happens if kaleido is
+    not installed.
+    """
+    global _warm_up_started
+    with _renderer_pool_lock:
+        if _warm_up_started or not kaleido_available():
+            return
+        _warm_up_started = True
+    threading.Thread(target=_warm_renderer_pool, name="renderer-warm-up", daemon=True).start()
+
+
+async def render_figures(figures: Dict[str, str], formats: Iterable[str] = EXPORT_FORMATS) -> Dict[str, bytes]:
+    """
+    Render figures to static images in parallel across the renderer pool.
+
+    The pool is normally warmed by warm_up when the first session starts,
+    and is started here if it hasn't been. Renders are
+    awaited rather than waited on, so the event loop keeps serving other
+    sessions while they run.
+
+    Args:
+        figures: Dictionary mapping chart id to serialised plotly figure (JSON)
+        formats: Image formats to render each figure to (e.g. "svg", "png")
+
+    Returns:
+        Dictionary mapping file name (e.g. "ratebase_chart.svg") to image bytes
+
+    Raises:
+        TimeoutError: If the renders don't finish within RENDER_TIMEOUT_SECS
+    """
+    pool = get_renderer_pool()
+    loop = asyncio.get_running_loop()
+    futures = {
+        f"{chart_id}.{fmt}": loop.run_in_executor(pool, _render_figure, fig_json, fmt)
+        for chart_id, fig_json in figures.items()
+        for fmt in formats
+    }
+    images = await asyncio.wait_for(asyncio.gather(*futures.values()), RENDER_TIMEOUT_SECS)
+    return dict(zip(futures, images))
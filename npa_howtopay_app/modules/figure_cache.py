@@ -0,0 +1,73 @@
+"""Process-wide cache of serialised plotly figures, shared by every session."""
+import os
+import threading
+from collections import OrderedDict
+
+FIGURE_CACHE_MAX_BYTES = int(float(os.environ.get("NPA_FIGURE_CACHE_MAX_MB", 64)) * 1e6)
+
+
+def figure_key(result_key, chart_id, show_absolute, show_year=None):
+    """Cache key for one chart of one model result; everything a chart's figure depends on"""
+    return (result_key, chart_id, bool(show_absolute), None if show_year is None else int(show_year))
+
+
+class FigureCache:
+    """
+    LRU cache of figure JSON, bounded by total size.
+
+    Sessions showing the same result with the same view settings get the
+    exact same chart, so the figure is built and serialised once and the JSON
+    string is sent to every later session as is.
+    """
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build) -> str:
+        """
+        Return the cached JSON for key, or build the figure, serialise and cache it.
+
+        Args:
+            key: From figure_key
+            build: Function returning the plotly figure, only called on a miss
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        fig_json = build().to_json()
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = fig_json
+                self.size += len(fig_json)
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+        return fig_json
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Entries, size and hit rate since start-up"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_mb": round(self.size / 1e6, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+        }
+
+
+FIGURE_CACHE = FigureCache()
@@ -0,0 +1,143 @@
+"""Goal-seek: solve for the input value at which a metric reaches a target (e.g. break-even)."""
+import math
+
+from modules.input_mappings import ALL_INPUT_MAPPINGS
+from modules.model_runner import RESULT_CACHE, get_result, params_hash
+from modules.sensitivity import metric_value
+
+GOAL_SEEK_DEFAULT_INPUT = "npa_install_costs_init"
+
+
+class MetricUnavailable(Exception):
+    """The metric isn't in a model run's results (its scenario or year wasn't run)"""
+
+
+def goal_seek(values, input_id, metric, scenario_id, year, target=0.0, f_tol=0.01, max_evals=30, on_progress=None):
+    """
+    Find the value of one input at which a delta-from-BAU metric equals a target.
+
+    Starting from the current value, the search extrapolates with secant steps
+    until the target is bracketed (staying within the input's min/max, and
+    expanding the other way once a limit blocks the way), then narrows the
+    bracket with the Illinois variant of regula falsi. Every model run goes
+    through the shared result cache, and the search stops as soon as the
+    metric is within f_tol of the target.
+
+    Args:
+        values: Base parameter snapshot (UI units)
+        input_id: Input to solve for
+        metric: Column from SENSITIVITY_METRICS
+        scenario_id: Scenario to read the metric from
+        year: Year to read the metric in
+        target: Metric value to solve for (0 for break-even)
+        f_tol: Stop once the metric is within this distance of the target
+        max_evals: Maximum number of distinct input values to evaluate
+        on_progress: Optional callback called as on_progress(done, max_evals) after each new evaluation
+
+    Returns:
+        Dict with the solved value, the metric there, whether the search converged,
+        the number of evaluations (and how many needed a fresh model run), and a message
+    """
+    input_data = ALL_INPUT_MAPPINGS[input_id]
+    is_int = input_data.get("type") == int
+    lo_limit = input_data.get("min", -math.inf)
+    hi_limit = input_data.get("max", math.inf)
+    x_tol = 1 if is_int else 1e-6
+    evals = {}
+    stats = {"computed": 0}
+
+    def normalize(x):
+        x = min(max(x, lo_limit), hi_limit)
+        return int(round(x)) if is_int else float(x)
+
+    def f(x):
+        x = normalize(x)
+        if x not in evals:
+            run_values = {**values, input_id: x}
+            if params_hash(run_values) not in RESULT_CACHE:
+                stats["computed"] += 1
+            value = metric_value(get_result(run_values), metric, scenario_id, year)
+            if value is None:
+                raise MetricUnavailable(x)
+            evals[x] = value - target
+            if on_progress is not None:
+                on_progress(len(evals), max_evals)
+        return x, evals[x]
+
+    def result(x, converged, message):
+        return {
+            "input_id": input_id,
+            "value": x,
+            "metric_value": evals[x] + target if x in evals else None,
+            "target": target,
+            "converged": converged,
+            "evaluations": len(evals),
+            "computed": stats["computed"],
+            "message": message,
+        }
+
+    def best():
+        return min(evals, key=lambda x: abs(evals[x]))
+
+    try:
+        a, fa = f(float(values[input_id]))
+        if abs(fa) <= f_tol:
+            return result(a, True, "Already at target")
+
+        # First step up, or down if the input is already at its max; at least one step of input precision
+        first_step = max(abs(a) * 0.1 or 1.0, x_tol)
+        b = normalize(a + first_step)
+        if b == a:
+            b = normalize(a - first_step)
+        if b == a:
+            return result(a, False, "Target is not reachable within the input's allowed range")
+        b, fb = f(b)
+
+        # Bracket the target: secant extrapolation from the last two points, growing at most 10x per step
+        while fa * fb > 0:
+            if abs(fb) <= f_tol:
+                return result(b, True, "Converged")
+            if len(evals) >= max_evals:
+                return result(best(), False, "No sign change found within the evaluation budget")
+            step = b - a
+            x_raw = b - fb * step / (fb - fa) if fb != fa else b + 2 * step
+            x_raw = min(max(x_raw, b - 10 * abs(step)), b + 10 * abs(step))
+            x_new = normalize(x_raw)
+            if x_new in evals and x_new not in (lo_limit, hi_limit):
+                # Rounded back onto a point already evaluated: move at least one step of input precision
+                x_new = normalize(b + math.copysign(x_tol, x_raw - b))
+            if x_new in evals:
+                # Blocked by one of the input's limits: expand outwards from the other end instead
+                lowest, highest = min(evals), max(evals)
+                x_new = normalize(lowest - 2 * (highest - lowest) if x_new >= highest else highest + 2 * (highest - lowest))
+                if x_new in evals:
+                    return result(best(), False, "Target is not reachable within the input's allowed range")
+            x_new, f_new = f(x_new)
+            a, fa, b, fb = b, fb, x_new, f_new
+
+        # Illinois regula falsi on the bracket [a, b]
+        for _ in range(2 * max_evals):
+            if abs(fb) <= f_tol:
+                return result(b, True, "Converged")
+            if abs(b - a) <= x_tol or len(evals) >= max_evals:
+                break
+            x = b - fb * (b - a) / (fb - fa)
+            if is_int and int(round(x)) in (a, b):
+                x = (a + b) / 2
+            x, fx = f(x)
+            if fx * fb > 0:
+                fa = fa / 2
+            else:
+                a, fa = b, fb
+            b, fb = x, fx
+    except MetricUnavailable as e:
+        closest = best() if evals else None
+        return result(closest, False, f"The metric isn't in the model run at {input_id} = {e.args[0]:,.4g}")
+
+    closest = best()
+    if abs(evals[closest]) <= f_tol:
+        return result(closest, True, "Converged")
+    if abs(b - a) <= x_tol:
+        # The target falls between two neighbouring values of the input (e.g. integers)
+        return result(closest, False, f"The target falls between input values {min(a, b):,.6g} and {max(a, b):,.6g}")
+    return result(closest, False, "Stopped at the evaluation budget")
@@ -385,3 +385,40 @@ ALL_INPUT_MAPPINGS = {
     **FINANCIAL_INPUTS,
     **SHARED_INPUTS
 }
+
+def coerce_input_value(value, input_id, from_ui=True):
+    """
+    Coerce input value to the correct type based on input_mappings.
+    
+    Args:
+        value: The value to coerce
+        input_id: The input ID from input_mappings
+        from_ui: If True, value is from UI (0-100 for percentages) and will be converted to model format (0-1).
+                If False, value is from config/model (0-1 for percentages) and will be converted to UI format (0-100).
+    """
+    if value is None:
+        return None
+    input_data = ALL_INPUT_MAPPINGS.get(input_id, {})
+    input_type = input_data.get("type")
+    is_pct = input_data.get("is_pct", False)
+    
+    # Handle percentage conversion
+    if is_pct:
+        if from_ui:
+            # Convert from UI (0-100) to model (0-1)
+            value = float(value) / 100.0
+        else:
+            # Convert from model (0-1) to UI (0-100)
+            value = float(value) * 100.0
+    
+    if input_type is None:
+        return value
+    try:
+        if input_type == int:
+            return int(value)
+        elif input_type == float:
+            return float(value)
+        else:
+            return value
+    except (ValueError, TypeError):
+        return value
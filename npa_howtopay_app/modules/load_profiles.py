@@ -0,0 +1,237 @@
+"""Hourly (8760) load profiles of converted households, for coincident peaks and grid headroom."""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import polars as pl
+
+from modules.input_mappings import coerce_input_value
+
+HOURS_PER_YEAR = 8760
+KWH_PER_THERM = 29.3071
+# Household types per weather year; their differences in thermostat settings and
+# timing are what makes the coincident peak of many households lower than the sum of theirs
+PROFILE_HOUSEHOLD_TYPES = 16
+# Synthetic weather years; model years cycle through them, so a run of any length needs at most this many
+PROFILE_WEATHER_YEARS = 10
+# Entries hold every weather year for one set of household inputs, about 17 MB each as float32
+PROFILE_CACHE_SIZE = int(os.environ.get("NPA_PROFILE_CACHE_SIZE", 8))
+PROFILE_INPUT_IDS = (
+    "per_user_heating_need_therms", "per_user_water_heating_need_therms", "hp_efficiency",
+    "water_heater_efficiency", "hp_peak_kw", "aircon_peak_kw",
+)
+
+# Synthetic climate, heating dominated (northeastern US): daily mean temperature around a
+# seasonal cycle coldest in late January, a diurnal cycle warmest mid-afternoon, and
+# day-to-day weather as an AR(1) anomaly, which is what produces the cold snaps that set the peak
+TEMP_MEAN_C = 10.0
+TEMP_SEASONAL_AMPLITUDE_C = 13.0
+TEMP_COLDEST_DAY = 20
+TEMP_DIURNAL_AMPLITUDE_C = 5.0
+TEMP_WARMEST_HOUR = 15
+TEMP_ANOMALY_SD_C = 4.0
+TEMP_ANOMALY_PERSISTENCE = 0.7
+HEATING_BALANCE_C = 15.5
+COOLING_BALANCE_C = 21.0
+# Heat pump efficiency relative to its rating (at 8.3C / 47F) falls as it gets colder
+HP_RATING_TEMP_C = 8.3
+HP_COP_SLOPE_PER_C = 0.03
+HP_COP_RANGE = (0.45, 1.3)
+# Seasons the winter and summer headroom apply to, as months
+WINTER_MONTHS = (11, 12, 1, 2, 3)
+SUMMER_MONTHS = (6, 7, 8, 9)
+PROFILE_END_USES = ("heating", "water_heating", "cooling")
+
+PROFILE_CACHE = OrderedDict()
+_PROFILE_CACHE_LOCK = threading.Lock()
+
+_HOURS = np.arange(np.datetime64("2023-01-01T00"), np.datetime64("2024-01-01T00"), dtype="datetime64[h]")
+HOUR_OF_DAY = np.arange(HOURS_PER_YEAR) % 24
+DAY_OF_YEAR = np.arange(HOURS_PER_YEAR) // 24
+MONTH = (_HOURS.astype("datetime64[M]").astype(int) % 12) + 1
+SEASON_HOURS = {"winter": np.isin(MONTH, WINTER_MONTHS), "summer": np.isin(MONTH, SUMMER_MONTHS)}
+
+
+def _value(values, input_id):
+    return float(coerce_input_value(values[input_id], input_id))
+
+
+def synthetic_temperatures(weather_year) -> np.ndarray:
+    """Hourly outdoor temperature (C) of one synthetic weather year, as an array of shape (8760,)"""
+    rng = np.random.default_rng([weather_year, 8760])
+    shocks = rng.normal(0, TEMP_ANOMALY_SD_C * np.sqrt(1 - TEMP_ANOMALY_PERSISTENCE ** 2), 365)
+    anomaly = np.empty(365)
+    anomaly[0] = rng.normal(0, TEMP_ANOMALY_SD_C)
+    for day in range(1, 365):
+        anomaly[day] = TEMP_ANOMALY_PERSISTENCE * anomaly[day - 1] + shocks[day]
+    seasonal = -TEMP_SEASONAL_AMPLITUDE_C * np.cos(2 * np.pi * (DAY_OF_YEAR - TEMP_COLDEST_DAY) / 365)
+    diurnal = TEMP_DIURNAL_AMPLITUDE_C * np.cos(2 * np.pi * (HOUR_OF_DAY - TEMP_WARMEST_HOUR) / 24)
+    return TEMP_MEAN_C + seasonal + diurnal + anomaly[DAY_OF_YEAR]
+
+
+def _household_types(n):
+    """Per household type: heating and cooling balance point offsets (C), thermal lag (hours), water heating times"""
+    rng = np.random.default_rng(n)
+    return {
+        "balance_offset": rng.normal(0, 1.5, (n, 1)),
+        "lag": rng.integers(0, 4, n),
+        "morning": rng.uniform(6, 8.5, (n, 1)),
+        "evening": rng.uniform(18, 21.5, (n, 1)),
+    }
+
+
+def _scale_to(shape, annual_kwh):
+    """Scale each row of shape so it sums to annual_kwh"""
+    totals = shape.sum(axis=1, keepdims=True)
+    return np.divide(shape * annual_kwh, totals, out=np.zeros_like(shape), where=totals > 0)
+
+
+def build_profiles(values, weather_years=PROFILE_WEATHER_YEARS, n_types=PROFILE_HOUSEHOLD_TYPES) -> np.ndarray:
+    """
+    Hourly electric load (kW) of one converted household of each type, in every weather year.
+
+    Heating is proportional to heating degree-hours divided by the heat pump's
+    temperature-dependent efficiency, scaled so the year's heat delivered
+    matches the heating need, and capped at the heat pump's peak kW. Water
+    heating follows a morning and evening draw, scaled to the water heating
+    need. Cooling is proportional to cooling degree-hours, scaled so each
+    household's hottest hour reaches the air conditioner's peak kW.
+
+    Returns:
+        float32 array of shape (weather years, 3, household types, 8760): heating,
+        water heating and cooling, as in PROFILE_END_USES
+    """
+    heating_kwh = _value(values, "per_user_heating_need_therms") * KWH_PER_THERM
+    water_kwh = _value(values, "per_user_water_heating_need_therms") * KWH_PER_THERM / _value(values, "water_heater_efficiency")
+    hp_efficiency, hp_peak_kw = _value(values, "hp_efficiency"), _value(values, "hp_peak_kw")
+    aircon_peak_kw = _value(values, "aircon_peak_kw")
+    types = _household_types(n_types)
+
+    # Water heating doesn't depend on the weather
+    draws = sum(np.exp(-0.5 * ((HOUR_OF_DAY - types[peak]) / 1.2) ** 2) for peak in ("morning", "evening"))
+    water = _scale_to(0.15 + draws, water_kwh)
+
+    profiles = np.empty((weather_years, len(PROFILE_END_USES), n_types, HOURS_PER_YEAR), dtype=np.float32)
+    for weather_year in range(weather_years):
+        temperature = synthetic_temperatures(weather_year)
+        # Each household type feels the weather a few hours late, as its house warms and cools slowly
+        felt = np.stack([np.roll(temperature, lag) for lag in types["lag"]])
+        heat = np.maximum(HEATING_BALANCE_C + types["balance_offset"] - felt, 0)
+        cop = hp_efficiency * np.clip(1 + HP_COP_SLOPE_PER_C * (felt - HP_RATING_TEMP_C), *HP_COP_RANGE)
+        heat_delivered = _scale_to(heat, heating_kwh)
+        cool = np.maximum(felt - COOLING_BALANCE_C - types["balance_offset"], 0)
+        peak_cool = cool.max(axis=1, keepdims=True)
+        profiles[weather_year, 0] = np.minimum(heat_delivered / cop, hp_peak_kw)
+        profiles[weather_year, 1] = water
+        profiles[weather_year, 2] = np.divide(cool * aircon_peak_kw, peak_cool, out=np.zeros_like(cool), where=peak_cool > 0)
+    return profiles
+
+
+def get_profiles(values) -> np.ndarray:
+    """build_profiles for values, built on first use and kept in a small LRU cache"""
+    key = tuple(_value(values, input_id) for input_id in PROFILE_INPUT_IDS)
+    with _PROFILE_CACHE_LOCK:
+        if key in PROFILE_CACHE:
+            PROFILE_CACHE.move_to_end(key)
+            return PROFILE_CACHE[key]
+    profiles = build_profiles(values)
+    with _PROFILE_CACHE_LOCK:
+        PROFILE_CACHE[key] = profiles
+        while len(PROFILE_CACHE) > PROFILE_CACHE_SIZE:
+            PROFILE_CACHE.popitem(last=False)
+    return profiles
+
+
+def added_load(profiles, values) -> np.ndarray:
+    """
+    Hourly load added per converted household, by season: heating and water
+    heating in winter, new air conditioning (for converts without it before
+    the NPA) and water heating in summer.
+
+    Returns:
+        float32 array of shape (weather years, 2, household types, 8760): winter, summer
+    """
+    new_aircon = 1 - _value(values, "aircon_percent_adoption_pre_npa")
+    return np.stack([profiles[:, 0] + profiles[:, 1], new_aircon * profiles[:, 2] + profiles[:, 1]], axis=1)
+
+
+def conversions_by_year(values):
+    """
+    Households converted by the NPA program in each model year.
+
+    Returns:
+        Tuple of (years, new conversions per year), arrays of shape (years,)
+    """
+    years = np.arange(int(_value(values, "start_year")), int(_value(values, "end_year")) + 1)
+    npa_year_start, npa_year_end = values["npa_year_range"]
+    per_year = _value(values, "npa_projects_per_year") * _value(values, "num_converts_per_project")
+    return years, np.where((years >= npa_year_start) & (years <= npa_year_end), per_year, 0.0)
+
+
+def design_peak_kw(values):
+    """
+    Coincident peak per converted household, to use in place of the single-household peak inputs.
+
+    Taken over the worst of the weather years, for a population with an even
+    mix of household types, so it only depends on household inputs and not on
+    how many households convert when. The winter value replaces hp_peak_kw;
+    the summer value replaces aircon_peak_kw and is per converted household
+    without air conditioning before the NPA.
+
+    Returns:
+        Dict with hp_peak_kw and aircon_peak_kw (kW per household)
+    """
+    load = added_load(get_profiles(values), values).mean(axis=2, dtype=np.float64)
+    winter = load[:, 0, SEASON_HOURS["winter"]].max()
+    summer = load[:, 1, SEASON_HOURS["summer"]].max()
+    new_aircon = 1 - _value(values, "aircon_percent_adoption_pre_npa")
+    return {
+        "hp_peak_kw": float(winter),
+        "aircon_peak_kw": float(summer / new_aircon) if new_aircon > 0 else _value(values, "aircon_peak_kw"),
+    }
+
+
+def hourly_peaks(values, seed=0) -> pl.DataFrame:
+    """
+    Coincident winter and summer peaks of all households converted so far, for every model year.
+
+    Each year's conversions are split across the household types at random
+    and accumulated, and each year's hourly load is the household type counts
+    times that year's profiles (model years cycle through the weather years),
+    stacked in one product per weather year.
+
+    Args:
+        values: Parameter snapshot (UI units)
+        seed: Random seed for the household type mix
+
+    Returns:
+        DataFrame with year, converts (cumulative), winter_peak_kw, summer_peak_kw,
+        and the peak increases beyond the headroom inputs, winter_upgrade_kw and summer_upgrade_kw
+    """
+    years, new = conversions_by_year(values)
+    load = added_load(get_profiles(values), values)
+    rng = np.random.default_rng(seed)
+    counts = np.cumsum(rng.multinomial(new.round().astype(np.int64), np.full(load.shape[2], 1 / load.shape[2])), axis=0)
+    hourly = np.empty((len(years), 2, HOURS_PER_YEAR), dtype=np.float32)
+    for weather_year in range(load.shape[0]):
+        cycle = years % load.shape[0] == weather_year
+        hourly[cycle] = np.einsum("yk,skh->ysh", counts[cycle].astype(np.float32), load[weather_year])
+    peaks = pl.DataFrame({
+        "year": years,
+        "converts": counts.sum(axis=1),
+        "winter_peak_kw": hourly[:, 0, SEASON_HOURS["winter"]].max(axis=1).astype(np.float64),
+        "summer_peak_kw": hourly[:, 1, SEASON_HOURS["summer"]].max(axis=1).astype(np.float64),
+    })
+    return peaks.with_columns(
+        (pl.col(f"{season}_peak_kw") - _value(values, f"peak_kw_{season}_headroom")).clip(lower_bound=0).alias(f"{season}_upgrade_kw")
+        for season in ("winter", "summer")
+    )
+
+
+def headroom_exhausted(peaks: pl.DataFrame):
+    """First year each season's peak exceeds its headroom, or None if it never does"""
+    return {
+        season: next(iter(peaks.filter(pl.col(f"{season}_upgrade_kw") > 0)["year"].to_list()), None)
+        for season in ("winter", "summer")
+    }
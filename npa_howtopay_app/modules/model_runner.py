@@ -0,0 +1,557 @@
+"""Build model inputs from a flat parameter snapshot and run the model outside the reactive graph."""
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import npa_howtopay as nhp
+
+from modules.config import get_config_value
+from modules.disk_cache import DiskCache
+from modules.input_mappings import ALL_INPUT_MAPPINGS, coerce_input_value
+from modules.load_profiles import design_peak_kw
+from modules.result_store import ModelResult, build_result
+
+# Inputs read from the sidebar; the NPA start/end years come from the npa_year_range slider instead
+MODEL_INPUT_IDS = [input_id for input_id in ALL_INPUT_MAPPINGS if input_id not in ("npa_year_start", "npa_year_end")]
+
+MODEL_POOL_SIZE = int(os.environ.get("NPA_MODEL_POOL_SIZE", os.cpu_count() or 1))
+RESULT_CACHE_SIZE = int(os.environ.get("NPA_RESULT_CACHE_SIZE", 256))
+SCENARIO_CACHE_SIZE = int(os.environ.get("NPA_SCENARIO_CACHE_SIZE", 512))
+DISK_CACHE_ENABLED = os.environ.get("NPA_DISK_CACHE", "1") != "0"
+# Round each run's end_year up to a multiple of this many years (off at 1), so extending end_year within the step is a slice
+HORIZON_STEP_YEARS = int(os.environ.get("NPA_HORIZON_STEP_YEARS", 1))
+
+# Scenarios each input can affect; inputs not listed here affect every scenario.
+# BAU runs without NPA projects, so NPA program inputs only reach the NPA scenarios,
+# and the incentive terms only reach the performance incentive scenario.
+# The scenarios only differ in who pays for the NPA projects: every scenario models
+# both utilities and the same electrification (scattershot in BAU too), so the gas,
+# electric, peak and efficiency inputs stay global even though they read like one
+# utility's. Scoping e.g. hp_peak_kw to the electric scenarios would serve stale
+# gas and taxpayer results.
+NPA_SCENARIO_IDS = ("taxpayer", "performance_incentive", "gas_capex", "gas_opex", "electric_capex", "electric_opex")
+SCENARIO_IDS = ("bau",) + NPA_SCENARIO_IDS
+SCENARIO_INPUT_SCOPE = {
+    # Which scenarios are run doesn't change any single scenario's output
+    "scenarios": (),
+    "npa_install_costs_init": NPA_SCENARIO_IDS,
+    "npa_projects_per_year": NPA_SCENARIO_IDS,
+    "num_converts_per_project": NPA_SCENARIO_IDS,
+    "npa_lifetime": NPA_SCENARIO_IDS,
+    "npa_year_range": NPA_SCENARIO_IDS,
+    "performance_incentive_pct": ("performance_incentive",),
+    "incentive_payback_period": ("performance_incentive",),
+}
+
+_model_pool = None
+
+logger = logging.getLogger(__name__)
+
+
+def _value(values, input_id):
+    return coerce_input_value(values[input_id], input_id)
+
+
+def make_web_params(values):
+    """Create the web parameters dict for the model"""
+    return {
+        "npa_num_projects": _value(values, "npa_projects_per_year"),
+        "num_converts": _value(values, "num_converts_per_project"),
+        "pipe_value_per_user": _value(values, "pipe_value_per_user"),
+        "pipe_decomm_cost_per_user": 0.0,
+        "peak_kw_winter_headroom": _value(values, "peak_kw_winter_headroom"),
+        "peak_kw_summer_headroom": _value(values, "peak_kw_summer_headroom"),
+        "aircon_percent_adoption_pre_npa": _value(values, "aircon_percent_adoption_pre_npa"),
+        "scattershot_electrification_users_per_year": _value(values, "scattershot_electrification_users_per_year"),
+        "gas_fixed_overhead_costs": _value(values, "gas_fixed_overhead_costs"),
+        "electric_fixed_overhead_costs": _value(values, "electric_fixed_overhead_costs"),
+        "gas_bau_lpp_costs_per_year": _value(values, "gas_bau_lpp_costs_per_year"),
+        "npa_year_start": int(values["npa_year_range"][0]),
+        "npa_year_end": int(values["npa_year_range"][1]),
+        "is_scattershot": False,
+    }
+
+
+def make_gas_params(values):
+    """Create the gas parameters object for the model"""
+    return nhp.params.GasParams(
+        baseline_non_lpp_ratebase_growth=_value(values, "baseline_non_lpp_ratebase_growth"),
+        default_depreciation_lifetime=_value(values, "non_lpp_depreciation_lifetime"),
+        pipeline_depreciation_lifetime=_value(values, "pipeline_depreciation_lifetime"),
+        non_lpp_depreciation_lifetime=_value(values, "non_lpp_depreciation_lifetime"),
+        gas_generation_cost_per_therm_init=_value(values, "gas_generation_cost_per_therm_init"),
+        num_users_init=_value(values, "gas_num_users_init"),
+        per_user_heating_need_therms=_value(values, "per_user_heating_need_therms"),
+        per_user_water_heating_need_therms=_value(values, "per_user_water_heating_need_therms"),
+        user_bill_fixed_charge=_value(values, "gas_user_bill_fixed_charge"),
+        pipeline_maintenance_cost_pct=_value(values, "pipeline_maintenance_cost_pct"),
+        ratebase_init=_value(values, "gas_ratebase_init"),
+        ror=_value(values, "gas_ror")
+    )
+
+
+def make_electric_params(values):
+    """
+    Create the electric parameters object for the model.
+
+    In hourly mode (values["hourly_peaks"]), the heat pump and air conditioning
+    peaks are the coincident peaks per household from the hourly load profiles
+    instead of the single-household inputs.
+    """
+    peaks = design_peak_kw(values) if values.get("hourly_peaks") else {}
+    return nhp.params.ElectricParams(
+        aircon_peak_kw=peaks.get("aircon_peak_kw", _value(values, "aircon_peak_kw")),  # peak energy consumption of a household airconditioning unit
+        baseline_non_npa_ratebase_growth=_value(values, "baseline_non_npa_ratebase_growth"),
+        default_depreciation_lifetime=_value(values, "electric_default_depreciation_lifetime"),
+        grid_upgrade_depreciation_lifetime=_value(values, "grid_upgrade_depreciation_lifetime"),
+        distribution_cost_per_peak_kw_increase_init=_value(values, "distribution_cost_per_peak_kw_increase_init"),
+        electric_maintenance_cost_pct=_value(values, "electric_maintenance_cost_pct"),
+        electricity_generation_cost_per_kwh_init=_value(values, "electricity_generation_cost_per_kwh_init"),
+        hp_efficiency=_value(values, "hp_efficiency"),
+        water_heater_efficiency=_value(values, "water_heater_efficiency"),
+        hp_peak_kw=peaks.get("hp_peak_kw", _value(values, "hp_peak_kw")),
+        num_users_init=_value(values, "electric_num_users_init"),
+        per_user_electric_need_kwh=_value(values, "per_user_electric_need_kwh"),
+        ratebase_init=_value(values, "electric_ratebase_init"),
+        user_bill_fixed_charge=_value(values, "electric_user_bill_fixed_charge"),
+        ror=_value(values, "electric_ror")
+    )
+
+
+def make_shared_params(values):
+    """Create the shared parameters object for the model"""
+    return nhp.params.SharedParams(
+        cost_inflation_rate=_value(values, "cost_inflation_rate"),
+        real_dollar_discount_rate=_value(values, "real_dollar_discount_rate"),
+        npv_discount_rate=_value(values, "npv_discount_rate"),
+        performance_incentive_pct=_value(values, "performance_incentive_pct"),
+        incentive_payback_period=_value(values, "incentive_payback_period"),
+        construction_inflation_rate=_value(values, "construction_inflation_rate"),
+        npa_install_costs_init=_value(values, "npa_install_costs_init"),
+        npa_lifetime=_value(values, "npa_lifetime"),
+        start_year=_value(values, "start_year")
+    )
+
+
+def make_input_params(values):
+    """Create the combined input parameters object for the model"""
+    return nhp.params.InputParams(
+        gas=make_gas_params(values),
+        electric=make_electric_params(values),
+        shared=make_shared_params(values)
+    )
+
+
+def make_ts_params(values):
+    """Create the time series inputs for the model"""
+    start_year = _value(values, "start_year")
+    end_year = _value(values, "end_year")
+    return nhp.params.load_time_series_params_from_web_params(make_web_params(values), start_year, end_year + 1)
+
+
+def selected_scenarios(values):
+    """
+    Scenario ids to run for a snapshot: BAU (needed for deltas) plus the NPA
+    scenarios in values["scenarios"], or every scenario if it isn't set.
+    """
+    selected = values.get("scenarios")
+    if selected is None:
+        return SCENARIO_IDS
+    return tuple(scenario_id for scenario_id in SCENARIO_IDS if scenario_id == "bau" or scenario_id in selected)
+
+
+def make_scenario_runs(values):
+    """Create the scenario parameters for the model, restricted to the selected scenarios"""
+    start_year = _value(values, "start_year")
+    end_year = _value(values, "end_year")
+    scenario_runs = nhp.model.create_scenario_runs(start_year, end_year + 1, ["gas", "electric"], ["capex", "opex"])
+    selected = selected_scenarios(values)
+    return {scenario_id: scenario_run for scenario_id, scenario_run in scenario_runs.items() if scenario_id in selected}
+
+
+def run_scenario_subset(values, scenario_ids):
+    """Run some of a snapshot's scenarios in the model, bypassing the cache; returns the model's results_all for them"""
+    scenario_runs = {
+        scenario_id: scenario_run for scenario_id, scenario_run in make_scenario_runs(values).items()
+        if scenario_id in scenario_ids
+    }
+    logger.debug("Running scenarios: %s", ", ".join(scenario_runs))
+    return nhp.model.run_all_scenarios(scenario_runs, make_input_params(values), make_ts_params(values))
+
+
+def cached_scenarios(values):
+    """Scenario outputs of a snapshot already in SCENARIO_CACHE, as scenario id -> output (None where missing)"""
+    return {scenario_id: SCENARIO_CACHE.get(scenario_hash(values, scenario_id)) for scenario_id in make_scenario_runs(values)}
+
+
+def scenario_outputs(values, scenario_ids):
+    """Outputs of some of a snapshot's scenarios, from SCENARIO_CACHE where possible; returns scenario id -> output"""
+    outputs = {scenario_id: SCENARIO_CACHE.get(scenario_hash(values, scenario_id)) for scenario_id in scenario_ids}
+    stale = [scenario_id for scenario_id, output in outputs.items() if output is None]
+    if stale:
+        fresh = run_scenario_subset(values, stale)
+        for scenario_id in stale:
+            outputs[scenario_id] = SCENARIO_CACHE.put(scenario_hash(values, scenario_id), fresh[scenario_id])
+    return outputs
+
+
+def run_scenarios(values):
+    """
+    Run every scenario for a parameter snapshot and return the model's results_all dict.
+
+    Scenario results are cached by the inputs they depend on (see SCENARIO_INPUT_SCOPE),
+    so only the scenarios affected by a change since an earlier run are recomputed.
+    """
+    return scenario_outputs(values, list(make_scenario_runs(values)))
+
+
+def values_from_config(config):
+    """
+    Build the flat parameter snapshot (UI units) for a run configuration, as the
+    sidebar shows it after selecting that configuration.
+    """
+    values = {}
+    for input_id in MODEL_INPUT_IDS:
+        input_type = ALL_INPUT_MAPPINGS[input_id].get("type", float)
+        values[input_id] = input_type(float(get_config_value(config, ALL_INPUT_MAPPINGS[input_id]["config_path"])))
+    values["npa_year_range"] = (
+        int(get_config_value(config, ALL_INPUT_MAPPINGS["npa_year_start"]["config_path"])),
+        int(get_config_value(config, ALL_INPUT_MAPPINGS["npa_year_end"]["config_path"]))
+    )
+    return values
+
+
+def canonical_params(values):
+    """
+    Return the parameter snapshot in model units with types coerced, so that
+    equivalent UI states (e.g. 5 vs 5.0) compare and hash equal.
+    """
+    canonical = {input_id: _value(values, input_id) for input_id in MODEL_INPUT_IDS}
+    canonical["npa_year_range"] = [int(year) for year in values["npa_year_range"]]
+    # Only a strict subset of scenarios changes the key, so full runs keep their existing keys
+    scenarios = selected_scenarios(values)
+    if scenarios != SCENARIO_IDS:
+        canonical["scenarios"] = list(scenarios)
+    if values.get("hourly_peaks"):
+        canonical["hourly_peaks"] = True
+    return canonical
+
+
+def params_hash(values) -> str:
+    """Stable hash of a parameter snapshot, used as the result cache key"""
+    payload = json.dumps(canonical_params(values), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def scenario_hash(values, scenario_id) -> str:
+    """Stable hash of the inputs one scenario depends on, used as the scenario cache key"""
+    relevant = {
+        input_id: value for input_id, value in canonical_params(values).items()
+        if scenario_id in SCENARIO_INPUT_SCOPE.get(input_id, (scenario_id,))
+    }
+    payload = json.dumps({"scenario_id": scenario_id, "params": relevant}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def horizon_hash(values) -> str:
+    """Hash of a parameter snapshot ignoring end_year; runs that differ only in horizon share it"""
+    canonical = canonical_params(values)
+    del canonical["end_year"]
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def compute_result(values) -> ModelResult:
+    """Run every scenario for a parameter snapshot and reduce the output to a compact ModelResult"""
+    return build_result(params_hash(values), run_scenarios(values))
+
+
+class ResultCache:
+    """
+    LRU cache of ModelResults keyed by parameter hash, shared by all sessions.
+
+    The in-memory tier is per process; the optional disk tier is shared by every
+    worker process on the host and survives restarts. With the disk tier, the
+    memory tier holds memory-mapped copies of the disk entries, so workers on
+    the same parameters share one copy of the frames instead of one each.
+    """
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, disk=None):
+        self.maxsize = maxsize
+        self.disk = disk
+        self._entries = OrderedDict()
+        # Live-mode runs use the caches from worker threads
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        if self.disk is not None:
+            result = self.disk.get(key)
+            if result is not None:
+                self._remember(key, result)
+                return result
+        return None
+
+    def put(self, key, value):
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key) or self.disk.put(value)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Error writing result {key} to disk cache: {e}")
+        self._remember(key, value)
+        return value
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._entries or (self.disk is not None and key in self.disk)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def values(self):
+        with self._lock:
+            return list(self._entries.values())
+
+
+def _open_disk_cache():
+    """Open the shared disk cache, or return None if it's disabled or unavailable"""
+    if not DISK_CACHE_ENABLED:
+        return None
+    try:
+        return DiskCache()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Disk cache unavailable, using memory only: {e}")
+        return None
+
+
+RESULT_CACHE = ResultCache(disk=_open_disk_cache())
+# Per-scenario model output of recent runs in this process, for incremental recomputation
+SCENARIO_CACHE = ResultCache(maxsize=SCENARIO_CACHE_SIZE)
+# horizon_hash -> (end_year, result key) of the longest horizon computed for those inputs
+HORIZON_INDEX = ResultCache(maxsize=RESULT_CACHE_SIZE)
+
+
+def remember_horizon(values, result):
+    """Record a computed result so shorter horizons on the same inputs can be sliced from it"""
+    end_year = _value(values, "end_year")
+    h_key = horizon_hash(values)
+    longest = HORIZON_INDEX.get(h_key)
+    if longest is None or longest[0] < end_year:
+        HORIZON_INDEX.put(h_key, (end_year, result.key))
+
+
+def cached_result(values, key):
+    """
+    Return the cached ModelResult for a snapshot, or None.
+
+    The model rolls state forward year by year, so the first years of a longer
+    run on the same inputs are the result of a shorter run. When only a longer
+    horizon is cached, its frames are sliced to end_year instead of rerunning.
+    """
+    result = RESULT_CACHE.get(key)
+    if result is not None:
+        return result
+    longest = HORIZON_INDEX.get(horizon_hash(values))
+    if longest is None or longest[0] < _value(values, "end_year"):
+        return None
+    longer = RESULT_CACHE.get(longest[1])
+    if longer is None:
+        return None
+    return RESULT_CACHE.put(key, longer.up_to_year(key, _value(values, "end_year")))
+
+
+def run_horizon(values):
+    """
+    Snapshot to run the model on in place of values: the same inputs, with
+    end_year rounded up to a whole HORIZON_STEP_YEARS, or the longest horizon
+    already run on these inputs if that's later.
+
+    The model can't resume a run, so extending end_year means a new run. With
+    HORIZON_STEP_YEARS above 1, every run goes past the requested year so nearby
+    extensions can be sliced from the result, at the cost of computing (and
+    caching) years that may never be shown. A run whose longer result was
+    evicted replaces it instead of a shorter one.
+    """
+    end_year = _value(values, "end_year")
+    run_end_year = end_year + (-end_year) % HORIZON_STEP_YEARS
+    longest = HORIZON_INDEX.get(horizon_hash(values))
+    if longest is not None:
+        run_end_year = max(run_end_year, longest[0])
+    return {**values, "end_year": run_end_year}
+
+
+def get_result(values) -> ModelResult:
+    """
+    Return the ModelResult for a parameter snapshot, running the model only if it isn't cached.
+
+    The run goes to the horizon of run_horizon(values), and is sliced to end_year.
+    """
+    key = params_hash(values)
+    result = cached_result(values, key)
+    if result is not None:
+        return result
+    run_values = run_horizon(values)
+    run_key = params_hash(run_values)
+    longer = RESULT_CACHE.get(run_key) or RESULT_CACHE.put(run_key, build_result(run_key, run_scenarios(run_values)))
+    remember_horizon(run_values, longer)
+    if run_key == key:
+        return longer
+    return RESULT_CACHE.put(key, longer.up_to_year(key, _value(values, "end_year")))
+
+
+async def get_result_async(values) -> ModelResult:
+    """
+    get_result in a worker thread, so the event loop keeps serving other sessions
+    while the model runs. Runs in this process to reuse its per-scenario cache.
+    """
+    return await asyncio.to_thread(get_result, values)
+
+
+async def stream_result(values, on_progress=None) -> ModelResult:
+    """
+    get_result, running one scenario at a time (BAU first) and reporting each as it finishes.
+
+    The results so far are a complete result in their own right: the run of the
+    same inputs restricted to the scenarios done, and are keyed as such. They
+    are passed to on_progress but not cached, since the full result follows.
+    Each step only builds the frames of the scenario it ran and appends them.
+    Runs in this process, like get_result_async; per-scenario results go to
+    SCENARIO_CACHE, so the final get_result only builds the frames.
+
+    Args:
+        values: Parameter snapshot
+        on_progress: Optional coroutine function awaited as on_progress(done, total, partial)
+            with the number of scenarios done and the result of those, first as
+            (0, total, None) before BAU runs and last before the final scenario.
+            Not called if the result is cached.
+    """
+    if cached_result(values, params_hash(values)) is not None:
+        return await get_result_async(values)
+    scenarios = selected_scenarios(values)
+    run_values = run_horizon(values)
+    if on_progress is not None:
+        await on_progress(0, len(scenarios), None)
+    partial = None
+    for done in range(1, len(scenarios)):
+        # Deltas are taken from BAU, so each scenario's frames are built alongside it
+        scenario_ids = ("bau",) if done == 1 else ("bau", scenarios[done - 1])
+        # Run to the same horizon as get_result, so it finds these scenarios in SCENARIO_CACHE
+        results_all = await asyncio.to_thread(scenario_outputs, run_values, scenario_ids)
+        if on_progress is not None:
+            partial_key = params_hash({**values, "scenarios": scenarios[1:done]})
+            step = build_result(partial_key, results_all).up_to_year(partial_key, _value(values, "end_year"))
+            partial = step if partial is None else partial.append(partial_key, step)
+            await on_progress(done, len(scenarios), partial)
+    return await get_result_async(values)
+
+
+def compute_shared(values):
+    """
+    Compute a result in a pool worker and publish it to the disk cache.
+
+    Returns only the key when the result is on disk, so the frames are memory-mapped
+    by the caller instead of being pickled back through the pool; otherwise returns
+    the ModelResult itself.
+    """
+    result = RESULT_CACHE.put(params_hash(values), compute_result(values))
+    if RESULT_CACHE.disk is not None and result.key in RESULT_CACHE.disk:
+        return result.key
+    return result
+
+
+def compute_scenarios(values, scenario_ids):
+    """scenario_outputs in a pool worker, for the scenarios the caller doesn't have cached"""
+    return scenario_outputs(values, scenario_ids)
+
+
+def get_model_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared model process pool, creating it on first use.
+
+    Workers are spawned rather than forked: forking a process whose polars
+    thread pool is already running can deadlock the child.
+    """
+    global _model_pool
+    if _model_pool is None:
+        _model_pool = ProcessPoolExecutor(max_workers=MODEL_POOL_SIZE, mp_context=multiprocessing.get_context("spawn"))
+        atexit.register(_model_pool.shutdown, wait=False, cancel_futures=True)
+    return _model_pool
+
+
+def run_many(values_list, on_progress=None):
+    """
+    Run the model for many parameter snapshots in parallel.
+
+    Snapshots already in the result cache, and duplicates within the batch,
+    are not recomputed. Workers have their own scenario caches, so for
+    snapshots sharing some scenarios with earlier runs in this process (e.g. a
+    perturbation of an input that only reaches some scenarios) only the other
+    scenarios are sent to the pool, and the result is built here from both.
+
+    Args:
+        values_list: List of parameter snapshots
+        on_progress: Optional callback called as on_progress(done, total) with the
+            number of distinct snapshots finished so far, cached ones included,
+            once before the first run and then as each run completes
+
+    Returns:
+        List of ModelResults, in the same order as values_list
+    """
+    keys = [params_hash(values) for values in values_list]
+    results = {}
+    futures = {}
+    for key, values in zip(keys, values_list):
+        if key in results or key in futures:
+            continue
+        cached = cached_result(values, key)
+        if cached is not None:
+            results[key] = cached
+            continue
+        # Held on to here, so they can't be evicted before the worker's scenarios come back
+        reused = {scenario_id: output for scenario_id, output in cached_scenarios(values).items() if output is not None}
+        stale = [scenario_id for scenario_id in make_scenario_runs(values) if scenario_id not in reused]
+        if reused:
+            futures[key] = (values, reused, get_model_pool().submit(compute_scenarios, values, stale))
+        else:
+            futures[key] = (values, reused, get_model_pool().submit(compute_shared, values))
+    total = len(results) + len(futures)
+    if on_progress is not None:
+        on_progress(len(results), total)
+    keys_by_future = {future: key for key, (_, _, future) in futures.items()}
+    for future in as_completed(keys_by_future):
+        key = keys_by_future[future]
+        values, reused = futures[key][:2]
+        result = future.result()
+        if reused:
+            for scenario_id, output in result.items():
+                SCENARIO_CACHE.put(scenario_hash(values, scenario_id), output)
+            results_all = {**reused, **result}
+            result = RESULT_CACHE.put(key, build_result(key, {
+                scenario_id: results_all[scenario_id] for scenario_id in make_scenario_runs(values)
+            }))
+        elif isinstance(result, str):
+            # Published to the disk cache by the worker; run locally if it was evicted meanwhile
+            result = RESULT_CACHE.get(key) or RESULT_CACHE.put(key, compute_result(values))
+        else:
+            result = RESULT_CACHE.put(key, result)
+        remember_horizon(values, result)
+        results[key] = result
+        if on_progress is not None:
+            on_progress(len(results), total)
+    return [results[key] for key in keys]
@@ -0,0 +1,126 @@
+"""Monte Carlo uncertainty runs: vectorised input sampling and streaming quantile bands."""
+import numpy as np
+import npa_howtopay as nhp
+import polars as pl
+from npa_howtopay.params import COMPARE_COLS
+
+from modules.input_mappings import ALL_INPUT_MAPPINGS
+from modules.model_runner import MODEL_POOL_SIZE, get_model_pool, get_result, run_scenarios
+from modules.quantiles import StreamingQuantiles
+
+MC_DISTRIBUTIONS = {
+    "normal": "Normal (spread = standard deviation)",
+    "uniform": "Uniform (± spread)",
+    "triangular": "Triangular (± spread)",
+}
+MC_QUANTILES = (0.1, 0.5, 0.9)
+MC_DEFAULT_INPUTS = ["cost_inflation_rate", "npa_install_costs_init", "hp_peak_kw"]
+MC_VIEWS = ("delta", "absolute")
+
+# Rows of the long-format frames are sorted on these so every sample lines up cell by cell
+_KEY_COLS = ["scenario_id", "utility_type", "year"]
+
+
+def sample_inputs(values, input_ids, distribution, spread_pct, n, seed=None):
+    """
+    Draw n samples of the uncertain inputs around their current values in one vectorised pass.
+
+    Args:
+        values: Base parameter snapshot (UI units)
+        input_ids: Inputs to sample
+        distribution: Key of MC_DISTRIBUTIONS
+        spread_pct: Spread of the distribution, as a percentage of each input's current value
+        n: Number of samples
+        seed: Optional random seed for reproducible runs
+
+    Returns:
+        Array of shape (n, len(input_ids)), clipped to each input's min/max and rounded for int inputs
+    """
+    rng = np.random.default_rng(seed)
+    center = np.array([float(values[input_id]) for input_id in input_ids])
+    spread = np.abs(center) * spread_pct / 100
+    size = (n, len(input_ids))
+
+    if distribution == "normal":
+        samples = rng.normal(center, spread, size=size)
+    elif distribution == "uniform":
+        samples = rng.uniform(center - spread, center + spread, size=size)
+    elif distribution == "triangular":
+        # Inverse CDF of a symmetric triangular distribution (also valid for zero spread)
+        u = rng.random(size=size)
+        samples = center + spread * np.where(u < 0.5, np.sqrt(2 * u) - 1, 1 - np.sqrt(2 * (1 - u)))
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+    mins = np.array([ALL_INPUT_MAPPINGS[input_id].get("min", -np.inf) for input_id in input_ids], dtype=float)
+    maxs = np.array([ALL_INPUT_MAPPINGS[input_id].get("max", np.inf) for input_id in input_ids], dtype=float)
+    samples = np.clip(samples, mins, maxs)
+
+    is_int = np.array([ALL_INPUT_MAPPINGS[input_id].get("type") == int for input_id in input_ids])
+    samples[:, is_int] = np.round(samples[:, is_int])
+    return samples
+
+
+def _long_frames(results_all):
+    """Delta and absolute long-format frames with rows in a fixed order"""
+    delta = nhp.utils.transform_to_long_format(nhp.model.create_delta_df(results_all, COMPARE_COLS))
+    absolute = nhp.utils.transform_to_long_format(nhp.model.return_absolute_values_df(results_all, COMPARE_COLS))
+    return [df.sort(_KEY_COLS) for df in (delta, absolute)]
+
+
+def run_sample(values):
+    """Run one sample and return its metrics as an array of shape (views, rows, metrics) (runs in a pool worker)"""
+    return np.stack([df.select(COMPARE_COLS).to_numpy() for df in _long_frames(run_scenarios(values))])
+
+
+def run_monte_carlo(values, input_ids, distribution, spread_pct, n, seed=None, on_progress=None):
+    """
+    Run the model for n sampled parameter sets and summarise every chart cell as p10/p50/p90.
+
+    Samples are evaluated on the model pool a window at a time and folded into a
+    streaming quantile estimator as they complete, so memory does not grow with n.
+
+    Args:
+        values: Base parameter snapshot (UI units)
+        input_ids: Inputs to treat as uncertain
+        distribution: Key of MC_DISTRIBUTIONS
+        spread_pct: Spread of the distribution, as a percentage of each input's current value
+        n: Number of samples
+        seed: Optional random seed for reproducible runs
+        on_progress: Optional callback called as on_progress(done, n)
+
+    Returns:
+        DataFrame with columns year, scenario_id, utility_type, view, metric, p10, p50, p90
+    """
+    samples = sample_inputs(values, input_ids, distribution, spread_pct, n, seed)
+    keys = get_result(values).delta_long.select(_KEY_COLS).with_columns(
+        pl.col("scenario_id", "utility_type").cast(pl.String),
+        pl.col("year").cast(pl.Int64)
+    ).sort(_KEY_COLS)
+
+    estimator = StreamingQuantiles(MC_QUANTILES)
+    pool = get_model_pool()
+    window = 4 * MODEL_POOL_SIZE
+    for start in range(0, n, window):
+        futures = [
+            pool.submit(run_sample, {**values, **dict(zip(input_ids, sample.tolist()))})
+            for sample in samples[start:start + window]
+        ]
+        for future in futures:
+            estimator.update(future.result())
+        if on_progress is not None:
+            on_progress(min(start + window, n), n)
+
+    # (quantiles, views, rows, metrics) -> one row per (view, metric, cell)
+    bands = estimator.result()
+    n_rows, n_metrics = bands.shape[2], bands.shape[3]
+    cells = bands.transpose(0, 1, 3, 2).reshape(len(MC_QUANTILES), -1)
+    return pl.concat(
+        [keys] * (len(MC_VIEWS) * n_metrics)
+    ).with_columns(
+        pl.Series("view", np.repeat(MC_VIEWS, n_metrics * n_rows)),
+        pl.Series("metric", np.tile(np.repeat(COMPARE_COLS, n_rows), len(MC_VIEWS))),
+        pl.Series("p10", cells[0]),
+        pl.Series("p50", cells[1]),
+        pl.Series("p90", cells[2]),
+    )
@@ -0,0 +1,52 @@
+"""Shiny output for plotly figures sent as ready-made JSON (see figure_cache)."""
+from pathlib import Path
+
+import plotly
+from htmltools import HTMLDependency
+from shiny import ui
+from shiny.render.renderer import Jsonifiable, Renderer
+
+PLOTLY_JS_DIR = Path(plotly.__file__).parent / "package_data"
+WWW_DIR = Path(__file__).parent.parent / "www"
+PLOTLY_JSON_CLASS = "plotly-json-output"
+
+
+def plotly_json_dependencies():
+    """plotly.js (the copy bundled with the plotly package) and the output binding"""
+    return [
+        HTMLDependency(
+            "plotly.js", plotly.__version__,
+            source={"subdir": str(PLOTLY_JS_DIR)},
+            script={"src": "plotly.min.js"},
+        ),
+        HTMLDependency(
+            "plotly-json-output", "1.0.0",
+            source={"subdir": str(WWW_DIR)},
+            script={"src": "plotly_json_output.js"},
+        ),
+    ]
+
+
+def output_plotly_json(id, height="450px"):
+    """Container for a render_plotly_json output"""
+    return ui.div(
+        *plotly_json_dependencies(),
+        id=id,
+        class_=PLOTLY_JSON_CLASS,
+        style=f"width: 100%; min-height: {height};",
+    )
+
+
+class render_plotly_json(Renderer[str]):
+    """
+    Render a figure that is already serialised to JSON (e.g. from FIGURE_CACHE).
+
+    The string is passed through to the browser unchanged, where the output
+    binding parses it and draws it with Plotly.react.
+    """
+
+    def auto_output_ui(self):
+        return output_plotly_json(self.output_id)
+
+    async def transform(self, value: str) -> Jsonifiable:
+        return value
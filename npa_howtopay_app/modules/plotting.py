@@ -36,6 +36,89 @@ scenario_labels = {
     'performance_incentive': 'Performance Incentive',
 }
 
+# Utility metric charts (faceted by gas/electric), keyed by output id
+UTILITY_METRIC_CHARTS = {
+    'utility_revenue_reqs_chart': {
+        'column': 'inflation_adjusted_revenue_requirement',
+        'title': 'Utility Revenue Requirements',
+        'y_label_unit': '$',
+        'y_label_title': 'Utility revenue requirement',
+    },
+    'volumetric_tariff_chart': {
+        'column': 'variable_tariff',
+        'title': 'Volumetric Tariff',
+        'y_label_unit': '$/unit',
+        'y_label_title': 'Volumetric tariff',
+    },
+    'ratebase_chart': {
+        'column': 'inflation_adjusted_ratebase',
+        'title': 'Ratebase',
+        'y_label_unit': '$',
+        'y_label_title': 'Ratebase',
+    },
+    'return_component_chart': {
+        'column': 'return_on_ratebase_pct',
+        'title': '',
+        'y_label_unit': '% of revenue requirement',
+        'y_label_title': 'Return component',
+    },
+    'nonconverts_bill_per_user_chart': {
+        'column': 'nonconverts_bill_per_user',
+        'title': '',
+        'y_label_unit': '$',
+        'y_label_title': 'Nonconverts annual delivery bill',
+    },
+    'converts_bill_per_user_chart': {
+        'column': 'converts_bill_per_user',
+        'title': '',
+        'y_label_unit': '$',
+        'y_label_title': 'Converts annual delivery bill',
+    },
+}
+
+# Line charts with more traces or points than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_TRACE_THRESHOLD = 30
+WEBGL_POINT_THRESHOLD = 1000
+# Past this budget, a chart shows a min/max envelope around the median per scenario instead of every line
+CHART_TRACE_BUDGET = 150
+CHART_POINT_BUDGET = 20000
+
+def line_chart_load(plt_df: pl.DataFrame, series_cols) -> Tuple[int, int]:
+    """Number of line traces (distinct combinations of series_cols) and points a line chart would draw"""
+    return plt_df.select(series_cols).n_unique(), plt_df.height
+
+def line_render_mode(n_traces: int, n_points: int) -> str:
+    """px render_mode for a line chart of the given size"""
+    return "webgl" if n_traces > WEBGL_TRACE_THRESHOLD or n_points > WEBGL_POINT_THRESHOLD else "svg"
+
+def over_line_budget(n_traces: int, n_points: int) -> bool:
+    return n_traces > CHART_TRACE_BUDGET or n_points > CHART_POINT_BUDGET
+
+def line_envelope(plt_df: pl.DataFrame, value_col: str, group_cols) -> pl.DataFrame:
+    """
+    Collapse the lines in each group to their median, with the min and max across lines
+    
+    Args:
+        plt_df: Long DataFrame with one row per line and year
+        value_col: Column being plotted; replaced by the median across lines
+        group_cols: Columns that identify a group (e.g. scenario_id and a facet column)
+    """
+    return plt_df.group_by([*group_cols, "year"], maintain_order=True).agg(
+        pl.col(value_col).median(),
+        pl.col(value_col).min().alias("line_min"),
+        pl.col(value_col).max().alias("line_max"),
+    )
+
+# (smallest absolute value, tick_format, suffix, scale_factor, short suffix), largest first
+MAGNITUDE_FORMATS = (
+    (1_000_000_000, '$,.1f', ' Billion', 1_000_000_000, ' B'),
+    (1_000_000, '$,.1f', ' Million', 1_000_000, ' M'),
+    (100_000, '$,.0f', ' Thousand', 1_000, ' K'),
+    (10, '$,.0f', '', 1, ''),  # Between $10 and $99,999
+    (1, '$.2f', '', 1, ''),  # Between $1 and $9.99
+    (0, '$,.3f', '', 1, ''),
+)
+
 def detect_magnitude_and_format(data_values: pl.Series) -> Tuple[str, str, float]:
     """
     Detect the magnitude of data values and return appropriate format and scale.
@@ -49,18 +132,19 @@ def detect_magnitude_and_format(data_values: pl.Series) -> Tuple[str, str, float
     # Get the maximum absolute value to determine scale
     max_abs_value = float(data_values.abs().max())
     
-    if max_abs_value >= 1_000_000_000:  # Billions
-        return ('$,.1f', ' Billion', 1_000_000_000, ' B')
-    elif max_abs_value >= 1_000_000:  # Millions
-        return ('$,.1f', ' Million', 1_000_000, ' M')
-    elif max_abs_value >= 100_000:  # Thousands
-        return ('$,.0f', ' Thousand', 1_000, ' K')
-    elif max_abs_value >= 10:  # Between $10 and $999
-        return ('$,.0f', '', 1, '')
-    elif max_abs_value >= 1:  # Between $1 and $9.99
-        return ('$.2f', '', 1, '')  # Changed from '$,.2f' to '$.2f'
-    else:
-        return ('$,.3f', '', 1, '')
+    for threshold, *magnitude_format in MAGNITUDE_FORMATS:
+        if max_abs_value >= threshold:
+            return tuple(magnitude_format)
+    # Below every threshold (e.g. NaN): the smallest format
+    return tuple(MAGNITUDE_FORMATS[-1][1:])
+
+def magnitude_scale_expr(column: str) -> pl.Expr:
+    """The scale_factor detect_magnitude_and_format picks for a column, as an expression over the whole column"""
+    max_abs = pl.col(column).abs().max()
+    scale = pl.lit(1.0)
+    for threshold, _, _, scale_factor, _ in reversed(MAGNITUDE_FORMATS):
+        scale = pl.when(max_abs >= threshold).then(pl.lit(float(scale_factor))).otherwise(scale)
+    return scale
 
 def apply_plot_theme(fig):
     """
@@ -110,7 +194,9 @@ def plot_utility_metric(
     scenario_colors: Dict[str, str] = switchbox_colors,
     scenario_line_styles: Dict[str, str] = line_styles,
     show_absolute: bool = False,
-    show_year: int = None
+    show_year: int = None,
+    bands_df: pl.DataFrame = None,
+    line_group: str = None
 ) :
     """
     Generic utility plotting function for faceted plots (Gas/Electric)
@@ -122,25 +208,35 @@ def plot_utility_metric(
         y_label_unit: Unit for y-axis label (e.g., "$", "$/unit", "$/kWh")
         scenario_colors: Dictionary mapping scenario_id to colors
         show_absolute: Whether to show absolute values or deltas (default: False for delta)
+        bands_df: Optional uncertainty bands for this column (year, scenario_id, utility_type, p10, p90),
+            drawn as shaded p10-p90 ranges behind the lines
+        line_group: Optional column distinguishing several lines per scenario (e.g. runs being compared).
+            Many lines are drawn with WebGL; past CHART_TRACE_BUDGET/CHART_POINT_BUDGET each scenario is
+            drawn as its median line inside a min/max envelope instead
     """
+    display_scale = 1
 
     # Detect magnitude and get appropriate formatting for y-axis
     if y_label_unit == "$":
         tick_format, suffix, scale_factor, short_suffix = detect_magnitude_and_format(plt_df[column])
-        # Scale the data for display
-        plt_df = plt_df.with_columns(
-            (pl.col(column) / scale_factor).alias(f"{column}_scaled")
-        )
+        # Scale the data for display, unless it comes scaled from the chart data plan
+        if f"{column}_scaled" not in plt_df.columns:
+            plt_df = plt_df.with_columns(
+                (pl.col(column) / scale_factor).alias(f"{column}_scaled")
+            )
         plot_column = f"{column}_scaled"
+        display_scale = 1 / scale_factor
         # Update y-axis label with suffix
         y_label_with_suffix = f"{y_label_unit}{suffix}" if suffix else y_label_unit
     elif "%" in y_label_unit:
-        # Scale the data for display
-        plt_df = plt_df.with_columns(
-            (pl.col(column) * 100).alias(f"{column}_scaled")
-        )
+        # Scale the data for display, unless it comes scaled from the chart data plan
+        if f"{column}_scaled" not in plt_df.columns:
+            plt_df = plt_df.with_columns(
+                (pl.col(column) * 100).alias(f"{column}_scaled")
+            )
         tick_format = '.2f'
         suffix = "%"
+        display_scale = 100
         plot_column = f"{column}_scaled"
         y_label_with_suffix = '%'
     else:
@@ -157,6 +253,13 @@ def plot_utility_metric(
         # Use delta symbol (Δ) for delta values
         y_label = f"Δ {y_label_title} ({y_label_with_suffix})"
     
+    envelope_df = None
+    n_traces, n_points = line_chart_load(plt_df, ["scenario_id", "utility_type"] + ([line_group] if line_group else []))
+    if line_group and over_line_budget(n_traces, n_points):
+        envelope_df = line_envelope(plt_df, plot_column, ["scenario_id", "utility_type"])
+        plt_df, line_group = envelope_df, None
+        n_traces, n_points = line_chart_load(plt_df, ["scenario_id", "utility_type"])
+
     print("Creating plotly figure...")
     # Create figure with facets
     fig = px.line(
@@ -165,6 +268,9 @@ def plot_utility_metric(
         y=plot_column,
         color="scenario_id",
         line_dash="scenario_id",
+        line_group=line_group,
+        hover_name=line_group,
+        render_mode=line_render_mode(n_traces, n_points),
         facet_col="utility_type",
         facet_col_spacing=0.09,
         color_discrete_map=scenario_colors,
@@ -227,6 +333,12 @@ def plot_utility_metric(
         )
     )
     
+    facet_order = plt_df["utility_type"].unique(maintain_order=True).to_list()
+    if envelope_df is not None:
+        add_uncertainty_bands(fig, envelope_df, facet_order, 1, scenario_colors, lower="line_min", upper="line_max")
+    if bands_df is not None and not bands_df.is_empty():
+        add_uncertainty_bands(fig, bands_df, facet_order, display_scale, scenario_colors)
+    
     # Add horizontal line at y=0
     if not show_absolute:
         fig.add_hline(y=0, line_dash="solid", line_color="darkgray", line_width=1)
@@ -249,6 +361,82 @@ def plot_utility_metric(
     
     return fig
 
+def typed_array(series: pl.Series) -> np.ndarray:
+    """
+    Convert a Series for use as trace data.
+
+    Plotly serialises numpy arrays as base64 typed arrays ("bdata") straight
+    from their buffers, whereas Python lists are written out as JSON lists of
+    numbers. Floats are sent as float32, more precision than a chart can show.
+    """
+    if series.dtype.is_float():
+        series = series.cast(pl.Float32)
+    return series.to_numpy()
+
+def add_uncertainty_bands(fig, bands_df: pl.DataFrame, facet_order, display_scale: float, scenario_colors: Dict[str, str],
+                          lower: str = "p10", upper: str = "p90"):
+    """
+    Add shaded bands (p10-p90 by default) per scenario to a figure faceted by utility_type
+    
+    Args:
+        fig: Faceted plotly figure from plot_utility_metric
+        bands_df: DataFrame with year, scenario_id, utility_type and the lower/upper columns
+        facet_order: utility_type values in facet column order
+        display_scale: Factor applied to the plotted column (e.g. 1/1e6 for $ Millions)
+        scenario_colors: Dictionary mapping scenario_id to colors
+        lower: Column with the bottom of the band
+        upper: Column with the top of the band
+    """
+    for (scenario_id, utility_type), band in bands_df.sort("year").group_by(["scenario_id", "utility_type"]):
+        if utility_type not in facet_order:
+            continue
+        color = scenario_colors.get(scenario_id, '#000000').lstrip('#')
+        fill = f"rgba({int(color[0:2], 16)}, {int(color[2:4], 16)}, {int(color[4:6], 16)}, 0.2)"
+        col = facet_order.index(utility_type) + 1
+        years = typed_array(band["year"])
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([years, years[::-1]]),
+            y=np.concatenate([typed_array(band[upper] * display_scale), typed_array(band[lower] * display_scale)[::-1]]),
+            fill="toself",
+            fillcolor=fill,
+            line=dict(width=0),
+            hoverinfo="skip",
+            showlegend=False,
+        ), row=1, col=col)
+
+def plot_chart(plt_df: pl.DataFrame, chart_id: str, show_absolute: bool = False, show_year: int = None, bands_df: pl.DataFrame = None,
+               line_group: str = None):
+    """
+    Plot one of the registered utility metric charts by id
+
+    Args:
+        plt_df: DataFrame with utility data in long format
+        chart_id: Key into UTILITY_METRIC_CHARTS
+        show_absolute: Whether to show absolute values or deltas (default: False for delta)
+        bands_df: Optional Monte Carlo bands for the chart's column
+        line_group: Optional column distinguishing several lines per scenario
+    """
+    return plot_utility_metric(
+        plt_df=plt_df,
+        show_absolute=show_absolute,
+        show_year=show_year,
+        bands_df=bands_df,
+        line_group=line_group,
+        **UTILITY_METRIC_CHARTS[chart_id]
+    )
+
+def total_bill_frame(results_df, converts_nonconverts: str, extra_cols=()):
+    """
+    Combined bills of converts or nonconverts from a wide results frame, in the
+    long format the total bills charts plot: year, scenario_id, extra_cols, user_type, total_bill.
+    Works on DataFrames and LazyFrames alike.
+    """
+    return results_df.select(
+        "year", "scenario_id", *extra_cols,
+        pl.lit(converts_nonconverts.upper()).alias("user_type"),
+        pl.col(f"{converts_nonconverts}_total_bill_per_user").alias("total_bill"),
+    )
+
 def plot_total_bills_bar(
     results_df: pl.DataFrame, 
     converts_nonconverts: str ,
@@ -262,37 +450,23 @@ def plot_total_bills_bar(
     Plot total bills faceted by converts/nonconverts using Plotly
     
     Args:
-        results_df: DataFrame with bill data
+        results_df: Wide DataFrame with bill data, or bills already reshaped by total_bill_frame
         scenario_colors: Dictionary mapping scenario_id to colors
         scenario_line_styles: Dictionary mapping scenario_id to line styles
         show_absolute: Whether to show absolute values or deltas (default: False for delta)
     """
     
-    # Reshape data for plotly - create long format with user_type facet
-    converts_data = results_df.select([
-        "year", "scenario_id", "converts_total_bill_per_user"
-    ]).with_columns(
-        pl.lit("CONVERTS").alias("user_type"),
-        pl.col("converts_total_bill_per_user").alias("total_bill")
-    ).drop("converts_total_bill_per_user")
-    
-    nonconverts_data = results_df.select([
-        "year", "scenario_id", "nonconverts_total_bill_per_user"
-    ]).with_columns(
-        pl.lit("NONCONVERTS").alias("user_type"),
-        pl.col("nonconverts_total_bill_per_user").alias("total_bill")
-    ).drop("nonconverts_total_bill_per_user")
-    
-    # Combine data
-    plt_df = converts_data if converts_nonconverts == "converts" else nonconverts_data
+    # Reshape data for plotly, unless it comes reshaped from the chart data plan
+    plt_df = results_df if "total_bill" in results_df.columns else total_bill_frame(results_df, converts_nonconverts)
     
     # Detect magnitude and get appropriate formatting for y-axis
     tick_format, suffix, scale_factor, short_suffix = detect_magnitude_and_format(plt_df["total_bill"])
     
     # Scale the data for display
-    plt_df = plt_df.with_columns(
-        (pl.col("total_bill") / scale_factor).alias("total_bill_scaled")
-    )
+    if "total_bill_scaled" not in plt_df.columns:
+        plt_df = plt_df.with_columns(
+            (pl.col("total_bill") / scale_factor).alias("total_bill_scaled")
+        )
     
     # # Update y-axis label with suffix
     # # y_label_with_suffix = f"${suffix}" if suffix else "$"
@@ -377,43 +551,35 @@ def plot_total_bills_ts(
     show_year: int = None,
     scenario_colors: Dict[str, str] = switchbox_colors,
     scenario_line_styles: Dict[str, str] = line_styles,
-    
+    line_group: str = None,
 ) -> go.Figure:
     """
     Plot total bills faceted by converts/nonconverts using Plotly
     
     Args:
-        delta_bau_df: DataFrame with bill data
+        delta_bau_df: Wide DataFrame with bill data, or bills already reshaped by total_bill_frame
         scenario_colors: Dictionary mapping scenario_id to colors
         scenario_line_styles: Dictionary mapping scenario_id to line styles
         show_absolute: Whether to show absolute values or deltas (default: False for delta)
+        line_group: Optional column distinguishing several lines per scenario; drawn with WebGL
+            or as min/max envelopes when there are many, as in plot_utility_metric
     """
+    line_group_cols = [line_group] if line_group else []
     
-    # Reshape data for plotly - create long format with user_type facet
-    converts_data = delta_bau_df.select([
-        "year", "scenario_id", "converts_total_bill_per_user"
-    ]).with_columns(
-        pl.lit("CONVERTS").alias("user_type"),
-        pl.col("converts_total_bill_per_user").alias("total_bill")
-    ).drop("converts_total_bill_per_user")
-    
-    nonconverts_data = delta_bau_df.select([
-        "year", "scenario_id", "nonconverts_total_bill_per_user"
-    ]).with_columns(
-        pl.lit("NONCONVERTS").alias("user_type"),
-        pl.col("nonconverts_total_bill_per_user").alias("total_bill")
-    ).drop("nonconverts_total_bill_per_user")
-    
-    # Combine data
-    plt_df = converts_data if converts_nonconverts == "converts" else nonconverts_data
+    # Reshape data for plotly, unless it comes reshaped from the chart data plan
+    if "total_bill" in delta_bau_df.columns:
+        plt_df = delta_bau_df
+    else:
+        plt_df = total_bill_frame(delta_bau_df, converts_nonconverts, line_group_cols)
     
     # Detect magnitude and get appropriate formatting for y-axis
     tick_format, suffix, scale_factor, short_suffix = detect_magnitude_and_format(plt_df["total_bill"])
     
     # Scale the data for display
-    plt_df = plt_df.with_columns(
-        (pl.col("total_bill") / scale_factor).alias("total_bill_scaled")
-    )
+    if "total_bill_scaled" not in plt_df.columns:
+        plt_df = plt_df.with_columns(
+            (pl.col("total_bill") / scale_factor).alias("total_bill_scaled")
+        )
     
     if show_absolute:
         y_label = f"{y_label_title} ($)"
@@ -421,6 +587,13 @@ def plot_total_bills_ts(
         # Use delta symbol (Δ) for delta values
         y_label = f"Δ {y_label_title} ($)"
     
+    envelope_df = None
+    n_traces, n_points = line_chart_load(plt_df, ["scenario_id", *line_group_cols])
+    if line_group and over_line_budget(n_traces, n_points):
+        envelope_df = line_envelope(plt_df, "total_bill", ["scenario_id", "user_type"])
+        plt_df, line_group = envelope_df, None
+        n_traces, n_points = line_chart_load(plt_df, ["scenario_id"])
+
     print("Creating plotly figure...")
     # Create figure with facets
     fig = px.line(
@@ -429,6 +602,9 @@ def plot_total_bills_ts(
         y="total_bill",
         color="scenario_id",
         line_dash="scenario_id",
+        line_group=line_group,
+        hover_name=line_group,
+        render_mode=line_render_mode(n_traces, n_points),
         # facet_col="user_type",
         color_discrete_map=scenario_colors,
         line_dash_map=scenario_line_styles,
@@ -467,6 +643,11 @@ def plot_total_bills_ts(
         annotation_text="",
         annotation_position="top"
     )
+    if envelope_df is not None:
+        add_uncertainty_bands(
+            fig, envelope_df.rename({"user_type": "utility_type"}), envelope_df["user_type"].unique().to_list(), 1,
+            scenario_colors, lower="line_min", upper="line_max"
+        )
     # Update legend labels to use scenario_labels
     fig.for_each_trace(lambda t: t.update(name=scenario_labels.get(t.name, t.name)))
     
@@ -491,4 +672,122 @@ def plot_total_bills_ts(
     # Apply theme
     fig = apply_plot_theme(fig)
     
-    return fig
\ No newline at end of file
+    return fig
+
+def plot_tornado(
+    sensitivity_df: pl.DataFrame,
+    metric_label: str,
+    max_inputs: int = 15,
+) -> go.Figure:
+    """
+    Plot a tornado chart of the change in a metric when each input is perturbed
+    
+    Args:
+        sensitivity_df: DataFrame from run_sensitivity, sorted by swing
+        metric_label: Label of the metric the inputs were ranked on
+        max_inputs: Number of most influential inputs to show
+    """
+    plt_df = sensitivity_df.head(max_inputs).reverse()
+    base = plt_df["base"][0] if not plt_df.is_empty() else 0.0
+    labels = plt_df["label"].to_list()
+    
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=typed_array(plt_df["low"] - base),
+        base=base,
+        orientation="h",
+        name="Input decreased",
+        marker_color=switchbox_colors["electric_opex"],
+        customdata=np.column_stack([typed_array(plt_df["low_value"]), typed_array(plt_df["low"])]),
+        hovertemplate="Input value: %{customdata[0]:,.4g}<br>Metric: %{customdata[1]:$,.2f}<br>Change: %{x:+$,.2f}<extra></extra>"
+    ))
+    fig.add_trace(go.Bar(
+        y=labels,
+        x=typed_array(plt_df["high"] - base),
+        base=base,
+        orientation="h",
+        name="Input increased",
+        marker_color=switchbox_colors["taxpayer"],
+        customdata=np.column_stack([typed_array(plt_df["high_value"]), typed_array(plt_df["high"])]),
+        hovertemplate="Input value: %{customdata[0]:,.4g}<br>Metric: %{customdata[1]:$,.2f}<br>Change: %{x:+$,.2f}<extra></extra>"
+    ))
+    fig.add_vline(x=base, line_dash="solid", line_color="darkgray", line_width=1)
+    
+    fig.update_layout(
+        barmode="overlay",
+        xaxis_title=f"Δ {metric_label} ($)",
+        height=max(300, 30 * len(labels) + 120),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5
+        )
+    )
+    fig.update_xaxes(tickformat="$,.0f")
+    
+    fig = apply_plot_theme(fig)
+    
+    return fig
+
+def plot_bill_distribution(
+    dist_df: pl.DataFrame,
+    scenario_colors: Dict[str, str] = switchbox_colors,
+    scenario_line_styles: Dict[str, str] = line_styles,
+    show_year: int = None,
+) -> go.Figure:
+    """
+    Plot the median household bill impact per scenario, with the p10-p90 range across households shaded
+    
+    Args:
+        dist_df: DataFrame from bill_impact_distribution (scenario_id, household, year, p10, p50, p90, ...)
+        scenario_colors: Dictionary mapping scenario_id to colors
+        scenario_line_styles: Dictionary mapping scenario_id to line styles
+        show_year: Optional year to mark with a vertical line
+    """
+    # Facet by household type the way the utility metric charts facet by utility
+    plt_df = dist_df.rename({"household": "utility_type"})
+    tick_format, suffix, scale_factor, short_suffix = detect_magnitude_and_format(
+        pl.concat([plt_df["p10"], plt_df["p90"]])
+    )
+    plt_df = plt_df.with_columns(pl.col("p10", "p50", "p90") / scale_factor)
+    y_label = f"Δ Annual delivery bill (${suffix})"
+
+    fig = px.line(
+        plt_df,
+        x="year",
+        y="p50",
+        color="scenario_id",
+        line_dash="scenario_id",
+        facet_col="utility_type",
+        facet_col_spacing=0.09,
+        color_discrete_map=scenario_colors,
+        line_dash_map=scenario_line_styles,
+        title="",
+        labels={
+            "p50": y_label,
+            "year": "Year",
+            "utility_type": "",
+            "scenario_id": "Scenario"
+        }
+    )
+    fig.for_each_annotation(lambda a: a.update(text=f"<b>{a.text.split('=')[-1].upper()}</b>"))
+    fig.update_yaxes(title=None, col=2)
+    fig.for_each_trace(lambda t: t.update(name=scenario_labels[t.name]))
+    fig.update_layout(
+        legend=dict(
+            orientation="h",
+            yanchor="top",
+            y=1.4,
+            xanchor="center",
+            x=0.5
+        )
+    )
+    add_uncertainty_bands(fig, plt_df, plt_df["utility_type"].unique(maintain_order=True).to_list(), 1, scenario_colors)
+    if show_year is not None:
+        fig.add_vline(x=int(show_year), line_dash="dash", line_color="gray", line_width=2)
+    fig.add_hline(y=0, line_dash="solid", line_color="darkgray", line_width=1)
+    fig.update_yaxes(tickformat=tick_format)
+    return apply_plot_theme(fig)
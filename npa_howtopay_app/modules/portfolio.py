@@ -0,0 +1,138 @@
+"""Portfolio runs: several utility territories (run configurations) run together and aggregated."""
+import hashlib
+
+import npa_howtopay as nhp
+import polars as pl
+
+from modules.model_runner import run_many, values_from_config
+from modules.result_store import ModelResult, downcast_frame
+
+# Keys of the sidebar snapshot that carry over to every territory of a portfolio
+PORTFOLIO_SHARED_KEYS = ("scenarios", "hourly_peaks")
+# How each metric combines across territories. Totals are summed; per-unit and per-household
+# values are averaged, weighted by each territory's initial users (of that utility) or ratebase.
+# Weights are fixed per territory, so the deltas of the aggregate are the aggregate of the deltas.
+PORTFOLIO_AGGREGATION = {
+    "inflation_adjusted_revenue_requirement": "sum",
+    "variable_tariff": "num_users_init",
+    "inflation_adjusted_ratebase": "sum",
+    "return_on_ratebase_pct": "ratebase_init",
+    "nonconverts_bill_per_user": "num_users_init",
+    "converts_bill_per_user": "num_users_init",
+}
+# Combined gas and electric bills are per gas household, so are weighted by gas users
+PORTFOLIO_TOTAL_BILL_WEIGHT = "gas_num_users_init"
+
+
+def territory_values(run_names, configs, base_values):
+    """Parameter snapshot of each territory, with the scenario selection and modes of base_values"""
+    values_by_name = {}
+    for run_name in run_names:
+        values = values_from_config(configs[run_name]["config"])
+        values.update({key: base_values[key] for key in PORTFOLIO_SHARED_KEYS if key in base_values})
+        values_by_name[run_name] = values
+    return values_by_name
+
+
+def run_portfolio(run_names, configs, base_values, on_progress=None):
+    """
+    Run every territory of a portfolio concurrently on the model process pool.
+
+    Args:
+        run_names: Names of the run configurations (territories) to include
+        configs: Run configurations, as from load_all_configs
+        base_values: Sidebar snapshot supplying the scenario selection and modes
+        on_progress: Optional callback called as on_progress(done, total), see run_many
+
+    Returns:
+        Dict of run name -> (values, ModelResult), in run_names order
+    """
+    values_by_name = territory_values(run_names, configs, base_values)
+    results = run_many(list(values_by_name.values()), on_progress=on_progress)
+    return {run_name: (values, result) for (run_name, values), result in zip(values_by_name.items(), results)}
+
+
+def territory_weights(territories) -> pl.DataFrame:
+    """One row per territory with the inputs PORTFOLIO_AGGREGATION weights by"""
+    weight_ids = sorted({
+        f"{utility}_{weight}" for weight in PORTFOLIO_AGGREGATION.values() if weight != "sum" for utility in ("gas", "electric")
+    } | {PORTFOLIO_TOTAL_BILL_WEIGHT})
+    return pl.DataFrame([
+        {"territory": run_name, **{weight_id: float(values[weight_id]) for weight_id in weight_ids}}
+        for run_name, (values, _) in territories.items()
+    ])
+
+
+def stack_territories(territories, frame) -> pl.DataFrame:
+    """
+    One frame of every territory's results, with a territory column.
+
+    Args:
+        territories: From run_portfolio
+        frame: Name of the ModelResult frame to stack ("delta", "absolute", "delta_long" or "absolute_long")
+    """
+    return pl.concat([
+        getattr(result, frame).select(pl.lit(run_name).alias("territory"), pl.all()).with_columns(
+            pl.col(pl.Categorical).cast(pl.String), pl.col("year").cast(pl.Int64)
+        )
+        for run_name, (_, result) in territories.items()
+    ], how="diagonal_relaxed")
+
+
+def _weighted_mean(column, weight):
+    return (pl.col(column) * pl.col(weight)).sum() / pl.col(weight).sum()
+
+
+def aggregate_wide(stacked: pl.DataFrame, weights: pl.DataFrame) -> pl.DataFrame:
+    """
+    Aggregate a stacked wide frame over territories with one group-by per scenario and year.
+
+    Rows keep the order of the first territory's; only years every territory has are kept.
+    """
+    aggregations = []
+    for utility in ("gas", "electric"):
+        for metric, rule in PORTFOLIO_AGGREGATION.items():
+            column = f"{utility}_{metric}"
+            if column not in stacked.columns:
+                continue
+            aggregations.append(
+                (pl.col(column).sum() if rule == "sum" else _weighted_mean(column, f"{utility}_{rule}")).alias(column)
+            )
+    for column in ("converts_total_bill_per_user", "nonconverts_total_bill_per_user"):
+        if column in stacked.columns:
+            aggregations.append(_weighted_mean(column, PORTFOLIO_TOTAL_BILL_WEIGHT).alias(column))
+    n_territories = weights.height
+    return (
+        stacked.join(weights, on="territory")
+        .group_by("scenario_id", "year", maintain_order=True)
+        .agg(*aggregations, pl.len().alias("territories"))
+        .filter(pl.col("territories") == n_territories)
+        .drop("territories")
+    )
+
+
+def portfolio_key(territories) -> str:
+    """Result key of a portfolio; distinct from any single run's, so caches keyed on it never mix them up"""
+    keys = ",".join(f"{run_name}={result.key}" for run_name, (_, result) in sorted(territories.items()))
+    return f"portfolio-{hashlib.sha256(keys.encode()).hexdigest()[:16]}"
+
+
+def aggregate_portfolio(territories) -> ModelResult:
+    """
+    Portfolio-wide ModelResult, so the aggregate can be shown in every existing chart.
+
+    The wide frames are aggregated over territories (aggregate_wide) and the
+    long frames derived from them as for a single run.
+    """
+    weights = territory_weights(territories)
+    delta = aggregate_wide(stack_territories(territories, "delta"), weights)
+    absolute = aggregate_wide(stack_territories(territories, "absolute"), weights)
+    delta_long = nhp.utils.transform_to_long_format(delta)
+    absolute_long = nhp.utils.transform_to_long_format(absolute)
+    return ModelResult(portfolio_key(territories), *(downcast_frame(df) for df in (delta, absolute, delta_long, absolute_long)))
+
+
+def territory_frame(territories, show_absolute, long=True) -> pl.DataFrame:
+    """Every territory's results in one frame with a territory column, for charts with a line per territory"""
+    frame = f"{'absolute' if show_absolute else 'delta'}{'_long' if long else ''}"
+    return stack_territories(territories, frame).with_columns(pl.col("scenario_id").cast(pl.Categorical))
@@ -0,0 +1,93 @@
+"""Streaming quantile estimation with memory independent of the number of observations."""
+import numpy as np
+
+
+class StreamingQuantiles:
+    """
+    Vectorised P² quantile estimator (Jain & Chlamtac, 1985).
+
+    Tracks several quantiles for every cell of an array of observations at once.
+    Each observation updates five markers per quantile and cell, so memory stays
+    at 2 x 5 floats per quantile per cell no matter how many observations are added.
+
+    Example:
+        >>> est = StreamingQuantiles([0.1, 0.5, 0.9])
+        >>> for sample in samples:  # each sample is an array of shape (cells,)
+        ...     est.update(sample)
+        >>> p10, p50, p90 = est.result()
+    """
+
+    def __init__(self, probs):
+        self.probs = np.asarray(probs, dtype=np.float64)
+        self.count = 0
+        self._buffer = []
+        self._q = None
+        self._n = None
+        p = self.probs[:, None]
+        # Desired marker positions and their increments per observation, shape (quantiles, 5)
+        self._desired = np.hstack([np.ones_like(p), 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5 * np.ones_like(p)])
+        self._increments = np.hstack([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)])
+
+    def update(self, x):
+        """Add one observation per cell (an array of any fixed shape)."""
+        x = np.asarray(x, dtype=np.float64)
+        self.count += 1
+
+        # The first five observations initialise the markers
+        if self._q is None:
+            self._buffer.append(x)
+            if len(self._buffer) == 5:
+                init = np.sort(np.stack(self._buffer, axis=-1), axis=-1)
+                self._q = np.broadcast_to(init, (len(self.probs),) + init.shape).copy()
+                self._n = np.broadcast_to(np.arange(1.0, 6.0), self._q.shape).copy()
+                self._buffer = []
+            return
+
+        q, n = self._q, self._n
+        x = np.broadcast_to(x, q.shape[:-1])
+        broadcast_shape = (len(self.probs),) + (1,) * (q.ndim - 2) + (5,)
+
+        # Markers above the cell containing x move up one position; extremes track min/max
+        n[..., 1:4] += x[..., None] < q[..., 1:4]
+        n[..., 4] += 1
+        q[..., 0] = np.minimum(q[..., 0], x)
+        q[..., 4] = np.maximum(q[..., 4], x)
+        self._desired += self._increments
+        desired = self._desired.reshape(broadcast_shape)
+
+        # Adjust the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = desired[..., i] - n[..., i]
+            up = (d >= 1) & (n[..., i + 1] - n[..., i] > 1)
+            down = (d <= -1) & (n[..., i - 1] - n[..., i] < -1)
+            move = up | down
+            if not move.any():
+                continue
+            s = np.where(up, 1.0, -1.0)
+            qi, q_lo, q_hi = q[..., i], q[..., i - 1], q[..., i + 1]
+            ni, n_lo, n_hi = n[..., i], n[..., i - 1], n[..., i + 1]
+
+            parabolic = qi + s / (n_hi - n_lo) * (
+                (ni - n_lo + s) * (q_hi - qi) / (n_hi - ni)
+                + (n_hi - ni - s) * (qi - q_lo) / (ni - n_lo)
+            )
+            q_adj = np.where(up, q_hi, q_lo)
+            n_adj = np.where(up, n_hi, n_lo)
+            linear = qi + s * (q_adj - qi) / (n_adj - ni)
+
+            new_q = np.where((q_lo < parabolic) & (parabolic < q_hi), parabolic, linear)
+            q[..., i] = np.where(move, new_q, qi)
+            n[..., i] = np.where(move, ni + s, ni)
+
+    def result(self):
+        """
+        Return the current quantile estimates.
+
+        Returns:
+            Array of shape (len(probs), *cell_shape)
+        """
+        if self._q is None:
+            if not self._buffer:
+                raise ValueError("No observations have been added")
+            return np.quantile(np.stack(self._buffer), self.probs, axis=0)
+        return self._q[..., 2].copy()
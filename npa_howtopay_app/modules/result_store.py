@@ -0,0 +1,162 @@
+"""Compact, shareable representation of model results plus memory reporting."""
+import os
+import sys
+
+import npa_howtopay as nhp
+import polars as pl
+from npa_howtopay.params import COMPARE_COLS
+
+FLOAT32_MAX = 3.4e38
+# Largest error a float32 round trip may add, in the column's units (half a cent for $ columns).
+# float32 keeps about 7 significant digits, so columns of $ totals in the millions stay float64.
+FLOAT32_ABS_TOL = 0.005
+CATEGORICAL_COLS = ("scenario_id", "utility_type")
+
+# Result key held by each live session, so memory can be reported per session
+SESSION_RESULTS = {}
+
+
+def _float32_safe(series: pl.Series) -> bool:
+    """True if a float column survives a round trip through float32 within FLOAT32_ABS_TOL"""
+    values = series.drop_nulls().drop_nans()
+    if values.is_empty():
+        return True
+    if values.abs().max() >= FLOAT32_MAX:
+        return False
+    round_trip = values.cast(pl.Float32).cast(pl.Float64)
+    return (round_trip - values).abs().max() <= FLOAT32_ABS_TOL
+
+
+def downcast_frame(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Shrink a results frame: float64 -> float32 where that changes no value by more than FLOAT32_ABS_TOL,
+    scenario_id/utility_type -> categorical, year -> int16.
+    """
+    casts = []
+    for name, dtype in df.schema.items():
+        if name in CATEGORICAL_COLS and dtype == pl.String:
+            casts.append(pl.col(name).cast(pl.Categorical))
+        elif name == "year":
+            casts.append(pl.col(name).cast(pl.Int16))
+        elif dtype == pl.Float64 and _float32_safe(df[name]):
+            casts.append(pl.col(name).cast(pl.Float32))
+    return df.with_columns(casts) if casts else df
+
+
+class ModelResult:
+    """
+    Model output for one parameter set, reduced to the frames the app uses.
+
+    Instances are immutable and cached process-wide by parameter hash, so every
+    session on the same parameters shares a single copy of the wide and long frames.
+    """
+
+    def __init__(self, key, delta, absolute, delta_long, absolute_long):
+        self.key = key
+        self.delta = delta
+        self.absolute = absolute
+        self.delta_long = delta_long
+        self.absolute_long = absolute_long
+
+    def wide(self, show_absolute: bool) -> pl.DataFrame:
+        """Wide frame (one row per scenario and year) of absolute values or deltas from BAU"""
+        return self.absolute if show_absolute else self.delta
+
+    def long(self, show_absolute: bool) -> pl.DataFrame:
+        """Long frame (one row per scenario, utility and year) of absolute values or deltas from BAU"""
+        return self.absolute_long if show_absolute else self.delta_long
+
+    def up_to_year(self, key, end_year) -> "ModelResult":
+        """New ModelResult (stored under key) keeping only the years up to and including end_year"""
+        frames = (self.delta, self.absolute, self.delta_long, self.absolute_long)
+        return ModelResult(key, *(df.filter(pl.col("year") <= end_year) for df in frames))
+
+    def append(self, key, other) -> "ModelResult":
+        """New ModelResult (stored under key) with other's non-BAU scenarios added after these"""
+        frames = (self.delta, self.absolute, self.delta_long, self.absolute_long)
+        other_frames = (other.delta, other.absolute, other.delta_long, other.absolute_long)
+        return ModelResult(key, *(
+            # Downcasting can pick different float widths for the two halves
+            pl.concat([df, other_df.filter(pl.col("scenario_id") != "bau")], how="vertical_relaxed")
+            for df, other_df in zip(frames, other_frames)
+        ))
+
+    def estimated_size(self) -> int:
+        """Approximate bytes held by the result's frames"""
+        return sum(df.estimated_size() for df in (self.delta, self.absolute, self.delta_long, self.absolute_long))
+
+
+def build_result(key, results_all) -> ModelResult:
+    """
+    Reduce the model's results_all dict to a ModelResult.
+
+    Only COMPARE_COLS are kept. The long frames are derived from the full
+    precision wide frames before every frame is downcast.
+    """
+    delta = nhp.model.create_delta_df(results_all, COMPARE_COLS)
+    absolute = nhp.model.return_absolute_values_df(results_all, COMPARE_COLS)
+    delta_long = nhp.utils.transform_to_long_format(delta)
+    absolute_long = nhp.utils.transform_to_long_format(absolute)
+    return ModelResult(key, *(downcast_frame(df) for df in (delta, absolute, delta_long, absolute_long)))
+
+
+def process_rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where current isn't available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def session_footprints(result_cache) -> list:
+    """
+    Memory attributable to each live session, largest first.
+
+    A session holds one ModelResult, which every session on the same parameters
+    shares, so each session is charged its result's size divided by the number
+    of sessions sharing it. Results evicted from the cache count as 0 MB.
+    """
+    sizes = {result.key: result.estimated_size() for result in result_cache.values()}
+    sharers = {}
+    for key in SESSION_RESULTS.values():
+        sharers[key] = sharers.get(key, 0) + 1
+    footprints = [
+        {
+            "result_key": key,
+            "result_mb": round(sizes.get(key, 0) / 1e6, 3),
+            "sessions_sharing": sharers[key],
+            "attributed_mb": round(sizes.get(key, 0) / sharers[key] / 1e6, 3),
+        }
+        for key in SESSION_RESULTS.values()
+    ]
+    return sorted(footprints, key=lambda footprint: footprint["attributed_mb"], reverse=True)
+
+
+def memory_report(result_cache, figure_cache=None) -> dict:
+    """
+    Summarise memory use of this worker process.
+
+    Process RSS can't be split by session (the caches are shared), so the
+    per-session figures come from session_footprints instead.
+
+    Args:
+        result_cache: The process-wide ResultCache of ModelResults
+        figure_cache: Optional process-wide FigureCache, whose size and hit rate are added
+    """
+    report = {
+        "process_rss_mb": round(process_rss_bytes() / 1e6, 1),
+        "sessions": len(SESSION_RESULTS),
+        "distinct_session_results": len(set(SESSION_RESULTS.values())),
+        "cached_results": len(result_cache),
+        "result_cache_mb": round(sum(result.estimated_size() for result in result_cache.values()) / 1e6, 2),
+        "per_session": session_footprints(result_cache),
+    }
+    if result_cache.disk is not None:
+        report["disk_cache"] = result_cache.disk.stats()
+    if figure_cache is not None:
+        report["figure_cache"] = figure_cache.stats()
+    return report
@@ -0,0 +1,97 @@
+"""One-at-a-time sensitivity (tornado) analysis over the numeric model inputs."""
+import polars as pl
+
+from modules.input_mappings import ALL_INPUT_MAPPINGS
+from modules.model_runner import MODEL_INPUT_IDS, run_many, selected_scenarios
+
+# Year inputs define the analysis window rather than a quantity, so perturbing them by % is meaningless
+SENSITIVITY_EXCLUDED_INPUTS = ("start_year", "end_year")
+
+SENSITIVITY_INPUT_IDS = [input_id for input_id in MODEL_INPUT_IDS if input_id not in SENSITIVITY_EXCLUDED_INPUTS]
+
+# Metrics from the delta dataframe that sensitivity can be ranked on
+SENSITIVITY_METRICS = {
+    "nonconverts_total_bill_per_user": "Nonconverts combined annual delivery bill",
+    "converts_total_bill_per_user": "Converts combined annual delivery bill",
+}
+
+
+def perturb_value(value, input_id, pct):
+    """
+    Scale an input value (in UI units) by pct percent, respecting the input's type and min/max.
+
+    Args:
+        value: Current UI value of the input
+        input_id: The input ID from input_mappings
+        pct: Signed percentage change, e.g. -10 or 10
+    """
+    input_data = ALL_INPUT_MAPPINGS[input_id]
+    new_value = float(value) * (1 + pct / 100)
+    if input_data.get("min") is not None:
+        new_value = max(new_value, input_data["min"])
+    if input_data.get("max") is not None:
+        new_value = min(new_value, input_data["max"])
+    if input_data.get("type") == int:
+        new_value = int(round(new_value))
+    return new_value
+
+
+def metric_value(result, metric, scenario_id, year):
+    """Read a single delta-from-BAU metric value from a ModelResult, or None if the scenario or year wasn't run"""
+    rows = result.delta.filter((pl.col("scenario_id") == scenario_id) & (pl.col("year") == year))[metric]
+    return float(rows.item()) if len(rows) == 1 else None
+
+
+def run_sensitivity(values, metric, scenario_id, year, pct=10, on_progress=None):
+    """
+    Perturb each numeric input by ±pct around the current run and rank inputs by impact.
+
+    All perturbed runs are evaluated in parallel on the model pool; runs that
+    are identical to the base run or to another perturbation (e.g. zero-valued
+    inputs, or small integers that round back to the same value) are served
+    from the result cache instead of being recomputed, and scenarios a
+    perturbed input doesn't reach come from the base run's (see run_many).
+
+    Args:
+        values: Base parameter snapshot
+        metric: Column from SENSITIVITY_METRICS
+        scenario_id: Scenario to read the metric from
+        year: Year to read the metric in
+        pct: Size of the perturbation in percent
+        on_progress: Optional callback called as on_progress(done, total), see run_many
+
+    Returns:
+        DataFrame with one row per input, sorted by swing (largest first); empty
+        if the scenario or year isn't in the run
+    """
+    if scenario_id not in selected_scenarios(values):
+        return pl.DataFrame()
+    runs = [values]
+    for input_id in SENSITIVITY_INPUT_IDS:
+        for sign in (-1, 1):
+            runs.append({**values, input_id: perturb_value(values[input_id], input_id, sign * pct)})
+
+    metrics = [metric_value(result, metric, scenario_id, year) for result in run_many(runs, on_progress=on_progress)]
+    base = metrics[0]
+    if base is None:
+        return pl.DataFrame()
+
+    rows = []
+    for i, input_id in enumerate(SENSITIVITY_INPUT_IDS):
+        low, high = metrics[1 + 2 * i], metrics[2 + 2 * i]
+        if low is None or high is None:
+            continue
+        rows.append({
+            "input_id": input_id,
+            "label": ALL_INPUT_MAPPINGS[input_id]["label"],
+            "base_value": float(values[input_id]),
+            "low_value": float(runs[1 + 2 * i][input_id]),
+            "high_value": float(runs[2 + 2 * i][input_id]),
+            "base": base,
+            "low": low,
+            "high": high,
+            "swing": abs(high - low),
+        })
+    if not rows:
+        return pl.DataFrame()
+    return pl.DataFrame(rows).sort("swing", descending=True)
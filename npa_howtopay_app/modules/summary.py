@@ -0,0 +1,162 @@
+"""Summary figures of a model run (cumulative, NPV and peak deltas from BAU), for any number of runs at once."""
+import numpy as np
+import polars as pl
+
+from modules.input_mappings import coerce_input_value
+from modules.model_runner import RESULT_CACHE_SIZE, ResultCache
+from modules.plotting import scenario_labels
+
+# Statistics reported for each metric of the long-format frames. Cumulative and NPV
+# totals only make sense for flows ($ per year), not for tariffs, stocks or shares.
+SUMMARY_METRICS = {
+    "inflation_adjusted_revenue_requirement": ("cumulative", "npv", "peak"),
+    "nonconverts_bill_per_user": ("cumulative", "npv", "peak"),
+    "converts_bill_per_user": ("cumulative", "npv", "peak"),
+    "variable_tariff": ("peak",),
+    "inflation_adjusted_ratebase": ("peak",),
+    "return_on_ratebase_pct": ("peak",),
+}
+SUMMARY_METRIC_LABELS = {
+    "inflation_adjusted_revenue_requirement": "Revenue requirement",
+    "nonconverts_bill_per_user": "Nonconverts bill per household",
+    "converts_bill_per_user": "Converts bill per household",
+    "variable_tariff": "Volumetric tariff",
+    "inflation_adjusted_ratebase": "Ratebase",
+    "return_on_ratebase_pct": "Return component",
+}
+SUMMARY_GROUP_COLS = ("scenario_id", "utility_type")
+
+# result key -> summary table of that result's deltas
+SUMMARY_CACHE = ResultCache(maxsize=RESULT_CACHE_SIZE)
+
+
+def _stat_exprs(metric, stat):
+    """Aggregations of one statistic of one metric over a group's years"""
+    value = pl.col(metric).cast(pl.Float64)
+    if stat == "cumulative":
+        return [value.sum().alias(f"{metric}_cumulative")]
+    if stat == "npv":
+        return [(value * pl.col("discount")).sum().alias(f"{metric}_npv")]
+    peak = value.abs().arg_max()
+    return [value.get(peak).alias(f"{metric}_peak_delta"), pl.col("year").get(peak).cast(pl.Int32).alias(f"{metric}_peak_year")]
+
+
+def summary_table(long_df: pl.DataFrame, npv_discount_rate, start_year, by=()) -> pl.DataFrame:
+    """
+    Cumulative total, NPV and peak of every metric, for every scenario and utility, in one group-by.
+
+    Every statistic of every metric is an aggregation of the same group-by, so
+    the work is a single vectorised pass however many runs the frame holds:
+    stack runs with a column telling them apart (a sweep's run id, a
+    portfolio's territory) and pass that column in by. BAU rows are left out.
+
+    Args:
+        long_df: Long-format delta frame (year, scenario_id, utility_type and metric columns)
+        npv_discount_rate: Discount rate as a fraction, or an expression (e.g. pl.col("npv_discount_rate"))
+            for runs with different rates
+        start_year: Year NPVs are discounted to, or an expression
+        by: Extra columns identifying runs in a stacked frame
+
+    Returns:
+        DataFrame with the by columns, scenario_id, utility_type, metric, and cumulative,
+        npv, peak_delta, peak_year (null where the statistic doesn't apply to the metric)
+    """
+    rate = npv_discount_rate if isinstance(npv_discount_rate, pl.Expr) else pl.lit(float(npv_discount_rate))
+    base_year = start_year if isinstance(start_year, pl.Expr) else pl.lit(int(start_year))
+    group_cols = [*by, *SUMMARY_GROUP_COLS]
+    metrics = {metric: stats for metric, stats in SUMMARY_METRICS.items() if metric in long_df.columns}
+    stats = (
+        long_df.lazy()
+        .filter(pl.col("scenario_id").cast(pl.String) != "bau")
+        .with_columns(((1 + rate) ** -(pl.col("year").cast(pl.Int32) - base_year)).alias("discount"))
+        .group_by(*group_cols, maintain_order=True)
+        .agg(*[expr for metric, metric_stats in metrics.items() for stat in metric_stats for expr in _stat_exprs(metric, stat)])
+        .collect()
+        .with_row_index("group")
+    )
+
+    # One row per group and metric, in group order; statistics that don't apply to a metric are null
+    def stat_column(metric, column, dtype):
+        name = f"{metric}_{column}"
+        return (pl.col(name) if name in stats.columns else pl.lit(None, dtype=dtype)).alias(column)
+
+    return pl.concat([
+        stats.select(
+            "group", *group_cols, pl.lit(metric).alias("metric"),
+            stat_column(metric, "cumulative", pl.Float64), stat_column(metric, "npv", pl.Float64),
+            stat_column(metric, "peak_delta", pl.Float64), stat_column(metric, "peak_year", pl.Int32),
+        )
+        for metric in metrics
+    ]).sort("group", maintain_order=True).drop("group")
+
+
+def get_summary(result, values) -> pl.DataFrame:
+    """summary_table of a result's deltas at its run's discount rate, computed once per result and cached"""
+    summary = SUMMARY_CACHE.get(result.key)
+    if summary is None:
+        summary = SUMMARY_CACHE.put(result.key, summary_table(
+            result.delta_long,
+            coerce_input_value(values["npv_discount_rate"], "npv_discount_rate"),
+            coerce_input_value(values["start_year"], "start_year"),
+        ))
+    return summary
+
+
+def stacked_summary(runs, by="run") -> pl.DataFrame:
+    """
+    summary_table of many runs at once, each at its own discount rate and start year.
+
+    The runs' deltas are stacked into one frame with an id column (and their
+    rates as columns), so a sweep or portfolio of thousands of runs is still
+    a single group-by.
+
+    Args:
+        runs: Iterable of (id, values, ModelResult)
+        by: Name of the id column
+
+    Returns:
+        summary_table with the id column first
+    """
+    runs = list(runs)
+    # As strings, since categoricals of separate runs may not concatenate
+    frames = [result.delta_long.with_columns(pl.col(pl.Categorical).cast(pl.String)) for _, _, result in runs]
+    lengths = [df.height for df in frames]
+    # Run columns are repeated over each run's rows in one go, rather than added to each run's frame
+    stacked = pl.concat(frames, how="vertical_relaxed").with_columns(
+        pl.Series(by, np.repeat([run_id for run_id, _, _ in runs], lengths)),
+        pl.Series("npv_discount_rate", np.repeat(
+            [float(coerce_input_value(values["npv_discount_rate"], "npv_discount_rate")) for _, values, _ in runs], lengths
+        )),
+        pl.Series("start_year", np.repeat(
+            [int(coerce_input_value(values["start_year"], "start_year")) for _, values, _ in runs], lengths
+        )),
+    )
+    return summary_table(stacked, pl.col("npv_discount_rate"), pl.col("start_year"), by=(by,))
+
+
+def portfolio_summary(territories, key) -> pl.DataFrame:
+    """stacked_summary of every territory of a portfolio, cached under the portfolio's key"""
+    summary = SUMMARY_CACHE.get(f"{key}-territories")
+    if summary is None:
+        summary = SUMMARY_CACHE.put(f"{key}-territories", stacked_summary(
+            ((run_name, values, result) for run_name, (values, result) in territories.items()), by="territory"
+        ))
+    return summary
+
+
+def display_summary(summary: pl.DataFrame) -> pl.DataFrame:
+    """A summary table with readable labels and rounded values, for showing in the app"""
+    is_pct = pl.col("metric") == "return_on_ratebase_pct"
+    # Return components are fractions of the revenue requirement; show them in percentage points
+    scale = pl.when(is_pct).then(100.0).otherwise(1.0)
+    return summary.select(
+        *[pl.col(column).alias(column.title()) for column in summary.columns if column not in (*SUMMARY_GROUP_COLS, "metric", "cumulative", "npv", "peak_delta", "peak_year")],
+        pl.col("scenario_id").cast(pl.String).replace_strict(scenario_labels, default=pl.col("scenario_id").cast(pl.String)).alias("Scenario"),
+        pl.col("utility_type").cast(pl.String).str.to_titlecase().alias("Utility"),
+        (pl.col("metric").replace_strict(SUMMARY_METRIC_LABELS, default=pl.col("metric"))
+         + pl.when(is_pct).then(pl.lit(" (pct points)")).otherwise(pl.lit(""))).alias("Metric"),
+        pl.col("cumulative").round(2).alias("Cumulative Δ"),
+        pl.col("npv").round(2).alias("NPV of Δ"),
+        (pl.col("peak_delta") * scale).round(4).alias("Peak Δ"),
+        pl.col("peak_year").alias("Peak year"),
+    )
@@ -0,0 +1,233 @@
+"""First-order surrogate of the model, for instant approximate previews while exact runs compute."""
+import asyncio
+import os
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+import polars as pl
+
+from modules.input_mappings import ALL_INPUT_MAPPINGS
+from modules.model_runner import params_hash, run_many, selected_scenarios
+from modules.result_store import ModelResult
+from modules.sensitivity import SENSITIVITY_INPUT_IDS, perturb_value
+
+# Each fit costs 1 + 2 x len(SURROGATE_DIMS) model runs on the shared pool; NPA_SURROGATE=0 turns
+# previews off for the whole server (e.g. on small hosts), and each session can turn them off too
+SURROGATE_ENABLED = os.environ.get("NPA_SURROGATE", "1") != "0"
+SURROGATE_CACHE_SIZE = int(os.environ.get("NPA_SURROGATE_CACHE_SIZE", 8))
+# Same step as the sensitivity analysis default, so its perturbed runs come from the result cache
+SURROGATE_STEP_PCT = 10
+# The NPA year range is fitted per bound, in whole years
+YEAR_RANGE_DIMS = ("npa_year_start", "npa_year_end")
+SURROGATE_DIMS = SENSITIVITY_INPUT_IDS + list(YEAR_RANGE_DIMS)
+FRAME_NAMES = ("delta", "absolute", "delta_long", "absolute_long")
+
+SURROGATES = OrderedDict()
+_SURROGATES_LOCK = threading.Lock()
+# Error of recent previews against the exact runs that replaced them
+PREVIEW_ERRORS = deque(maxlen=200)
+
+
+def coordinates(values):
+    """Position of a parameter snapshot along SURROGATE_DIMS, or None if an input is blank"""
+    point = []
+    for dim in SURROGATE_DIMS:
+        if dim in YEAR_RANGE_DIMS:
+            value = values["npa_year_range"][YEAR_RANGE_DIMS.index(dim)]
+        else:
+            value = values.get(dim)
+        if value is None:
+            return None
+        point.append(float(value))
+    return np.array(point)
+
+
+def _clip(value, input_id):
+    input_data = ALL_INPUT_MAPPINGS[input_id]
+    if input_data.get("min") is not None:
+        value = max(value, input_data["min"])
+    if input_data.get("max") is not None:
+        value = min(value, input_data["max"])
+    return value
+
+
+def neighbours(values, dim, pct=SURROGATE_STEP_PCT):
+    """
+    Snapshots one step below and above values along one dimension.
+
+    Inputs move by ±pct, or by ±1 where that rounds back to the same value
+    (zero-valued inputs, small integers). The NPA year bounds move by one year
+    within the analysis period. A side that can't move (at a min/max) stays at
+    the base value, giving a one-sided difference.
+    """
+    if dim in YEAR_RANGE_DIMS:
+        npa_year_start, npa_year_end = values["npa_year_range"]
+        if dim == "npa_year_start":
+            low = (max(npa_year_start - 1, values["start_year"]), npa_year_end)
+            high = (min(npa_year_start + 1, npa_year_end), npa_year_end)
+        else:
+            low = (npa_year_start, max(npa_year_end - 1, npa_year_start))
+            high = (npa_year_start, min(npa_year_end + 1, values["end_year"]))
+        return {**values, "npa_year_range": low}, {**values, "npa_year_range": high}
+
+    base = values[dim]
+    low, high = perturb_value(base, dim, -pct), perturb_value(base, dim, pct)
+    if low == base and high == base:
+        low, high = _clip(base - 1, dim), _clip(base + 1, dim)
+    return {**values, dim: low}, {**values, dim: high}
+
+
+def preview_key(values) -> str:
+    """Key of a predicted result; distinct from the exact result's, so caches keyed on it never mix them up"""
+    return f"preview-{params_hash(values)}"
+
+
+def _numeric_columns(df: pl.DataFrame):
+    return [name for name, dtype in df.schema.items() if dtype.is_float()]
+
+
+class Surrogate:
+    """
+    Linear (first-order Taylor) approximation of the model around an anchor run.
+
+    Each frame of a prediction is the anchor's frame plus, for every input, the
+    change in that input times a finite-difference slope measured from two
+    runs either side of the anchor. Inputs that change which rows a result has
+    (analysis years, scenario selection) aren't modelled: predict returns None
+    when they differ from the anchor.
+    """
+
+    def __init__(self, values, anchor: ModelResult, slopes, spans):
+        self.values = values
+        self.anchor = anchor
+        self.origin = coordinates(values)
+        # frame name -> array of shape (len(SURROGATE_DIMS), rows, numeric columns)
+        self.slopes = slopes
+        # Distance between the two runs each slope was measured from, per dimension
+        self.spans = spans
+
+    def near(self, values) -> bool:
+        """True if values are covered and within the runs the slopes were measured from, so a refit isn't needed"""
+        if not self.covers(values):
+            return False
+        return bool(np.all(np.abs(coordinates(values) - self.origin) <= self.spans))
+
+    def covers(self, values) -> bool:
+        """True if values only differ from the anchor in inputs the surrogate models"""
+        return (
+            values["start_year"] == self.values["start_year"]
+            and values["end_year"] == self.values["end_year"]
+            and selected_scenarios(values) == selected_scenarios(self.values)
+            and bool(values.get("hourly_peaks")) == bool(self.values.get("hourly_peaks"))
+            and coordinates(values) is not None
+        )
+
+    def predict(self, values):
+        """Approximate ModelResult for values, or None if it's outside what the surrogate covers"""
+        if not self.covers(values):
+            return None
+        step = coordinates(values) - self.origin
+        frames = []
+        for name in FRAME_NAMES:
+            base = getattr(self.anchor, name)
+            columns = _numeric_columns(base)
+            predicted = base.select(columns).to_numpy().astype(np.float64)
+            predicted += np.tensordot(step, self.slopes[name], axes=1)
+            frames.append(base.with_columns(
+                pl.Series(column, predicted[:, j]).cast(base.schema[column]) for j, column in enumerate(columns)
+            ))
+        return ModelResult(preview_key(values), *frames)
+
+
+def build_surrogate(values, pct=SURROGATE_STEP_PCT) -> Surrogate:
+    """
+    Fit a Surrogate around values from 2 runs per dimension, evaluated in parallel on the model pool.
+
+    Args:
+        values: Anchor parameter snapshot
+        pct: Step size for the finite differences, in percent
+    """
+    steps = [neighbours(values, dim, pct) for dim in SURROGATE_DIMS]
+    runs = [values] + [run for pair in steps for run in pair]
+    results = run_many(runs)
+    anchor = results[0]
+
+    spans = np.array([coordinates(high)[i] - coordinates(low)[i] for i, (low, high) in enumerate(steps)])
+    slopes = {}
+    for name in FRAME_NAMES:
+        columns = _numeric_columns(getattr(anchor, name))
+        slope = np.zeros((len(SURROGATE_DIMS), *getattr(anchor, name).select(columns).shape), dtype=np.float32)
+        for i, distance in enumerate(spans):
+            low_frame = getattr(results[1 + 2 * i], name).select(columns)
+            high_frame = getattr(results[2 + 2 * i], name).select(columns)
+            if distance == 0 or low_frame.shape != slope.shape[1:] or high_frame.shape != slope.shape[1:]:
+                continue
+            slope[i] = (high_frame.to_numpy().astype(np.float64) - low_frame.to_numpy()) / distance
+        slopes[name] = slope
+    return Surrogate(values, anchor, slopes, spans)
+
+
+def get_surrogate(values) -> Surrogate:
+    """Surrogate anchored at values, built on first use and kept in a small LRU cache"""
+    key = params_hash(values)
+    with _SURROGATES_LOCK:
+        if key in SURROGATES:
+            SURROGATES.move_to_end(key)
+            return SURROGATES[key]
+    surrogate = build_surrogate(values)
+    with _SURROGATES_LOCK:
+        SURROGATES[key] = surrogate
+        while len(SURROGATES) > SURROGATE_CACHE_SIZE:
+            SURROGATES.popitem(last=False)
+    return surrogate
+
+
+async def get_surrogate_async(values) -> Surrogate:
+    """get_surrogate in a worker thread; the runs it needs go to the model pool"""
+    return await asyncio.to_thread(get_surrogate, values)
+
+
+def preview_error(preview: ModelResult, exact: ModelResult):
+    """
+    Error of a preview against the exact result for the same inputs.
+
+    For each metric column of the wide frames, the largest absolute error is
+    taken relative to the largest absolute exact value in that column.
+
+    Returns:
+        Dict with the largest and mean of those relative errors (in percent),
+        or None if the frames don't line up
+    """
+    errors = []
+    for name in ("delta", "absolute"):
+        predicted, actual = getattr(preview, name), getattr(exact, name)
+        if predicted.shape != actual.shape:
+            return None
+        for column in _numeric_columns(actual):
+            scale = actual[column].abs().max()
+            if scale:
+                errors.append((predicted[column].cast(pl.Float64) - actual[column]).abs().max() / scale)
+    if not errors:
+        return None
+    return {"max_pct": 100 * max(errors), "mean_pct": 100 * sum(errors) / len(errors)}
+
+
+def record_preview_error(preview: ModelResult, exact: ModelResult):
+    """Measure a preview against its exact result and add it to PREVIEW_ERRORS"""
+    error = preview_error(preview, exact)
+    if error is not None:
+        PREVIEW_ERRORS.append(error)
+    return error
+
+
+def error_summary():
+    """Summary of PREVIEW_ERRORS: how many previews were checked and the median/90th percentile of their max error"""
+    if not PREVIEW_ERRORS:
+        return None
+    max_errors = np.array([error["max_pct"] for error in PREVIEW_ERRORS])
+    return {
+        "previews_checked": len(max_errors),
+        "median_max_pct": round(float(np.median(max_errors)), 2),
+        "p90_max_pct": round(float(np.percentile(max_errors, 90)), 2),
+    }
@@ -2,101 +2,189 @@ import functools
 import time
 
 from shiny import reactive
+from shiny.session import get_current_session
 
 
-def debounce(delay_secs):
-    def wrapper(f):
-        when = reactive.Value(None)
-        trigger = reactive.Value(0)
-
-        @reactive.Calc
-        def cached():
-            """
-            Just in case f isn't a reactive calc already, wrap it in one. This ensures
-            that f() won't execute any more than it needs to.
-            """
-            return f()
-
-        @reactive.Effect(priority=102)
-        def primer():
-            """
-            Whenever cached() is invalidated, set a new deadline for when to let
-            downstream know--unless cached() invalidates again
-            """
-            try:
-                cached()
-            except Exception:
-                ...
-            finally:
-                when.set(time.time() + delay_secs)
+class TimerScheduler:
+    """
+    One timer shared by every rate-limited calc in a session.
+
+    Rate-limited calcs register a deadline and a callback under a key. A single
+    effect sleeps (via invalidate_later) until the earliest deadline, runs every
+    callback that is due, and goes back to sleep until the next one. Deadlines
+    are on the monotonic clock, so wall-clock adjustments can't fire or stall
+    them.
+    """
+
+    def __init__(self):
+        # key -> (deadline, callback)
+        self._pending = {}
+        self._wakeup = reactive.Value(0)
 
         @reactive.Effect(priority=101)
-        def timer():
-            """
-            Watches changes to the deadline and triggers downstream if it's expired; if
-            not, use invalidate_later to wait the necessary time and then try again.
-            """
-            deadline = when()
-            if deadline is None:
-                return
-            time_left = deadline - time.time()
-            if time_left <= 0:
-                # The timer expired
-                with reactive.isolate():
-                    when.set(None)
-                trigger.set(trigger() + 1)
-            else:
-                reactive.invalidate_later(time_left)
-
-        @reactive.Calc
-        @reactive.event(trigger, ignore_none=False)
-        @functools.wraps(f)
-        def debounced():
-            return cached()
-
-        return debounced
+        def _timer():
+            self._wakeup()
+            now = time.monotonic()
+            due = [key for key, (deadline, _) in self._pending.items() if deadline <= now]
+            with reactive.isolate():
+                for key in due:
+                    _, callback = self._pending.pop(key)
+                    callback()
+            if self._pending:
+                reactive.invalidate_later(self.next_deadline() - now)
+
+        self._timer = _timer
+
+    def next_deadline(self):
+        """Earliest pending deadline, or None if nothing is scheduled"""
+        return min((deadline for deadline, _ in self._pending.values()), default=None)
+
+    def deadline(self, key):
+        """Pending deadline for key, or None"""
+        entry = self._pending.get(key)
+        return entry[0] if entry else None
+
+    def schedule(self, key, deadline, callback):
+        """
+        Run callback (isolated) once the monotonic clock reaches deadline,
+        replacing anything already scheduled under key.
+        """
+        earliest = self.next_deadline()
+        self._pending[key] = (deadline, callback)
+        # A later deadline is picked up when the timer wakes for the earlier one
+        if earliest is None or deadline < earliest:
+            with reactive.isolate():
+                self._wakeup.set(self._wakeup() + 1)
+
+    def cancel(self, key):
+        self._pending.pop(key, None)
+
+    def __len__(self):
+        return len(self._pending)
+
+
+# Session id -> scheduler; None for calcs created outside a session
+_SCHEDULERS = {}
+
+
+def get_scheduler():
+    """Return the current session's TimerScheduler, creating it on first use"""
+    session = get_current_session()
+    session_id = session.id if session is not None else None
+    if session_id not in _SCHEDULERS:
+        _SCHEDULERS[session_id] = TimerScheduler()
+        if session is not None:
+            session.on_ended(lambda: _SCHEDULERS.pop(session_id, None))
+    return _SCHEDULERS[session_id]
+
+
+def _rate_limited(f, on_invalidate, when=None):
+    """
+    Shared plumbing for the decorators below: a cached copy of f, a primer that
+    calls on_invalidate(fire) whenever it is invalidated, and the downstream calc
+    that only updates when fire() is called.
+
+    If when is given, the primer only tracks f while when() is true; otherwise it
+    depends on when() alone, so edits to f's inputs don't schedule anything.
+    """
+    trigger = reactive.Value(0)
+
+    def fire():
+        trigger.set(trigger() + 1)
+
+    @reactive.Calc
+    def cached():
+        """
+        Just in case f isn't a reactive calc already, wrap it in one. This ensures
+        that f() won't execute any more than it needs to.
+        """
+        return f()
+
+    @reactive.Effect(priority=102)
+    def primer():
+        """Whenever cached() is invalidated, let the decorator reschedule its update"""
+        if when is not None and not when():
+            return
+        try:
+            cached()
+        except Exception:
+            ...
+        finally:
+            on_invalidate(fire)
+
+    @reactive.Calc
+    @reactive.event(trigger, ignore_none=False)
+    @functools.wraps(f)
+    def limited():
+        return cached()
+
+    return limited
+
+
+def debounce(delay_secs, when=None):
+    def wrapper(f):
+        scheduler = get_scheduler()
+        key = object()
+
+        def on_invalidate(fire):
+            # Set a new deadline for when to let downstream know--unless cached() invalidates again
+            scheduler.schedule(key, time.monotonic() + delay_secs, fire)
+
+        return _rate_limited(f, on_invalidate, when)
 
     return wrapper
 
 
 def throttle(delay_secs):
     def wrapper(f):
-        last_signaled = reactive.Value(None)
-        last_triggered = reactive.Value(None)
-        trigger = reactive.Value(0)
-
-        @reactive.Calc
-        def cached():
-            return f()
-
-        @reactive.Effect(priority=102)
-        def primer():
-            try:
-                cached()
-            except Exception:
-                ...
-            finally:
-                last_signaled.set(time.time())
-
-        @reactive.Effect(priority=101)
-        def timer():
-            if last_triggered() is not None and last_signaled() < last_triggered():
+        scheduler = get_scheduler()
+        key = object()
+        last_triggered = None
+
+        def fire_and_record(fire):
+            nonlocal last_triggered
+            last_triggered = time.monotonic()
+            fire()
+
+        def on_invalidate(fire):
+            # At most one update per delay_secs; invalidations while one is pending join it
+            if scheduler.deadline(key) is not None:
                 return
+            now = time.monotonic()
+            deadline = now if last_triggered is None else max(now, last_triggered + delay_secs)
+            scheduler.schedule(key, deadline, lambda: fire_and_record(fire))
+
+        return _rate_limited(f, on_invalidate)
 
-            now = time.time()
-            if last_triggered() is None or (now - last_triggered()) >= delay_secs:
-                last_triggered.set(now)
-                with reactive.isolate():
-                    trigger.set(trigger() + 1)
-            else:
-                reactive.invalidate_later(delay_secs - (now - last_triggered()))
+    return wrapper
 
-        @reactive.Calc
-        @reactive.event(trigger, ignore_none=False)
-        @functools.wraps(f)
-        def throttled():
-            return cached()
 
-        return throttled
+def coalesce(delay_secs, max_latency_secs, when=None):
+    """
+    Like debounce, but with an upper bound on the wait: a burst of invalidations
+    collapses into a single update delay_secs after the last of them, and no later
+    than max_latency_secs after the first, so continuous edits still update.
+    With when (a reactive predicate), nothing is scheduled while it is false.
+    """
+    def wrapper(f):
+        scheduler = get_scheduler()
+        key = object()
+        burst_start = None
+
+        def end_burst(fire):
+            nonlocal burst_start
+            burst_start = None
+            fire()
+
+        def on_invalidate(fire):
+            # Push the deadline back, but never past max_latency_secs from the start of the burst
+            nonlocal burst_start
+            now = time.monotonic()
+            if burst_start is None:
+                burst_start = now
+            deadline = min(now + delay_secs, burst_start + max_latency_secs)
+            scheduler.schedule(key, deadline, lambda: end_burst(fire))
+
+        return _rate_limited(f, on_invalidate, when)
 
-    return wrapper
\ No newline at end of file
+    return wrapper
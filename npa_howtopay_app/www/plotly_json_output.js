@@ -0,0 +1,24 @@
+// Output binding for render_plotly_json: the server sends the figure as a JSON string
+(function () {
+  const binding = new Shiny.OutputBinding();
+
+  $.extend(binding, {
+    find: function (scope) {
+      return $(scope).find(".plotly-json-output");
+    },
+    renderValue: function (el, payload) {
+      if (!payload) {
+        Plotly.purge(el);
+        return;
+      }
+      const fig = JSON.parse(payload);
+      Plotly.react(el, fig.data, fig.layout, { responsive: true, displaylogo: false });
+    },
+    renderError: function (el, err) {
+      Plotly.purge(el);
+      Shiny.OutputBinding.prototype.renderError.call(this, el, err);
+    },
+  });
+
+  Shiny.outputBindings.register(binding, "npa.plotlyJsonOutput");
+})();
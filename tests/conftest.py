@@ -0,0 +1,4 @@
+import os
+
+# Keep model results in memory, so tests neither read nor fill the user's disk cache
+os.environ.setdefault("NPA_DISK_CACHE", "0")
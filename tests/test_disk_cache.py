@@ -0,0 +1,129 @@
+import itertools
+from collections import namedtuple
+from types import SimpleNamespace
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+import modules.disk_cache as disk_cache
+from modules.disk_cache import FRAME_NAMES, DiskCache
+from modules.result_store import ModelResult
+
+
+def make_result(key, years=50):
+    """A ModelResult with small frames of the usual shape"""
+    wide = pl.DataFrame({
+        "year": pl.int_range(2025, 2025 + years, eager=True),
+        "scenario_id": ["npa"] * years,
+        "value": pl.int_range(0, years, eager=True).cast(pl.Float64),
+    })
+    long = wide.with_columns(pl.lit("gas").alias("utility_type"))
+    return ModelResult(key, wide, wide, long, long)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A clock that ticks one second per reading, so access order is never a tie"""
+    ticks = itertools.count(1_000_000.0)
+    monkeypatch.setattr(disk_cache, "time", SimpleNamespace(time=lambda: next(ticks)))
+
+
+def entry_size(tmp_path):
+    """Bytes one make_result entry takes on disk"""
+    cache = DiskCache(tmp_path / "sizing")
+    cache.put(make_result("sizing"))
+    return cache.stats()["size_mb"] * 1e6
+
+
+def test_round_trip(tmp_path):
+    cache = DiskCache(tmp_path)
+    result = make_result("a")
+    cached = cache.put(result)
+    assert "a" in cache
+    for name in FRAME_NAMES:
+        assert_frame_equal(getattr(cached, name), getattr(result, name))
+        assert_frame_equal(getattr(cache.get("a"), name), getattr(result, name))
+    assert cache.get("missing") is None
+
+
+def test_entries_survive_reopening(tmp_path):
+    DiskCache(tmp_path).put(make_result("a"))
+    reopened = DiskCache(tmp_path)
+    assert "a" in reopened
+    assert_frame_equal(reopened.get("a").delta, make_result("a").delta)
+
+
+def test_writes_leave_no_temporary_files(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.put(make_result("a"))
+    cache.put(make_result("a", years=60))
+    assert not list(tmp_path.glob("*.tmp"))
+    assert sorted(path.name for path in tmp_path.glob("a.*")) == sorted(f"a.{name}.arrow" for name in FRAME_NAMES)
+    assert cache.get("a").delta.height == 60
+
+
+def test_failed_write_leaves_no_partial_entry(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path)
+    result = make_result("a")
+    write_ipc = pl.DataFrame.write_ipc
+    writes = itertools.count()
+
+    def write_ipc_until_full(df, path, **kwargs):
+        # The second frame's write runs out of space half way through
+        if next(writes) == 1:
+            path.write_bytes(b"partial")
+            raise OSError(28, "No space left on device")
+        return write_ipc(df, path, **kwargs)
+
+    monkeypatch.setattr(pl.DataFrame, "write_ipc", write_ipc_until_full)
+    with pytest.raises(OSError):
+        cache.put(result)
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert not list(tmp_path.glob("a.*"))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = DiskCache(tmp_path, max_bytes=int(2.5 * entry_size(tmp_path)))
+    cache.put(make_result("a"))
+    cache.put(make_result("b"))
+    cache.get("a")
+    cache.put(make_result("c"))
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert not list(tmp_path.glob("b.*"))
+    assert cache.stats()["entries"] == 2
+
+
+def test_entry_over_budget_is_returned_uncached(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=int(0.5 * entry_size(tmp_path)))
+    result = make_result("a")
+    assert cache.put(result) is result
+    assert "a" not in cache
+    assert cache.stats() == {"entries": 0, "size_mb": 0}
+
+
+def test_entries_from_another_model_version_are_evicted(tmp_path):
+    DiskCache(tmp_path).put(make_result("a"))
+    upgraded = DiskCache(tmp_path)
+    upgraded.model_version = "upgraded"
+    assert "a" not in upgraded
+    upgraded.put(make_result("b"))
+    assert upgraded.stats()["entries"] == 1
+    assert not list(tmp_path.glob("a.*"))
+
+
+def test_entry_with_missing_files_is_dropped(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.put(make_result("a"))
+    (tmp_path / f"a.{FRAME_NAMES[-1]}.arrow").unlink()
+    assert cache.get("a") is None
+    assert "a" not in cache
+
+
+def test_budget_capped_by_free_space(tmp_path, monkeypatch):
+    DiskUsage = namedtuple("DiskUsage", "total used free")
+    monkeypatch.setattr(disk_cache.shutil, "disk_usage", lambda path: DiskUsage(100e6, 90e6, 10e6))
+    cache = DiskCache(tmp_path, max_bytes=int(512e6))
+    assert cache.max_bytes == int(disk_cache.CACHE_MAX_FREE_SHARE * 10e6)
@@ -0,0 +1,113 @@
+import math
+
+import pytest
+
+import modules.goal_seek as goal_seek_module
+from modules.goal_seek import goal_seek
+
+BASE_VALUES = {"npa_install_costs_init": 1000.0, "npa_projects_per_year": 2}
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """
+    Replace the model with a function of the values, so a test sets the metric as a function of the
+    input being solved for. Returns the list of values the "model" was run on.
+    """
+    runs = []
+
+    def use(metric_of):
+        def get_result(values):
+            runs.append(values)
+            return values
+
+        monkeypatch.setattr(goal_seek_module, "get_result", get_result)
+        monkeypatch.setattr(goal_seek_module, "metric_value", lambda result, metric, scenario_id, year: metric_of(result))
+        monkeypatch.setattr(goal_seek_module, "params_hash", lambda values: repr(sorted(values.items())))
+        return runs
+
+    return use
+
+
+def solve(input_id="npa_install_costs_init", **kwargs):
+    return goal_seek(BASE_VALUES, input_id, "metric", "npa", 2050, **kwargs)
+
+
+def test_linear_root(model):
+    model(lambda values: 2 * (values["npa_install_costs_init"] - 1500))
+    result = solve()
+    assert result["converged"]
+    assert result["value"] == pytest.approx(1500, abs=0.005)
+    assert abs(result["metric_value"]) <= 0.01
+    # A secant step from the first two points lands on the root of a linear metric
+    assert result["evaluations"] == 3
+
+
+def test_nonlinear_root_far_from_start(model):
+    model(lambda values: math.sqrt(values["npa_install_costs_init"]) - 300)
+    result = solve(f_tol=1e-4)
+    assert result["converged"]
+    assert result["value"] == pytest.approx(90_000, rel=1e-5)
+
+
+def test_nonzero_target(model):
+    model(lambda values: values["npa_install_costs_init"] / 4)
+    result = solve(target=125.0)
+    assert result["converged"]
+    assert result["value"] == pytest.approx(500, abs=0.04)
+    assert result["metric_value"] == pytest.approx(125.0, abs=0.01)
+
+
+def test_already_at_target(model):
+    runs = model(lambda values: values["npa_install_costs_init"] - 1000)
+    result = solve()
+    assert result["converged"]
+    assert result["message"] == "Already at target"
+    assert len(runs) == 1
+
+
+def test_each_value_runs_once(model):
+    runs = model(lambda values: (values["npa_install_costs_init"] - 1234.5) ** 3)
+    result = solve()
+    assert result["converged"]
+    run_inputs = [values["npa_install_costs_init"] for values in runs]
+    assert len(run_inputs) == len(set(run_inputs)) == result["evaluations"] == result["computed"]
+
+
+def test_root_below_input_min(model):
+    model(lambda values: values["npa_install_costs_init"] + 100)
+    result = solve(max_evals=10)
+    assert not result["converged"]
+    assert result["value"] == 0
+    assert result["evaluations"] <= 10
+
+
+def test_integer_input_between_values(model):
+    model(lambda values: values["npa_projects_per_year"] - 7.5)
+    result = solve("npa_projects_per_year")
+    assert not result["converged"]
+    assert result["value"] in (7, 8)
+    assert result["message"] == "The target falls between input values 7 and 8"
+
+
+def test_integer_input_exact_root(model):
+    runs = model(lambda values: values["npa_projects_per_year"] - 12)
+    result = solve("npa_projects_per_year")
+    assert result["converged"]
+    assert result["value"] == 12
+    assert all(isinstance(values["npa_projects_per_year"], int) for values in runs)
+
+
+def test_metric_unavailable(model):
+    model(lambda values: None)
+    result = solve()
+    assert not result["converged"]
+    assert result["value"] is None
+    assert "isn't in the model run" in result["message"]
+
+
+def test_progress(model):
+    model(lambda values: math.sqrt(values["npa_install_costs_init"]) - 300)
+    progress = []
+    result = solve(on_progress=lambda done, total: progress.append((done, total)))
+    assert progress == [(done, 30) for done in range(1, result["evaluations"] + 1)]
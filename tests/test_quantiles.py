@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from modules.quantiles import StreamingQuantiles
+
+PROBS = [0.1, 0.5, 0.9]
+
+
+def streamed(samples, probs=PROBS):
+    est = StreamingQuantiles(probs)
+    for sample in samples:
+        est.update(sample)
+    return est
+
+
+@pytest.mark.parametrize("distribution", ["normal", "lognormal", "uniform"])
+def test_matches_numpy_quantile(distribution):
+    rng = np.random.default_rng(42)
+    samples = {
+        "normal": lambda: rng.normal(10, 2, size=(2000, 100)),
+        "lognormal": lambda: rng.lognormal(0, 0.5, size=(2000, 100)),
+        "uniform": lambda: rng.uniform(0, 1, size=(2000, 100)),
+    }[distribution]()
+    est = streamed(samples)
+    exact = np.quantile(samples, PROBS, axis=0)
+    # Errors in units of each cell's standard deviation
+    error = np.abs(est.result() - exact) / samples.std(axis=0)
+    assert est.result().shape == (len(PROBS), 100)
+    assert est.count == 2000
+    assert error.mean() < 0.02
+    assert error.max() < 0.2
+
+
+def test_cells_of_any_shape():
+    rng = np.random.default_rng(7)
+    samples = rng.normal(size=(2000, 3, 4)) * np.arange(1, 5) + np.arange(3)[:, None]
+    result = streamed(samples).result()
+    exact = np.quantile(samples, PROBS, axis=0)
+    assert result.shape == (len(PROBS), 3, 4)
+    assert np.all(np.abs(result - exact) / samples.std(axis=0) < 0.1)
+
+
+def test_quantiles_are_ordered():
+    rng = np.random.default_rng(1)
+    result = streamed(rng.exponential(size=(1000, 50)), probs=[0.05, 0.25, 0.5, 0.75, 0.95]).result()
+    assert np.all(np.diff(result, axis=0) >= 0)
+
+
+def test_few_observations_are_exact():
+    samples = np.array([[3.0, 1.0], [1.0, 2.0], [2.0, 5.0]])
+    np.testing.assert_allclose(streamed(samples).result(), np.quantile(samples, PROBS, axis=0))
+
+
+def test_constant_observations():
+    result = streamed(np.full((100, 4), 2.5)).result()
+    np.testing.assert_array_equal(result, np.full((len(PROBS), 4), 2.5))
+
+
+def test_no_observations():
+    with pytest.raises(ValueError):
+        StreamingQuantiles(PROBS).result()
@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+import pytest
+from shiny import reactive
+
+import ratelimit
+from ratelimit import TimerScheduler, coalesce, debounce, throttle
+
+DELAY_SECS = 0.03
+
+
+@pytest.fixture(autouse=True)
+def fresh_schedulers(monkeypatch):
+    """Each test gets its own scheduler for calcs made outside a session"""
+    monkeypatch.setattr(ratelimit, "_SCHEDULERS", {})
+
+
+async def settle(done, timeout=2.0):
+    """Flush the reactive graph until done() is true"""
+    deadline = time.monotonic() + timeout
+    while True:
+        await reactive.flush()
+        if done() or time.monotonic() > deadline:
+            return
+        await asyncio.sleep(0.002)
+
+
+def test_scheduler_bookkeeping():
+    scheduler = TimerScheduler()
+    assert scheduler.next_deadline() is None
+    scheduler.schedule("a", 20.0, lambda: None)
+    scheduler.schedule("b", 10.0, lambda: None)
+    assert len(scheduler) == 2
+    assert scheduler.next_deadline() == 10.0
+    scheduler.schedule("b", 30.0, lambda: None)
+    assert scheduler.deadline("b") == 30.0
+    assert scheduler.next_deadline() == 20.0
+    scheduler.cancel("a")
+    scheduler.cancel("missing")
+    assert scheduler.deadline("a") is None
+    assert len(scheduler) == 1
+    scheduler._timer.destroy()
+
+
+def test_scheduler_runs_callbacks_in_deadline_order():
+    async def main():
+        scheduler = TimerScheduler()
+        fired = []
+        now = time.monotonic()
+        scheduler.schedule("late", now + 2 * DELAY_SECS, lambda: fired.append("late"))
+        scheduler.schedule("early", now + DELAY_SECS, lambda: fired.append("early"))
+        scheduler.schedule("cancelled", now + DELAY_SECS, lambda: fired.append("cancelled"))
+        scheduler.schedule("replaced", now + DELAY_SECS, lambda: fired.append("replaced"))
+        scheduler.schedule("replaced", now + 3 * DELAY_SECS, lambda: fired.append("replacement"))
+        scheduler.cancel("cancelled")
+        await settle(lambda: len(scheduler) == 0)
+        scheduler._timer.destroy()
+        return fired, time.monotonic() - now
+
+    fired, elapsed = asyncio.run(main())
+    assert fired == ["early", "late", "replacement"]
+    assert elapsed >= 3 * DELAY_SECS
+
+
+def count_updates(calc):
+    """An effect reading calc, returning the list of values it saw"""
+    seen = []
+
+    @reactive.Effect
+    def consumer():
+        seen.append(calc())
+
+    return seen, consumer
+
+
+def test_debounce_collapses_a_burst():
+    async def main():
+        value = reactive.Value(0)
+        seen, consumer = count_updates(debounce(DELAY_SECS)(value))
+        await settle(lambda: seen == [0])
+        for i in range(1, 6):
+            value.set(i)
+            await reactive.flush()
+        await settle(lambda: len(seen) > 1)
+        await asyncio.sleep(2 * DELAY_SECS)
+        await reactive.flush()
+        consumer.destroy()
+        return seen
+
+    assert asyncio.run(main()) == [0, 5]
+
+
+def test_debounce_when_false_schedules_nothing():
+    async def main():
+        value = reactive.Value(0)
+        enabled = reactive.Value(False)
+        scheduler = ratelimit.get_scheduler()
+        seen, consumer = count_updates(debounce(DELAY_SECS, when=enabled)(value))
+        await settle(lambda: False, timeout=2 * DELAY_SECS)
+        value.set(1)
+        await reactive.flush()
+        pending_while_off = len(scheduler)
+        enabled.set(True)
+        await settle(lambda: seen[-1:] == [1])
+        consumer.destroy()
+        return pending_while_off, seen
+
+    pending_while_off, seen = asyncio.run(main())
+    assert pending_while_off == 0
+    assert seen[-1] == 1
+
+
+def test_throttle_limits_the_update_rate():
+    async def main():
+        value = reactive.Value(0)
+        seen, consumer = count_updates(throttle(DELAY_SECS)(value))
+        start = time.monotonic()
+        edits = 0
+        while time.monotonic() - start < 10 * DELAY_SECS:
+            edits += 1
+            value.set(edits)
+            await reactive.flush()
+            await asyncio.sleep(0.002)
+        await settle(lambda: False, timeout=2 * DELAY_SECS)
+        consumer.destroy()
+        return seen
+
+    seen = asyncio.run(main())
+    # About one update per DELAY_SECS over the 10 * DELAY_SECS of edits, rather than one per edit
+    assert 5 <= len(seen) <= 13
+
+
+def test_coalesce_updates_during_continuous_edits():
+    async def main():
+        value = reactive.Value(0)
+        seen, consumer = count_updates(coalesce(DELAY_SECS, max_latency_secs=3 * DELAY_SECS)(value))
+        await settle(lambda: seen == [0])
+        start = time.monotonic()
+        edits = 0
+        while time.monotonic() - start < 10 * DELAY_SECS:
+            edits += 1
+            value.set(edits)
+            await reactive.flush()
+            await asyncio.sleep(DELAY_SECS / 5)
+        updates_during_edits = len(seen) - 1
+        await settle(lambda: seen[-1] == edits)
+        consumer.destroy()
+        return updates_during_edits, seen, edits
+
+    updates_during_edits, seen, last = asyncio.run(main())
+    # Edits never pause for DELAY_SECS, so every update during them came from max_latency_secs
+    assert 2 <= updates_during_edits <= 5
+    assert seen[-1] == last
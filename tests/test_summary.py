@@ -0,0 +1,73 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from modules.result_store import ModelResult
+from modules.summary import stacked_summary, summary_table
+
+REVENUE = "inflation_adjusted_revenue_requirement"
+TARIFF = "variable_tariff"
+
+
+def long_frame(scale=1.0):
+    """Deltas from BAU over three years for BAU and one NPA scenario, on both utilities"""
+    return pl.DataFrame({
+        "year": [2025, 2026, 2027] * 4,
+        "scenario_id": ["bau"] * 6 + ["npa"] * 6,
+        "utility_type": (["gas"] * 3 + ["electric"] * 3) * 2,
+        REVENUE: [0.0] * 6 + [scale * v for v in (100.0, -300.0, 200.0, 50.0, 50.0, 50.0)],
+        TARIFF: [0.0] * 6 + [scale * v for v in (0.1, 0.2, -0.05, -0.01, -0.04, 0.03)],
+    })
+
+
+def row(summary, utility_type, metric):
+    rows = summary.filter((pl.col("utility_type") == utility_type) & (pl.col("metric") == metric)).to_dicts()
+    assert len(rows) == 1
+    return rows[0]
+
+
+def test_hand_computed_statistics():
+    summary = summary_table(long_frame(), npv_discount_rate=0.1, start_year=2025)
+    assert summary["scenario_id"].unique().to_list() == ["npa"]
+    assert summary.height == 4
+
+    gas_revenue = row(summary, "gas", REVENUE)
+    assert gas_revenue["cumulative"] == pytest.approx(0.0)
+    assert gas_revenue["npv"] == pytest.approx(100 - 300 / 1.1 + 200 / 1.1 ** 2)
+    # The peak is the largest change in either direction, with its sign
+    assert gas_revenue["peak_delta"] == pytest.approx(-300.0)
+    assert gas_revenue["peak_year"] == 2026
+
+    electric_revenue = row(summary, "electric", REVENUE)
+    assert electric_revenue["cumulative"] == pytest.approx(150.0)
+    assert electric_revenue["npv"] == pytest.approx(50 + 50 / 1.1 + 50 / 1.1 ** 2)
+    assert electric_revenue["peak_year"] == 2025
+
+    # Tariffs aren't flows, so only their peak is reported
+    gas_tariff = row(summary, "gas", TARIFF)
+    assert gas_tariff["cumulative"] is None and gas_tariff["npv"] is None
+    assert gas_tariff["peak_delta"] == pytest.approx(0.2)
+    assert gas_tariff["peak_year"] == 2026
+
+
+def test_npv_discounts_to_the_start_year():
+    summary = summary_table(long_frame(), npv_discount_rate=0.05, start_year=2026)
+    assert row(summary, "gas", REVENUE)["npv"] == pytest.approx(100 * 1.05 - 300 + 200 / 1.05)
+
+
+def test_metrics_missing_from_the_frame_are_skipped():
+    summary = summary_table(long_frame().drop(TARIFF), npv_discount_rate=0.1, start_year=2025)
+    assert summary["metric"].unique().to_list() == [REVENUE]
+
+
+def test_stacked_runs_match_one_table_per_run():
+    runs = [
+        (run_id, {"npv_discount_rate": rate, "start_year": start_year}, ModelResult(run_id, None, None, long_frame(scale), None))
+        for run_id, rate, start_year, scale in [("a", 10, 2025, 1.0), ("b", 3, 2026, -2.0), ("c", 0, 2025, 0.5)]
+    ]
+    looped = pl.concat([
+        summary_table(result.delta_long, values["npv_discount_rate"] / 100, values["start_year"])
+        .select(pl.lit(run_id).alias("run"), pl.all())
+        for run_id, values, result in runs
+    ])
+    assert_frame_equal(stacked_summary(runs), looped, check_dtypes=False)